@@ -14,6 +14,9 @@ from cryptography.hazmat.primitives.asymmetric import ed25519
 from cryptography.hazmat.primitives import serialization
 import json
 import base64
+import logging
+
+logger = logging.getLogger(__name__)
 
 class CardanoDIDVerifier:
     """
@@ -22,7 +25,7 @@ class CardanoDIDVerifier:
     """
     
     def __init__(self):
-        print("Initializing Cardano DID Verifier (Docker-free mode)")
+        logger.info("Initializing Cardano DID Verifier (Docker-free mode)")
     
     def extract_public_key_from_did(self, did: str) -> str:
         """
@@ -62,12 +65,10 @@ class CardanoDIDVerifier:
             True if signature is valid, False otherwise
         """
         try:
-            print(f"Verifying signature with public key: {public_key_hex[:20]}...")
-            
             # Parse JWS compact format: header.payload.signature
             parts = signature.split('.')
             if len(parts) != 3:
-                print("Invalid JWS format")
+                logger.info("Signature rejected: invalid JWS format", extra={"reason": "jws_format"})
                 return False
             
             header_b64, payload_b64, signature_b64 = parts
@@ -75,13 +76,15 @@ class CardanoDIDVerifier:
             # Decode header to check algorithm
             header = json.loads(base64.urlsafe_b64decode(header_b64 + '=='))
             if header.get('alg') not in ['EdDSA', 'ES256']:
-                print(f"Unsupported algorithm: {header.get('alg')}")
+                logger.info("Signature rejected: unsupported algorithm %s", header.get('alg'),
+                            extra={"reason": "algorithm"})
                 return False
             
             # Decode payload (should be the challenge)
             payload = base64.urlsafe_b64decode(payload_b64 + '==').decode('utf-8')
             if payload != message:
-                print("Payload doesn't match challenge")
+                logger.info("Signature rejected: payload does not match challenge",
+                            extra={"reason": "payload_mismatch"})
                 return False
             
             # Decode signature
@@ -91,13 +94,15 @@ class CardanoDIDVerifier:
             # Ed25519 public key must be exactly 32 bytes (64 hex chars)
             try:
                 if len(public_key_hex) != 64:
-                    print(f"Invalid public key length: {len(public_key_hex)} (expected 64 hex chars)")
+                    logger.info("Signature rejected: public key is %d hex chars (expected 64)",
+                                len(public_key_hex), extra={"reason": "key_length"})
                     return False
                 
                 public_key_bytes = bytes.fromhex(public_key_hex)
                 
                 if len(public_key_bytes) != 32:
-                    print(f"Invalid public key byte length: {len(public_key_bytes)} (expected 32 bytes)")
+                    logger.info("Signature rejected: public key is %d bytes (expected 32)",
+                                len(public_key_bytes), extra={"reason": "key_length"})
                     return False
                 
                 # Create Ed25519 public key object
@@ -108,15 +113,17 @@ class CardanoDIDVerifier:
                 message_to_verify = f"{header_b64}.{payload_b64}".encode('utf-8')
                 public_key.verify(signature_bytes, message_to_verify)
                 
-                print("✓ Signature verified successfully")
+                logger.debug("Signature verified", extra={"sampled": True})
                 return True
                 
             except Exception as verify_error:
-                print(f"Signature verification failed: {str(verify_error)}")
+                logger.info("Signature rejected: %s", type(verify_error).__name__,
+                            extra={"reason": "invalid_signature"})
                 return False
             
         except Exception as e:
-            print(f"Error during signature verification: {str(e)}")
+            logger.warning("Error during signature verification: %s", type(e).__name__,
+                           extra={"reason": "error"})
             return False
     
     def verify_did_authentication(self, did: str, challenge: str, signature: str) -> bool:
@@ -132,26 +139,21 @@ class CardanoDIDVerifier:
             True if authentication successful, False otherwise
         """
         try:
-            print(f"\n=== Verifying DID Authentication ===")
-            print(f"DID: {did}")
-            print(f"Challenge: {challenge[:20]}...")
-            
             # Step 1: Extract public key from DID
             public_key_hex = self.extract_public_key_from_did(did)
-            print(f"Extracted public key: {public_key_hex[:20]}...")
             
             # Step 2: Verify signature
             is_valid = self.verify_signature(challenge, signature, public_key_hex)
             
             if is_valid:
-                print("✓ DID authentication successful")
+                logger.info("DID authentication succeeded", extra={"did": did, "sampled": True})
             else:
-                print("✗ DID authentication failed")
+                logger.info("DID authentication failed", extra={"did": did})
             
             return is_valid
             
         except Exception as e:
-            print(f"DID authentication error: {str(e)}")
+            logger.info("DID authentication error: %s", e, extra={"did": did})
             return False
 
 # Global verifier instance
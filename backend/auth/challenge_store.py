@@ -1,87 +1,80 @@
 import secrets
-from typing import Dict, Optional
-from datetime import datetime, timedelta
+import time
+
+import metrics
+from repositories.base import CampaignRepository
+from services.campaign_service import campaign_service
+
+CHALLENGES_ISSUED = metrics.counter(
+    "auth_challenges_issued_total",
+    "Authentication challenges issued"
+)
+CHALLENGE_STORE_SIZE = metrics.gauge(
+    "auth_challenge_store_size",
+    "Challenges in auth_challenges after the last challenge_sweep"
+)
 
 class ChallengeStore:
     """
-    In-memory store for authentication challenges.
-    In production, use Redis or a proper database.
+    Store for authentication challenges.
+    
+    Challenges live in the database (auth_challenges), so a challenge
+    issued by one worker or node can be verified by any other.
     """
     
-    def __init__(self, expiration_minutes: int = 5):
-        self._challenges: Dict[str, dict] = {}
+    def __init__(self, repository: CampaignRepository, expiration_minutes: int = 5):
+        self.repository = repository
         self.expiration_minutes = expiration_minutes
     
-    def create_challenge(self, did: str) -> str:
+    async def create_challenge(self, did: str) -> str:
         """
         Generate a random challenge for a DID.
         
+        A new challenge replaces the DID's previous one.
+        
         Args:
             did: The DID requesting authentication
-            
+        
         Returns:
             A random 32-byte hex string as the challenge
         """
         challenge = secrets.token_hex(32)
         
-        self._challenges[did] = {
-            "challenge": challenge,
-            "created_at": datetime.utcnow(),
-            "used": False
-        }
-        
-        # Clean up expired challenges
-        self._cleanup_expired()
+        await self.repository.insert_challenge(
+            did,
+            challenge,
+            time.time() + self.expiration_minutes * 60
+        )
+        CHALLENGES_ISSUED.inc()
         
+        # Expired challenges are swept by the maintenance scheduler
         return challenge
     
-    def verify_challenge(self, did: str, challenge: str) -> bool:
+    async def verify_challenge(self, did: str, challenge: str) -> bool:
         """
         Verify if the challenge is valid for the given DID.
         
+        A valid challenge is used up: verifying it again fails.
+        
         Args:
             did: The DID being authenticated
             challenge: The challenge string to verify
-            
+        
         Returns:
             True if challenge is valid and not expired, False otherwise
         """
-        if did not in self._challenges:
-            return False
-        
-        stored = self._challenges[did]
-        
-        # Check if already used
-        if stored["used"]:
-            return False
-        
-        # Check if expired
-        expiration = stored["created_at"] + timedelta(minutes=self.expiration_minutes)
-        if datetime.utcnow() > expiration:
-            del self._challenges[did]
-            return False
-        
-        # Check if challenge matches
-        if stored["challenge"] != challenge:
-            return False
-        
-        # Mark as used
-        stored["used"] = True
-        
-        return True
+        return await self.repository.consume_challenge(did, challenge)
     
-    def _cleanup_expired(self):
-        """Remove expired challenges from the store."""
-        now = datetime.utcnow()
-        expired_dids = []
-        
-        for did, data in self._challenges.items():
-            expiration = data["created_at"] + timedelta(minutes=self.expiration_minutes)
-            if now > expiration:
-                expired_dids.append(did)
+    async def remove_expired(self) -> int:
+        """
+        Remove expired challenges from the store and update its size gauge.
         
-        for did in expired_dids:
-            del self._challenges[did]
+        Returns:
+            Number of challenges removed
+        """
+        removed = await self.repository.prune_challenges()
+        CHALLENGE_STORE_SIZE.set(await self.repository.count_challenges())
+        return removed
 
 # Global challenge store instance
-challenge_store = ChallengeStore()
+challenge_store = ChallengeStore(campaign_service.repository)
@@ -0,0 +1,125 @@
+"""
+Denylist of revoked access tokens, consulted on every token verification
+
+Revoked token IDs (jti) are grouped into partitions by expiry time, one per
+`window` seconds. Each partition has a Bloom filter, checked first, and a
+sorted list of its token IDs that confirms a filter hit exactly. Most checks
+end at the filter (a few bit lookups) or find no partition at all. A
+partition is dropped once its window has passed, because the tokens in it
+have expired and are rejected anyway. Memory stays bounded by the
+revocations of one access-token lifetime.
+
+Each worker keeps its own denylist. Revocations are stored in the database
+and synced into every worker (see services/token_service.py).
+"""
+import bisect
+import hashlib
+import math
+import time
+from typing import Dict, List, Optional
+
+import metrics
+from config import settings
+
+DENYLIST_ENTRIES = metrics.gauge(
+    "token_denylist_entries",
+    "Revoked access tokens held in this worker's denylist"
+)
+DENYLIST_HITS = metrics.counter(
+    "token_denylist_hits_total",
+    "Bloom filter hits, by exact lookup result (revoked or false_positive)",
+    ("result",)
+)
+
+class BloomFilter:
+    """Fixed-size Bloom filter sized for `capacity` items at `error_rate`"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        step = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class _Partition:
+    def __init__(self, capacity: int, error_rate: float):
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.token_ids: List[str] = []  # sorted
+
+class TokenDenylist:
+    """Time-partitioned set of revoked token IDs"""
+
+    def __init__(self, window: float = 300, capacity: int = 10000, error_rate: float = 0.001):
+        """
+        Args:
+            window: Seconds of token expiry covered by one partition
+            capacity: Revocations per partition the filter is sized for
+                (more still work, with a higher false-positive rate)
+            error_rate: Target false-positive rate of each filter
+        """
+        self.window = window
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._partitions: Dict[int, _Partition] = {}
+        self.size = 0
+
+    def add(self, token_id: str, expires_at: float):
+        """Deny a token until expires_at (Unix time)"""
+        if expires_at <= time.time():
+            return
+        key = int(expires_at // self.window)
+        partition = self._partitions.get(key)
+        if partition is None:
+            partition = self._partitions[key] = _Partition(self.capacity, self.error_rate)
+            self.prune()
+        index = bisect.bisect_left(partition.token_ids, token_id)
+        if index < len(partition.token_ids) and partition.token_ids[index] == token_id:
+            return
+        partition.bloom.add(token_id)
+        partition.token_ids.insert(index, token_id)
+        self.size += 1
+        DENYLIST_ENTRIES.set(self.size)
+
+    def is_revoked(self, token_id: str, expires_at: float) -> bool:
+        """True if the token was revoked; expires_at is the token's exp claim"""
+        partition: Optional[_Partition] = self._partitions.get(int(expires_at // self.window))
+        if partition is None or token_id not in partition.bloom:
+            return False
+        index = bisect.bisect_left(partition.token_ids, token_id)
+        revoked = index < len(partition.token_ids) and partition.token_ids[index] == token_id
+        DENYLIST_HITS.inc(result="revoked" if revoked else "false_positive")
+        return revoked
+
+    def prune(self) -> int:
+        """
+        Drop partitions whose tokens have all expired
+
+        Returns:
+            Number of token IDs dropped
+        """
+        current = int(time.time() // self.window)
+        dropped = 0
+        for key in [key for key in self._partitions if key < current]:
+            dropped += len(self._partitions.pop(key).token_ids)
+        self.size -= dropped
+        DENYLIST_ENTRIES.set(self.size)
+        return dropped
+
+# Global denylist instance (filled by the token service)
+token_denylist = TokenDenylist(
+    window=settings.TOKEN_DENYLIST_WINDOW_SECONDS,
+    capacity=settings.TOKEN_DENYLIST_CAPACITY,
+    error_rate=settings.TOKEN_DENYLIST_ERROR_RATE
+)
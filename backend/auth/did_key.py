@@ -0,0 +1,189 @@
+"""
+Local verifier for did:key DIDs
+
+A did:key is self-certifying: the identifier is the public key itself,
+multibase-encoded (base58btc, "z" prefix) with a multicodec prefix naming
+the key type. Decoding it needs no resolver, so signatures are verified
+with no network I/O. Supported key types:
+
+- Ed25519 (multicodec 0xed), signed with EdDSA
+- P-256 (multicodec 0x1200, compressed point), signed with ES256
+"""
+import base64
+import json
+import logging
+from functools import lru_cache
+from typing import Tuple, Union
+
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+PublicKey = Union[ed25519.Ed25519PublicKey, ec.EllipticCurvePublicKey]
+
+BASE58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_BASE58_INDEX = {char: index for index, char in enumerate(BASE58_ALPHABET)}
+
+# Multicodec code -> (JWS algorithm, public key length in bytes)
+MULTICODEC_ED25519 = 0xed
+MULTICODEC_P256 = 0x1200
+KEY_TYPES = {
+    MULTICODEC_ED25519: ("EdDSA", 32),
+    MULTICODEC_P256: ("ES256", 33),
+}
+
+logger = logging.getLogger(__name__)
+
+def base58_decode(value: str) -> bytes:
+    """Decode base58 (Bitcoin alphabet)"""
+    number = 0
+    for char in value:
+        try:
+            number = number * 58 + _BASE58_INDEX[char]
+        except KeyError:
+            raise ValueError(f"Invalid base58 character: {char!r}")
+    decoded = number.to_bytes((number.bit_length() + 7) // 8, "big")
+    # Each leading "1" encodes a leading zero byte
+    leading_zeros = len(value) - len(value.lstrip("1"))
+    return b"\x00" * leading_zeros + decoded
+
+def read_varint(data: bytes) -> Tuple[int, int]:
+    """
+    Read an unsigned varint (as used by multicodec)
+
+    Returns:
+        (value, number of bytes read)
+    """
+    value = 0
+    for index, byte in enumerate(data[:9]):
+        value |= (byte & 0x7f) << (7 * index)
+        if not byte & 0x80:
+            return value, index + 1
+    raise ValueError("Invalid varint")
+
+@lru_cache(maxsize=4096)
+def decode_did_key(did: str) -> Tuple[str, PublicKey]:
+    """
+    Decode the public key of a did:key
+
+    Args:
+        did: DID such as "did:key:z6Mk..." (a "#fragment" is ignored)
+
+    Returns:
+        (JWS algorithm the key signs with, public key)
+
+    Raises:
+        ValueError: Not a did:key, or an unsupported or malformed key
+    """
+    parts = did.split("#", 1)[0].split(":")
+    if len(parts) != 3 or parts[0] != "did" or parts[1] != "key":
+        raise ValueError(f"Not a did:key: {did}")
+    identifier = parts[2]
+    if not identifier.startswith("z"):
+        raise ValueError("did:key must be base58btc multibase ('z' prefix)")
+
+    data = base58_decode(identifier[1:])
+    codec, offset = read_varint(data)
+    if codec not in KEY_TYPES:
+        raise ValueError(f"Unsupported did:key key type: multicodec 0x{codec:x}")
+    algorithm, key_length = KEY_TYPES[codec]
+    key_bytes = data[offset:]
+    if len(key_bytes) != key_length:
+        raise ValueError(f"did:key public key is {len(key_bytes)} bytes (expected {key_length})")
+
+    if codec == MULTICODEC_ED25519:
+        return algorithm, ed25519.Ed25519PublicKey.from_public_bytes(key_bytes)
+    return algorithm, ec.EllipticCurvePublicKey.from_encoded_point(ec.SECP256R1(), key_bytes)
+
+def _b64url_decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+class DIDKeyVerifier:
+    """Verify challenge signatures of did:key DIDs without a resolver"""
+
+    def verify_signature(self, message: str, signature: str, algorithm: str, public_key: PublicKey) -> bool:
+        """
+        Verify a compact JWS whose payload must be `message`
+
+        Args:
+            message: Original challenge message
+            signature: JWS signature in compact format
+            algorithm: Algorithm of the DID's key ("EdDSA" or "ES256")
+            public_key: Public key decoded from the DID
+
+        Returns:
+            True if signature is valid, False otherwise
+        """
+        parts = signature.split(".")
+        if len(parts) != 3:
+            logger.info("Signature rejected: invalid JWS format", extra={"reason": "jws_format"})
+            return False
+        header_b64, payload_b64, signature_b64 = parts
+
+        try:
+            header = json.loads(_b64url_decode(header_b64))
+            payload = _b64url_decode(payload_b64)
+            signature_bytes = _b64url_decode(signature_b64)
+        except ValueError:
+            logger.info("Signature rejected: invalid JWS encoding", extra={"reason": "jws_format"})
+            return False
+
+        # The key type fixes the algorithm; a header may not pick another one
+        if not isinstance(header, dict) or header.get("alg") != algorithm:
+            logger.info("Signature rejected: algorithm %s does not match the key",
+                        header.get("alg") if isinstance(header, dict) else None,
+                        extra={"reason": "algorithm"})
+            return False
+        if payload != message.encode("utf-8"):
+            logger.info("Signature rejected: payload does not match challenge",
+                        extra={"reason": "payload_mismatch"})
+            return False
+
+        signing_input = f"{header_b64}.{payload_b64}".encode("utf-8")
+        try:
+            if algorithm == "EdDSA":
+                public_key.verify(signature_bytes, signing_input)
+            else:
+                # JWS carries r || s, 32 bytes each; cryptography wants DER
+                if len(signature_bytes) != 64:
+                    raise InvalidSignature()
+                der = encode_dss_signature(
+                    int.from_bytes(signature_bytes[:32], "big"),
+                    int.from_bytes(signature_bytes[32:], "big")
+                )
+                public_key.verify(der, signing_input, ec.ECDSA(hashes.SHA256()))
+        except InvalidSignature:
+            logger.info("Signature rejected: InvalidSignature", extra={"reason": "invalid_signature"})
+            return False
+
+        logger.debug("Signature verified", extra={"sampled": True})
+        return True
+
+    def verify_did_authentication(self, did: str, challenge: str, signature: str) -> bool:
+        """
+        Complete DID authentication verification.
+
+        Args:
+            did: did:key identifier
+            challenge: Random challenge string
+            signature: JWS signature of the challenge
+
+        Returns:
+            True if authentication successful, False otherwise
+        """
+        try:
+            algorithm, public_key = decode_did_key(did)
+        except ValueError as e:
+            logger.info("DID authentication error: %s", e, extra={"did": did, "reason": "did_format"})
+            return False
+
+        is_valid = self.verify_signature(challenge, signature, algorithm, public_key)
+        if is_valid:
+            logger.info("DID authentication succeeded", extra={"did": did, "sampled": True})
+        else:
+            logger.info("DID authentication failed", extra={"did": did})
+        return is_valid
+
+# Global verifier instance
+did_key_verifier = DIDKeyVerifier()
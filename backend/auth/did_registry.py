@@ -0,0 +1,87 @@
+"""
+DID verifier registry: picks a verifier by DID method
+
+Methods whose DIDs carry their key are verified locally, with no I/O:
+did:key (Ed25519 and P-256) and did:prism (hex Ed25519 key, see
+CardanoDIDVerifier). Other methods need their DID document resolved; they
+go to the Identus agent when DID_REMOTE_RESOLUTION is enabled and are
+rejected otherwise. Remote verification runs in a worker thread, so a slow
+resolver does not hold up the event loop.
+"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+import metrics
+from auth.cardano_verifier import cardano_verifier
+from auth.did_key import did_key_verifier
+from auth.verifier import did_verifier
+from config import settings
+
+DID_VERIFICATIONS = metrics.counter(
+    "did_verifications_total",
+    "DID signature verifications by DID method, verifier (local or remote) and result",
+    ("method", "verifier", "result")
+)
+
+logger = logging.getLogger(__name__)
+
+def did_method(did: str) -> Optional[str]:
+    """Method of a DID ("key" for "did:key:..."), or None if it is not a DID"""
+    parts = did.split(":", 2)
+    if len(parts) != 3 or parts[0] != "did" or not parts[1]:
+        return None
+    return parts[1]
+
+class DIDVerifierRegistry:
+    """
+    Dispatches DID authentication to the verifier registered for the DID's method
+
+    Verifiers provide verify_did_authentication(did, challenge, signature).
+    """
+
+    def __init__(self, fallback=None):
+        self.local: Dict[str, object] = {}
+        # Resolves DID documents over the network; None rejects unknown methods
+        self.fallback = fallback
+
+    def register(self, method: str, verifier):
+        """Verify DIDs of `method` locally with `verifier`"""
+        self.local[method] = verifier
+
+    async def verify_did_authentication(self, did: str, challenge: str, signature: str) -> bool:
+        """
+        Verify a signed challenge with the verifier for the DID's method
+
+        Returns:
+            True if authentication successful, False otherwise
+        """
+        method = did_method(did)
+        verifier = self.local.get(method)
+        kind = "local"
+        if verifier is None:
+            verifier = self.fallback
+            kind = "remote"
+        if method is None or verifier is None:
+            logger.info("DID authentication failed: unsupported DID method %s", method,
+                        extra={"did": did, "reason": "did_method"})
+            # Unregistered methods are labelled "other" to keep the label set bounded
+            DID_VERIFICATIONS.inc(method="other" if method else "invalid", verifier="none",
+                                  result="unsupported")
+            return False
+
+        if kind == "local":
+            is_valid = verifier.verify_did_authentication(did, challenge, signature)
+        else:
+            is_valid = await asyncio.to_thread(verifier.verify_did_authentication, did, challenge, signature)
+        DID_VERIFICATIONS.inc(
+            method=method if kind == "local" else "other",
+            verifier=kind,
+            result="success" if is_valid else "failure"
+        )
+        return is_valid
+
+# Global registry instance
+did_verifiers = DIDVerifierRegistry(did_verifier if settings.DID_REMOTE_RESOLUTION else None)
+did_verifiers.register("key", did_key_verifier)
+did_verifiers.register("prism", cardano_verifier)
@@ -1,8 +1,113 @@
+"""
+Access tokens (JWT)
+
+With JWT_ALGORITHM=ES256 (the default) tokens are signed with a P-256
+private key and carry its key ID (`kid`) in the header. The public keys
+are published at /.well-known/jwks.json, so other services verify tokens
+locally instead of calling /auth/me. Keys are PEM files named `<kid>.pem`
+in JWT_KEYS_DIR; the one named by JWT_ACTIVE_KEY_ID (default: the last by
+name) signs, and all of them verify, which lets keys be rotated without
+invalidating tokens already issued. Keys are loaded by the app lifespan,
+which fails if the directory has none: every node must sign and verify
+with the same provisioned keys. JWT_GENERATE_DEV_KEY=true generates one
+instead, for development.
+
+JWT_ALGORITHM=HS256 keeps the shared JWT_SECRET_KEY instead (no JWKS).
+
+Access tokens are short-lived and carry a token ID (`jti`); revoked ones
+are rejected through the denylist (auth/denylist.py).
+"""
+import glob
+import logging
+import os
+import secrets
+import tempfile
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import jwt
+from typing import Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from jose import jwk, jwt
+from jose.backends.base import Key
+from auth.denylist import token_denylist
 from config import settings
 
+logger = logging.getLogger(__name__)
+
+class SigningKeys:
+    """ES256 key set loaded from a directory of PEM private keys"""
+
+    def __init__(self, directory: str, active_kid: str = ""):
+        self.directory = directory
+        self.active_kid = active_kid
+        self.signing_key: Optional[Key] = None
+        self.verification_keys: Dict[str, Key] = {}
+        self.jwks: Dict[str, List[dict]] = {"keys": []}
+
+    def load(self, generate: bool = False):
+        """
+        Read the keys
+
+        Args:
+            generate: Generate a key if the directory has none (development)
+        """
+        paths = sorted(glob.glob(os.path.join(self.directory, "*.pem")))
+        if not paths:
+            if not generate:
+                raise RuntimeError(
+                    f"No JWT signing keys (<kid>.pem) in {self.directory}. Provision the "
+                    "same keys on every node (JWT_KEYS_DIR), or set JWT_GENERATE_DEV_KEY=true "
+                    "for development."
+                )
+            paths = [self._generate()]
+
+        private_keys = {}
+        for path in paths:
+            with open(path, "rb") as key_file:
+                private_key = serialization.load_pem_private_key(key_file.read(), password=None)
+            if not isinstance(private_key, ec.EllipticCurvePrivateKey) \
+                    or not isinstance(private_key.curve, ec.SECP256R1):
+                raise ValueError(f"{path} is not a P-256 (ES256) private key")
+            private_keys[os.path.basename(path)[:-len(".pem")]] = private_key
+
+        active_kid = self.active_kid or max(private_keys)
+        if active_kid not in private_keys:
+            raise ValueError(f"JWT_ACTIVE_KEY_ID {active_kid} has no key in {self.directory}")
+
+        # Prepared once: jose would otherwise rebuild the key on every call
+        self.signing_key = jwk.construct(private_keys[active_kid], "ES256")
+        self.verification_keys = {
+            kid: jwk.construct(private_key.public_key(), "ES256")
+            for kid, private_key in private_keys.items()
+        }
+        self.jwks = {"keys": [
+            {**key.to_dict(), "kid": kid, "use": "sig"}
+            for kid, key in self.verification_keys.items()
+        ]}
+        self.active_kid = active_kid
+        logger.info("Loaded %d JWT signing keys (active: %s)", len(private_keys), active_kid)
+
+    def _generate(self) -> str:
+        """Write a new private key; when workers race, the first one's key is kept"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, datetime.utcnow().strftime("%Y%m%d") + ".pem")
+        pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        )
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as key_file:
+                key_file.write(pem)
+            os.link(temp_path, path)  # fails if another worker won
+            logger.info("Generated JWT signing key %s", path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(temp_path)
+        return path
+
 def create_access_token(did: str) -> str:
     """
     Create a JWT access token for the authenticated DID.
@@ -13,16 +118,27 @@ def create_access_token(did: str) -> str:
     Returns:
         Encoded JWT token string
     """
-    expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
+    expire = datetime.utcnow() + timedelta(minutes=settings.JWT_ACCESS_TOKEN_MINUTES)
     
     payload = {
         "sub": did,
         "did": did,
         "exp": expire,
         "iat": datetime.utcnow(),
+        "jti": secrets.token_urlsafe(16),
         "type": "access_token"
     }
     
+    if signing_keys is not None:
+        if signing_keys.signing_key is None:
+            raise RuntimeError("JWT signing keys are not loaded (see load_signing_keys)")
+        return jwt.encode(
+            payload,
+            signing_keys.signing_key,
+            algorithm="ES256",
+            headers={"kid": signing_keys.active_kid}
+        )
+    
     token = jwt.encode(
         payload,
         settings.JWT_SECRET_KEY,
@@ -39,14 +155,22 @@ def verify_token(token: str) -> Optional[dict]:
         token: The JWT token to verify
         
     Returns:
-        Decoded token payload if valid, None otherwise
+        Decoded token payload if valid and not revoked, None otherwise
     """
     try:
-        payload = jwt.decode(
-            token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
-        )
+        if signing_keys is not None:
+            key = signing_keys.verification_keys.get(jwt.get_unverified_header(token).get("kid"))
+            if key is None:
+                return None
+            payload = jwt.decode(token, key, algorithms=["ES256"])
+        else:
+            payload = jwt.decode(
+                token,
+                settings.JWT_SECRET_KEY,
+                algorithms=[settings.JWT_ALGORITHM]
+            )
+        if "jti" in payload and token_denylist.is_revoked(payload["jti"], payload["exp"]):
+            return None
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -67,3 +191,20 @@ def extract_did_from_token(token: str) -> Optional[str]:
     if payload:
         return payload.get("did")
     return None
+
+def load_signing_keys():
+    """Load the ES256 keys from JWT_KEYS_DIR (nothing to load for HS256)"""
+    if signing_keys is not None:
+        signing_keys.load(generate=settings.JWT_GENERATE_DEV_KEY)
+
+def _create_signing_keys() -> Optional[SigningKeys]:
+    if settings.JWT_ALGORITHM != "ES256":
+        return None
+    directory = settings.JWT_KEYS_DIR or os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "jwt_keys"
+    )
+    return SigningKeys(directory, settings.JWT_ACTIVE_KEY_ID)
+
+# Global key set (None with a shared-secret JWT_ALGORITHM), empty until
+# load_signing_keys() runs in the app lifespan
+signing_keys = _create_signing_keys()
@@ -1,4 +1,5 @@
 import json
+import logging
 import base64
 import requests
 from typing import Optional, Dict, Any
@@ -9,6 +10,8 @@ from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.backends import default_backend
 from config import settings
 
+logger = logging.getLogger(__name__)
+
 class DIDVerifier:
     """
     Handles DID resolution and signature verification using Hyperledger Identus.
@@ -35,14 +38,14 @@ class DIDVerifier:
             if response.status_code == 200:
                 return response.json()
             elif response.status_code == 404:
-                print(f"DID not found: {did}")
+                logger.info("DID not found: %s", did)
                 return None
             else:
-                print(f"DID resolution failed with status {response.status_code}: {response.text}")
+                logger.warning("DID resolution failed with status %s", response.status_code)
                 return None
                 
         except requests.RequestException as e:
-            print(f"Error resolving DID: {str(e)}")
+            logger.warning("Error resolving DID: %s", e)
             return None
     
     def extract_public_key(self, did_document: Dict[str, Any]) -> Optional[Dict[str, Any]]:
@@ -60,7 +63,7 @@ class DIDVerifier:
             verification_methods = did_document.get("verificationMethod", [])
             
             if not verification_methods:
-                print("No verification methods found in DID document")
+                logger.info("No verification methods found in DID document")
                 return None
             
             # Get the first verification method
@@ -71,13 +74,13 @@ class DIDVerifier:
             
             if not public_key_jwk:
                 # Try publicKeyMultibase or other formats
-                print("publicKeyJwk not found, checking other formats...")
+                logger.info("publicKeyJwk not found in DID document")
                 return None
             
             return public_key_jwk
             
         except Exception as e:
-            print(f"Error extracting public key: {str(e)}")
+            logger.warning("Error extracting public key: %s", e)
             return None
     
     def verify_signature(
@@ -112,7 +115,7 @@ class DIDVerifier:
             return decoded_str == message
             
         except Exception as e:
-            print(f"Signature verification failed: {str(e)}")
+            logger.info("Signature verification failed: %s", type(e).__name__)
             return False
     
     def verify_did_authentication(
@@ -135,22 +138,22 @@ class DIDVerifier:
         # Step 1: Resolve DID
         did_document = self.resolve_did(did)
         if not did_document:
-            print(f"Failed to resolve DID: {did}")
+            logger.info("Failed to resolve DID", extra={"did": did})
             return False
         
         # Step 2: Extract public key
         public_key = self.extract_public_key(did_document)
         if not public_key:
-            print(f"Failed to extract public key from DID document")
+            logger.info("Failed to extract public key from DID document", extra={"did": did})
             return False
         
         # Step 3: Verify signature
         is_valid = self.verify_signature(challenge, signature, public_key)
         
         if is_valid:
-            print(f"Successfully verified DID authentication for: {did}")
+            logger.info("DID authentication succeeded", extra={"did": did, "sampled": True})
         else:
-            print(f"Signature verification failed for: {did}")
+            logger.info("DID authentication failed", extra={"did": did})
         
         return is_valid
 
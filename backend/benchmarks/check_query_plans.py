@@ -0,0 +1,304 @@
+"""
+Query-plan and latency regression checks for CampaignService
+
+Runs every CampaignService method against a large SQLite dataset, captures
+each SQL statement it executes and checks its EXPLAIN QUERY PLAN: a full
+table scan (SCAN) or a temporary B-tree sort (USE TEMP B-TREE) fails the
+check. Each method is then timed against a latency budget.
+
+Exits non-zero on any failure, so it can gate CI:
+
+    python benchmarks/check_query_plans.py                       # temporary 500k-row dataset
+    python benchmarks/check_query_plans.py --rows 3000000        # larger dataset
+    python benchmarks/check_query_plans.py --database /tmp/big.db  # dataset from generate_dataset.py
+
+The checks create and update campaigns, so do not point --database at a
+production file.
+"""
+import argparse
+import asyncio
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database
+from models import CampaignFilters, CreateCampaignRequest
+from repositories.sqlite import SQLiteCampaignRepository
+from services.campaign_service import CampaignService
+
+from benchmarks.generate_dataset import did_for, generate
+
+# Median latency budget per service call at scale, in milliseconds
+TIMING_BUDGETS_MS = {
+    "get_or_create_user_identifier": 5,
+    "create_campaign": 25,
+    "create_campaigns_bulk": 100,
+    "get_campaigns_by_did (median DID)": 10,
+    "get_campaigns_by_did (median DID, status)": 10,
+    "get_campaigns_by_did (median DID, start range)": 10,
+    "get_campaign_by_id": 5,
+    "update_campaign_status": 10,
+    "update_campaigns_status": 25,
+    "get_campaign_timeline": 5,
+    "get_campaign_events_by_did (median DID)": 10,
+    "expire_pending_campaigns": 25,
+    "list_scheduled_campaigns": 10,
+    "claim_scheduled_campaigns": 10,
+    "get_campaigns_by_did (median DID, include_archived)": 10,
+    "archive_campaigns (one batch)": 75,
+}
+
+# Statements that have no query plan worth checking
+_SKIPPED_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "INSERT INTO CAMPAIGNS (",
+                     "INSERT OR IGNORE INTO CAMPAIGN_BLOBS", "INSERT OR IGNORE INTO USER_IDENTIFIERS")
+
+@contextmanager
+def capture_statements(statements: List[str]):
+    """Record the SQL (with bound values) of every connection opened by get_db"""
+    connect = database.sqlite3.connect
+
+    def traced_connect(*args, **kwargs):
+        conn = connect(*args, **kwargs)
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    database.sqlite3.connect = traced_connect
+    try:
+        yield
+    finally:
+        database.sqlite3.connect = connect
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals replaced by ? and IN lists collapsed"""
+    shape = re.sub(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b", "?", " ".join(statement.split()))
+    return re.sub(r"\(\?(?:, \?)+\)", "(?, ...)", shape)
+
+def plan_problems(conn: sqlite3.Connection, statement: str) -> List[str]:
+    """
+    Return the offending EXPLAIN QUERY PLAN lines of a statement
+
+    Scanning an intermediate result (a window function's co-routine or a
+    materialized CTE) is not a table scan. Sorts are accepted when every
+    table is searched by campaign_id (one campaign has only a few rows) or
+    by a range, as for the date and budget filters: only the rows in the
+    range get sorted.
+    """
+    details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}")]
+    intermediate = {
+        detail.split(" ", 1)[1] for detail in details
+        if detail.startswith(("CO-ROUTINE ", "MATERIALIZE "))
+    }
+    searches = [detail for detail in details if detail.startswith("SEARCH ")]
+    bounded = bool(searches) and all(
+        "(campaign_id=?)" in detail or ">?" in detail or "<?" in detail for detail in searches
+    )
+    return [
+        detail for detail in details
+        if detail.startswith("SCAN ") and detail[5:] not in intermediate | {"CONSTANT ROW"}
+        or "USE TEMP B-TREE" in detail and not bounded
+    ]
+
+def service_calls(service: CampaignService, dids: Dict[str, str], campaign_ids: List[str]) \
+        -> List[Tuple[str, Callable[[int], Awaitable]]]:
+    """(name, call) pairs covering every CampaignService method"""
+    request = CreateCampaignRequest(
+        campaign_name="Plan check",
+        campaign_description="Query plan regression check",
+        input_text="Write a campaign brief for the plan check.",
+    )
+
+    def campaign_id(iteration: int) -> str:
+        return campaign_ids[iteration % len(campaign_ids)]
+
+    now = datetime.now(timezone.utc)
+
+    return [
+        ("get_or_create_user_identifier",
+         lambda i: service.get_or_create_user_identifier(dids["median"])),
+        ("create_campaign",
+         lambda i: service.create_campaign(
+             dids["light"], request.campaign_name, request.campaign_description, request.input_text
+         )),
+        ("create_campaigns_bulk",
+         lambda i: service.create_campaigns_bulk(dids["light"], [request] * 50)),
+        ("get_campaigns_by_did (median DID)",
+         lambda i: service.get_campaigns_by_did(dids["median"])),
+        ("get_campaigns_by_did (heaviest DID)",
+         lambda i: service.get_campaigns_by_did(dids["heavy"])),
+        ("get_campaigns_by_did (heaviest DID, include_text)",
+         lambda i: service.get_campaigns_by_did(dids["heavy"], include_text=True)),
+        ("get_campaigns_by_did (median DID, status)",
+         lambda i: service.get_campaigns_by_did(dids["median"], CampaignFilters(status="completed"))),
+        ("get_campaigns_by_did (heaviest DID, objective)",
+         lambda i: service.get_campaigns_by_did(
+             dids["heavy"], CampaignFilters(campaign_objective="awareness")
+         )),
+        ("get_campaigns_by_did (median DID, start range)",
+         lambda i: service.get_campaigns_by_did(
+             dids["median"], CampaignFilters(start_from=now - timedelta(days=90), start_to=now)
+         )),
+        ("get_campaigns_by_did (heaviest DID, budget range)",
+         lambda i: service.get_campaigns_by_did(
+             dids["heavy"], CampaignFilters(budget_min=1000, budget_max=2000)
+         )),
+        ("get_campaign_by_id",
+         lambda i: service.get_campaign_by_id(campaign_id(i))),
+        ("update_campaign_status",
+         lambda i: service.update_campaign_status(campaign_id(i), "completed")),
+        ("update_campaigns_status",
+         lambda i: service.update_campaigns_status(
+             [campaign_id(i + offset) for offset in range(50)], "completed"
+         )),
+        ("get_campaign_timeline",
+         lambda i: service.get_campaign_timeline(campaign_id(i))),
+        ("get_campaign_events_by_did (median DID)",
+         lambda i: service.get_campaign_events_by_did(
+             dids["median"], now - timedelta(days=30), now, 1000
+         )),
+        ("get_campaign_events_by_did (heaviest DID)",
+         lambda i: service.get_campaign_events_by_did(
+             dids["heavy"], now - timedelta(days=30), now, 1000
+         )),
+        ("expire_pending_campaigns",
+         lambda i: service.expire_pending_campaigns(timedelta(days=180))),
+        ("list_scheduled_campaigns",
+         lambda i: service.list_scheduled_campaigns(now + timedelta(minutes=5), 10000)),
+        ("claim_scheduled_campaigns",
+         lambda i: service.claim_scheduled_campaigns(
+             [campaign_id(i + offset) for offset in range(50)]
+         )),
+        # Archives some of the campaigns above, so later rounds of
+        # get_campaign_by_id also read through to the archive
+        ("archive_campaigns (one batch)",
+         lambda i: service.archive_campaigns(
+             timedelta(days=90), ["completed", "failed"], batch_size=200, max_batches=1
+         )),
+        ("get_campaigns_by_did (median DID, include_archived)",
+         lambda i: service.get_campaigns_by_did(dids["median"], CampaignFilters(include_archived=True))),
+        ("get_campaign_by_id (archived)",
+         lambda i: service.get_campaign_by_id(campaign_id(i))),
+    ]
+
+async def run_checks(database_path: str, repeat: int, budget_scale: float) -> List[str]:
+    failures: List[str] = []
+    service = CampaignService(SQLiteCampaignRepository(database_path))
+
+    conn = sqlite3.connect(database_path)
+    try:
+        counts = [row[0] for row in conn.execute(
+            "SELECT COUNT(*) FROM campaigns GROUP BY did ORDER BY COUNT(*) DESC"
+        )]
+        heavy = conn.execute(
+            "SELECT did FROM campaigns GROUP BY did ORDER BY COUNT(*) DESC LIMIT 1"
+        ).fetchone()[0]
+        median_count = counts[len(counts) // 2]
+        median = conn.execute(
+            "SELECT did FROM campaigns GROUP BY did HAVING COUNT(*) = ? LIMIT 1", (median_count,)
+        ).fetchone()[0]
+        campaign_ids = [row[0] for row in conn.execute(
+            "SELECT campaign_id FROM campaigns ORDER BY random() LIMIT 1000"
+        )]
+    finally:
+        conn.close()
+
+    dids = {"heavy": heavy, "median": median, "light": did_for(10 ** 9)}
+    print(f"{sum(counts):,} campaigns over {len(counts):,} DIDs "
+          f"(heaviest {counts[0]:,}, median {median_count:,})\n")
+
+    calls = service_calls(service, dids, campaign_ids)
+
+    # Query plans
+    statements: List[str] = []
+    with capture_statements(statements):
+        for _, call in calls:
+            await call(0)
+
+    # Plans can depend on the bound values (e.g. IN-list length), so every
+    # statement is explained; results are reported once per statement shape
+    shapes: Dict[str, List[str]] = {}
+    conn = sqlite3.connect(database_path)
+    try:
+        for statement in statements:
+            shape = statement_shape(statement)
+            if shape.upper().startswith(_SKIPPED_PREFIXES):
+                continue
+            problems = shapes.setdefault(shape, [])
+            for problem in plan_problems(conn, statement):
+                if problem not in problems:
+                    problems.append(problem)
+    finally:
+        conn.close()
+
+    for shape, problems in shapes.items():
+        # Long column lists hide the interesting part of the statement
+        label = re.sub(r"^SELECT .{60,}? FROM", "SELECT ... FROM", shape)[:110]
+        print(f"  plan {'FAIL' if problems else 'ok':<4} {label}")
+        for problem in problems:
+            print(f"         -> {problem}")
+            failures.append(f"{problem}: {label}")
+
+    # Latency at scale
+    print()
+    for name, call in calls:
+        timings = []
+        for iteration in range(repeat):
+            started = time.perf_counter()
+            await call(iteration + 1)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        median_ms = timings[len(timings) // 2]
+        budget = TIMING_BUDGETS_MS.get(name)
+        if budget is None:
+            print(f"  time      {name:<38} {median_ms:9.2f} ms")
+            continue
+        budget *= budget_scale
+        status = "FAIL" if median_ms > budget else "ok"
+        print(f"  time {status:<4} {name:<38} {median_ms:9.2f} ms  (budget {budget:.0f} ms)")
+        if median_ms > budget:
+            failures.append(f"{name} took {median_ms:.2f} ms (budget {budget:.0f} ms)")
+
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check CampaignService query plans and latency")
+    parser.add_argument("--database", help="Existing dataset (default: generate a temporary one)")
+    parser.add_argument("--rows", type=int, default=500_000, help="Campaigns in the temporary dataset")
+    parser.add_argument("--dids", type=int, default=20_000, help="DIDs in the temporary dataset")
+    parser.add_argument("--repeat", type=int, default=21, help="Timed calls per service method")
+    parser.add_argument(
+        "--budget-scale", type=float, default=1.0,
+        help="Multiply every latency budget (for slow CI machines)"
+    )
+    args = parser.parse_args()
+
+    workdir = None
+    database_path = args.database
+    if database_path is None:
+        workdir = tempfile.mkdtemp(prefix="campaign-plans-")
+        database_path = os.path.join(workdir, "campaigns.db")
+        generate(database_path, args.rows, args.dids)
+
+    try:
+        failures = asyncio.run(run_checks(database_path, args.repeat, args.budget_scale))
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    if failures:
+        print(f"\n{len(failures)} check(s) failed:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nAll query plans use indexes and all calls are within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Seed a SQLite database with a large synthetic campaign dataset
+
+Campaigns are spread over DIDs with a Zipf-like distribution: a few heavy
+users own thousands of campaigns while most DIDs have a handful, as in
+production. Rows are written in the same layout the repository uses
+(text fields in campaign_blobs, hashes on the row) together with their status
+history in campaign_events, followed by ANALYZE so the planner sees realistic
+statistics.
+
+Usage:
+    python benchmarks/generate_dataset.py --rows 2000000 --dids 50000
+    python benchmarks/generate_dataset.py --database /tmp/big.db --rows 5000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import time
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DATABASE_PATH
+from migrations import migrate
+from services import blob_store
+
+STATUSES = ("pending", "processing", "completed", "failed")
+STATUS_WEIGHTS = (5, 10, 80, 5)
+OBJECTIVES = ("awareness", "conversions", "engagement", "traffic", None)
+AUDIENCES = ("18-35, urban", "students", "small businesses", "parents", None)
+
+# Shared long texts (templates); the remaining campaigns get their own text
+TEXT_VARIANTS = 200
+
+INSERT_CAMPAIGN = """
+    INSERT INTO campaigns
+    (campaign_id, did, identifier_from_purchaser, campaign_name,
+     campaign_description, campaign_objective, target_audience,
+     budget, duration_days, start_date, end_date, start_at, end_at, input_text, status,
+     created_at, updated_at, input_text_hash, description_hash)
+    VALUES (?, ?, ?, ?, '', ?, ?, ?, ?, ?, ?, ?, ?, '', ?, ?, ?, ?, ?)
+"""
+
+INSERT_EVENT = "INSERT INTO campaign_events (campaign_id, did, status, ts) VALUES (?, ?, ?, ?)"
+
+def did_for(rank: int) -> str:
+    return "did:prism:%064x" % rank
+
+def campaigns_per_did(rows: int, dids: int, exponent: float) -> List[int]:
+    """
+    Split `rows` campaigns over `dids` DIDs, the k-th DID getting a share
+    proportional to 1 / k**exponent (at least one campaign each)
+    """
+    weights = [1 / (rank ** exponent) for rank in range(1, dids + 1)]
+    total = sum(weights)
+    counts = [max(1, int(rows * weight / total)) for weight in weights]
+    # Rounding leaves a remainder; give it to the heaviest DID
+    counts[0] += max(0, rows - sum(counts))
+    return counts
+
+def generate(
+    database_path: str,
+    rows: int,
+    dids: int,
+    exponent: float = 1.1,
+    unique_text_ratio: float = 0.8,
+    seed: int = 42,
+    batch_size: int = 10_000,
+    log=print
+) -> List[int]:
+    """
+    Append synthetic campaigns to a database (migrated first)
+
+    Args:
+        database_path: SQLite file to seed
+        rows: Approximate number of campaigns to insert
+        dids: Number of distinct DIDs
+        exponent: Zipf exponent of the campaigns-per-DID distribution
+        unique_text_ratio: Share of campaigns with their own input_text
+            (the rest reuse one of TEXT_VARIANTS templates)
+        seed: Random seed, for reproducible datasets
+        batch_size: Rows per transaction
+
+    Returns:
+        Number of campaigns generated per DID, by DID rank (see did_for)
+    """
+    rng = random.Random(seed)
+    migrate(database_path)
+    counts = campaigns_per_did(rows, dids, exponent)
+
+    conn = sqlite3.connect(database_path, isolation_level=None)
+    conn.execute("PRAGMA synchronous=OFF")
+    cursor = conn.cursor()
+    started = time.perf_counter()
+    try:
+        cursor.execute("BEGIN")
+        input_hashes = blob_store.put_texts(cursor, [
+            f"Write a multi-channel campaign brief for product line {variant}. " * 10
+            for variant in range(TEXT_VARIANTS)
+        ])
+        description_hashes = blob_store.put_texts(cursor, [
+            f"Seasonal launch {variant} across social and search channels. " * 4
+            for variant in range(TEXT_VARIANTS)
+        ])
+        cursor.executemany(
+            "INSERT OR IGNORE INTO user_identifiers (did, identifier_from_purchaser) VALUES (?, ?)",
+            [(did_for(rank), "%024x" % rank) for rank in range(1, dids + 1)]
+        )
+        cursor.execute("COMMIT")
+
+        def flush(batch: list, unique_texts: list, events: list):
+            cursor.execute("BEGIN")
+            # Rows with a unique text carry its index in place of the hash
+            hashes = blob_store.put_texts(cursor, unique_texts)
+            cursor.executemany(INSERT_CAMPAIGN, [
+                row[:-2] + (hashes[row[-2]] if isinstance(row[-2], int) else row[-2], row[-1])
+                for row in batch
+            ])
+            cursor.executemany(INSERT_EVENT, events)
+            cursor.execute("COMMIT")
+
+        now = time.time()
+        batch = []
+        unique_texts = []
+        events = []
+        written = 0
+        for rank, count in enumerate(counts, start=1):
+            did = did_for(rank)
+            identifier = "%024x" % rank
+            for _ in range(count):
+                created = now - rng.random() * 365 * 86400
+                created_at = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(created))
+                updated_at = time.strftime(
+                    "%Y-%m-%d %H:%M:%S", time.gmtime(min(now, created + rng.random() * 86400))
+                )
+                start = time.strftime("%Y-%m-%d", time.gmtime(created + 7 * 86400))
+                end = time.strftime("%Y-%m-%d", time.gmtime(created + 37 * 86400))
+                if rng.random() < unique_text_ratio:
+                    input_hash = len(unique_texts)
+                    unique_texts.append(
+                        f"Write a campaign brief for launch {written} of {did[-8:]}. " * 8
+                    )
+                else:
+                    input_hash = rng.choice(input_hashes)
+                campaign_id = "%032x" % rng.getrandbits(128)
+                status = rng.choices(STATUSES, STATUS_WEIGHTS)[0]
+                # pending -> processing (seconds later) -> final status at updated_at
+                events.append((campaign_id, did, "pending", created_at + ".000"))
+                if status != "pending":
+                    processing_at = time.gmtime(created + rng.random() * 5)
+                    events.append((campaign_id, did, "processing",
+                                   time.strftime("%Y-%m-%d %H:%M:%S.000", processing_at)))
+                if status not in ("pending", "processing"):
+                    events.append((campaign_id, did, status, updated_at + ".000"))
+                batch.append((
+                    campaign_id, did, identifier,
+                    f"Campaign {written}",
+                    rng.choice(OBJECTIVES), rng.choice(AUDIENCES),
+                    round(rng.uniform(100, 50_000), 2), 30, start, end,
+                    start + " 00:00:00", end + " 00:00:00", status,
+                    created_at, updated_at,
+                    input_hash, rng.choice(description_hashes),
+                ))
+                written += 1
+                if len(batch) >= batch_size:
+                    flush(batch, unique_texts, events)
+                    batch, unique_texts, events = [], [], []
+            if rank % 10_000 == 0:
+                log(f"  {written:,} campaigns for {rank:,} DIDs")
+        if batch:
+            flush(batch, unique_texts, events)
+
+        cursor.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    log(f"Generated {sum(counts):,} campaigns for {dids:,} DIDs in "
+        f"{time.perf_counter() - started:.1f} s (heaviest DID: {counts[0]:,})")
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a database with synthetic campaigns")
+    parser.add_argument("--database", default=DATABASE_PATH, help="SQLite file (default: campaigns.db)")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Campaigns to insert")
+    parser.add_argument("--dids", type=int, default=50_000, help="Distinct DIDs")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of campaigns per DID")
+    parser.add_argument(
+        "--unique-text-ratio", type=float, default=0.8,
+        help="Share of campaigns with their own input_text (default 0.8)"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    generate(args.database, args.rows, args.dids, args.zipf, args.unique_text_ratio, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Local stand-in for JOB_API_URL
+
+Accepts POST /start_job and answers 200 with a small JSON body after an
+optional delay, so benchmarks do not depend on the real job service.
+
+Usage:
+    python benchmarks/job_api_stub.py --port 8099 --delay-ms 20
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    delay = 0.0
+    received = 0
+    _lock = threading.Lock()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        with _Handler._lock:
+            _Handler.received += 1
+            job_number = _Handler.received
+        if self.delay:
+            time.sleep(self.delay)
+        body = json.dumps({"job_id": f"stub-{job_number}", "status": "running"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class JobApiStub:
+    """Job API stub served from a background thread"""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, delay_ms: float = 0):
+        handler = type("Handler", (_Handler,), {"delay": delay_ms / 1000})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._handler = handler
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/start_job"
+
+    @property
+    def received(self) -> int:
+        return self._handler.received
+
+    def start(self) -> "JobApiStub":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local job API stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--delay-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    stub = JobApiStub(args.host, args.port, args.delay_ms)
+    print(f"Job API stub listening on {stub.url}")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,421 @@
+"""
+Load test for the auth and campaign flows
+
+Drives the FastAPI app in-process (httpx ASGI transport) and/or over a real
+socket (uvicorn on a background thread), against a temporary SQLite
+database and a local job API stub (benchmarks/job_api_stub.py).
+
+Scenarios:
+    auth_flow        GET /auth/challenge -> Ed25519 sign -> POST /auth/verify
+    campaign_create  POST /campaigns (job submitted to the stub)
+    campaign_list_N  GET /campaigns for a DID owning N campaigns
+    campaign_get     GET /campaigns/{id}
+
+Each scenario reports throughput, p50/p99 latency and process memory.
+Results can be saved as JSON and compared with an earlier run:
+
+    python benchmarks/run_benchmarks.py --output results/$(git rev-parse --short HEAD).json
+    python benchmarks/run_benchmarks.py --compare results/baseline.json
+
+Both transports run in this process, so memory figures include the client.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+import httpx
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
+
+from benchmarks.job_api_stub import JobApiStub
+
+SEED_BATCH_SIZE = 1000
+
+# ============================================================
+# Measurement
+# ============================================================
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def memory_usage() -> Dict[str, float]:
+    """Current and peak resident set size of this process, in MiB"""
+    # ru_maxrss is in KiB on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open("/proc/self/statm") as statm:
+            rss = int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except OSError:
+        rss = peak
+    return {"rss_mb": round(rss, 1), "max_rss_mb": round(peak, 1)}
+
+async def run_scenario(
+    operation: Callable[[int], Awaitable[None]],
+    requests: int,
+    concurrency: int
+) -> Dict[str, float]:
+    """
+    Run `operation` `requests` times from `concurrency` concurrent workers
+
+    Args:
+        operation: Coroutine function taking the iteration number; raises on failure
+        requests: Total number of operations
+        concurrency: Number of concurrent workers
+
+    Returns:
+        Throughput, latency percentiles (ms), error count and memory usage
+    """
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for iteration in counter:
+            started = time.perf_counter()
+            try:
+                await operation(iteration)
+            except Exception:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, requests))))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        **memory_usage(),
+    }
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+class SigningKey:
+    """Ed25519 key with the did:prism DID the Cardano verifier derives from it"""
+
+    def __init__(self):
+        self._key = ed25519.Ed25519PrivateKey.generate()
+        public = self._key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+        self.did = "did:prism:" + public.hex()
+
+    def sign_challenge(self, challenge: str) -> str:
+        """Compact JWS (EdDSA) over the challenge"""
+        header = b64url(json.dumps({"alg": "EdDSA"}).encode())
+        payload = b64url(challenge.encode())
+        signature = b64url(self._key.sign(f"{header}.{payload}".encode()))
+        return f"{header}.{payload}.{signature}"
+
+def campaign_payload(number: int) -> dict:
+    return {
+        "campaign_name": f"Benchmark campaign {number}",
+        "campaign_description": "Spring launch across social channels " * 4,
+        "campaign_objective": "awareness",
+        "target_audience": "18-35, urban",
+        "budget": 1500.0,
+        "duration_days": 30,
+        "start_date": "2025-12-01",
+        "end_date": "2025-12-31",
+        "input_text": "Write a multi-channel campaign brief for a product launch. " * 10,
+    }
+
+async def seed_campaigns(repository, did: str, count: int) -> List[str]:
+    """Insert `count` campaigns for `did` through the repository; returns their IDs"""
+    from models import CreateCampaignRequest
+
+    identifier = await repository.get_or_create_user_identifier(did, uuid.uuid4().hex[:24])
+    request = CreateCampaignRequest(**campaign_payload(0))
+    campaign_ids: List[str] = []
+    for offset in range(0, count, SEED_BATCH_SIZE):
+        batch = [uuid.uuid4().hex for _ in range(min(SEED_BATCH_SIZE, count - offset))]
+        await repository.insert_campaigns(did, identifier, batch, [request] * len(batch))
+        campaign_ids.extend(batch)
+    return campaign_ids
+
+# ============================================================
+# Scenarios
+# ============================================================
+
+async def run_suite(client: httpx.AsyncClient, fixtures: dict, args) -> Dict[str, dict]:
+    results: Dict[str, dict] = {}
+    keys: List[SigningKey] = fixtures["keys"]
+
+    async def auth_flow(iteration: int):
+        # A new challenge replaces the pending one for the same DID, so each
+        # in-flight flow borrows its own key
+        key = keys.pop()
+        try:
+            response = await client.get("/auth/challenge", params={"did": key.did})
+            response.raise_for_status()
+            challenge = response.json()["challenge"]
+            response = await client.post("/auth/verify", json={
+                "did": key.did,
+                "challenge": challenge,
+                "signature": key.sign_challenge(challenge),
+            })
+            response.raise_for_status()
+        finally:
+            keys.append(key)
+
+    async def campaign_create(iteration: int):
+        response = await client.post(
+            "/campaigns", json=campaign_payload(iteration), headers=fixtures["create_headers"]
+        )
+        response.raise_for_status()
+
+    get_ids = fixtures["get_ids"]
+
+    async def campaign_get(iteration: int):
+        response = await client.get(
+            f"/campaigns/{get_ids[iteration % len(get_ids)]}", headers=fixtures["get_headers"]
+        )
+        response.raise_for_status()
+
+    scenarios = [
+        ("auth_flow", auth_flow, args.requests),
+        ("campaign_create", campaign_create, args.requests),
+    ]
+    for size, headers in fixtures["list_headers"].items():
+        async def campaign_list(iteration: int, headers=headers, size=size):
+            response = await client.get("/campaigns", headers=headers)
+            response.raise_for_status()
+            if response.json()["total"] != size:
+                raise AssertionError("unexpected list size")
+        # Large listings are expensive; scale the request count down
+        requests = min(args.requests, max(5, 100_000 // size))
+        scenarios.append((f"campaign_list_{size}", campaign_list, requests))
+    scenarios.append(("campaign_get", campaign_get, args.requests))
+
+    for name, operation, requests in scenarios:
+        # Warm-up outside the measurement
+        await run_scenario(operation, min(requests, args.concurrency), args.concurrency)
+        results[name] = await run_scenario(operation, requests, args.concurrency)
+        print_result(name, results[name])
+    return results
+
+# ============================================================
+# Transports
+# ============================================================
+
+async def run_asgi(app, fixtures: dict, args) -> Dict[str, dict]:
+    transport = httpx.ASGITransport(app=app)
+    # ASGITransport does not send lifespan events; run the app's lifespan directly
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            return await run_suite(client, fixtures, args)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+async def run_socket(app, fixtures: dict, args) -> Dict[str, dict]:
+    import uvicorn
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        app, host="127.0.0.1", port=port, log_level="warning", access_log=False
+    ))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        if not thread.is_alive():
+            raise RuntimeError("uvicorn failed to start")
+        await asyncio.sleep(0.05)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            return await run_suite(client, fixtures, args)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+
+# ============================================================
+# Reporting
+# ============================================================
+
+def print_result(name: str, result: dict):
+    print(
+        f"  {name:<24} {result['throughput_rps']:>9.1f} req/s"
+        f"  p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms"
+        f"  rss {result['rss_mb']:>7.1f} MiB  errors {result['errors']}"
+    )
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND_DIR,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def compare(baseline: dict, current: dict, threshold: float) -> bool:
+    """
+    Print per-scenario changes against a baseline results file
+
+    Returns:
+        True if any scenario lost more than `threshold` (fraction) of its
+        throughput or gained as much p99 latency
+    """
+    print(f"\nCompared with {baseline.get('commit', 'unknown')[:12]}:")
+    regressed = False
+    for transport, scenarios in current["results"].items():
+        for name, result in scenarios.items():
+            before = baseline.get("results", {}).get(transport, {}).get(name)
+            if not before:
+                continue
+            throughput = (result["throughput_rps"] - before["throughput_rps"]) / (before["throughput_rps"] or 1)
+            p99 = (result["p99_ms"] - before["p99_ms"]) / (before["p99_ms"] or 1)
+            flag = throughput < -threshold or p99 > threshold
+            regressed |= flag
+            print(
+                f"  {transport:<7}{name:<24} throughput {throughput:+7.1%}  p99 {p99:+7.1%}"
+                + ("  REGRESSION" if flag else "")
+            )
+    return regressed
+
+# ============================================================
+# Entry point
+# ============================================================
+
+async def main_async(args) -> dict:
+    from auth.jwt_utils import create_access_token, load_signing_keys
+    from main import app
+    from services.campaign_service import campaign_service
+
+    repository = campaign_service.repository
+    await repository.connect(run_migrations=True)
+    # Tokens are created before the app's lifespan runs
+    load_signing_keys()
+
+    print(f"Seeding campaigns for list sizes {args.list_sizes}...")
+    seed_started = time.perf_counter()
+    list_headers = {}
+    get_ids: List[str] = []
+    for size in args.list_sizes:
+        did = f"did:prism:bench-list-{size}"
+        ids = await seed_campaigns(repository, did, size)
+        list_headers[size] = {"Authorization": "Bearer " + create_access_token(did)}
+        if len(ids) > len(get_ids):
+            get_ids, get_did = ids, did
+    if not get_ids:
+        get_did = "did:prism:bench-get"
+        get_ids = await seed_campaigns(repository, get_did, 10)
+    print(f"Seeded in {time.perf_counter() - seed_started:.1f} s")
+
+    fixtures = {
+        "keys": [SigningKey() for _ in range(args.concurrency)],
+        "create_headers": {"Authorization": "Bearer " + create_access_token("did:prism:bench-create")},
+        "list_headers": list_headers,
+        "get_headers": {"Authorization": "Bearer " + create_access_token(get_did)},
+        "get_ids": get_ids[:1000],
+    }
+
+    results = {}
+    transports = ["asgi", "socket"] if args.transport == "both" else [args.transport]
+    for transport in transports:
+        print(f"\n[{transport}] {args.requests} requests per scenario, concurrency {args.concurrency}")
+        runner = run_asgi if transport == "asgi" else run_socket
+        results[transport] = await runner(app, fixtures, args)
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "list_sizes": args.list_sizes,
+            "job_api_delay_ms": args.job_api_delay_ms,
+        },
+        "results": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the auth and campaign flows")
+    parser.add_argument("--transport", choices=["asgi", "socket", "both"], default="both")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--list-sizes", type=lambda value: [int(size) for size in value.split(",") if size],
+        default=[10, 1000, 100_000], help="Campaigns per DID for the list scenarios"
+    )
+    parser.add_argument("--job-api-delay-ms", type=float, default=0, help="Latency of the job API stub")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Compare with an earlier JSON results file")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Relative change counted as a regression by --compare (default 0.10)"
+    )
+    args = parser.parse_args()
+
+    stub = JobApiStub(delay_ms=args.job_api_delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="campaign-bench-")
+
+    # Settings are read at import time, so configure the app before importing it
+    os.environ["JOB_API_URL"] = stub.url
+    os.environ["DATABASE_BACKEND"] = "sqlite"
+    os.environ["SQLITE_DATABASE_PATH"] = os.path.join(workdir, "campaigns.db")
+    os.environ["JWT_KEYS_DIR"] = os.path.join(workdir, "jwt_keys")
+    os.environ["JWT_GENERATE_DEV_KEY"] = "true"
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # The load generator is one client; keep it from being rate limited
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    try:
+        report = asyncio.run(main_async(args))
+    finally:
+        stub.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\nJob API stub received {stub.received} jobs")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        if compare(baseline, report, args.threshold):
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: cost of serializing 1k campaigns per response
+
+Compares the previous path (one CampaignResponse per row, response_model
+re-validation, stdlib JSON) with the current one (row dicts rendered by
+ORJSONResponse).
+
+Usage:
+    python benchmarks/serialization_bench.py [--rows 1000] [--repeat 50]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from models import CampaignListResponse, CampaignResponse
+
+def make_rows(count: int) -> list:
+    return [
+        {
+            "id": i,
+            "campaign_id": f"{i:032x}",
+            "did": "did:prism:" + "ab" * 32,
+            "identifier_from_purchaser": "0123456789abcdef01234567",
+            "campaign_name": f"Campaign {i}",
+            "campaign_description": "Spring launch across social channels " * 4,
+            "campaign_objective": "awareness",
+            "target_audience": "18-35, urban",
+            "budget": 1500.0 + i,
+            "duration_days": 30,
+            "start_date": "2025-12-01",
+            "end_date": "2025-12-31",
+            "input_text": "Write a multi-channel campaign brief for a product launch. " * 10,
+            "status": "processing",
+            "created_at": "2025-11-30 10:00:00",
+            "updated_at": "2025-11-30 10:00:00",
+        }
+        for i in range(count)
+    ]
+
+async def before(rows: list, field) -> bytes:
+    """Per-row model construction, response_model validation, stdlib JSON"""
+    campaigns = [CampaignResponse(**row) for row in rows]
+    content = CampaignListResponse(campaigns=campaigns, total=len(campaigns))
+    serialized = await serialize_response(field=field, response_content=content)
+    return JSONResponse(serialized).body
+
+async def after(rows: list, field) -> bytes:
+    """Row dicts rendered directly by orjson"""
+    return ORJSONResponse({"campaigns": rows, "total": len(rows)}).body
+
+async def measure(fn, rows: list, field, repeat: int) -> float:
+    await fn(rows, field)  # warm-up
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn(rows, field)
+    return (time.perf_counter() - started) / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    field = create_response_field(name="response", type_=CampaignListResponse)
+
+    before_s = asyncio.run(measure(before, rows, field, args.repeat))
+    after_s = asyncio.run(measure(after, rows, field, args.repeat))
+
+    per_1k = 1000 / args.rows
+    print(f"rows per response: {args.rows}")
+    print(f"before (model + response_model + json): {before_s * per_1k * 1000:8.2f} ms per 1k campaigns")
+    print(f"after  (row dicts + orjson):            {after_s * per_1k * 1000:8.2f} ms per 1k campaigns")
+    print(f"speed-up: {before_s / after_s:.1f}x")
+
+if __name__ == "__main__":
+    main()
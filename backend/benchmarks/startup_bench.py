@@ -0,0 +1,139 @@
+"""
+Start-up time, per-worker memory and shutdown drain of serve.py
+
+Launches `python serve.py` for each worker count, waits for every worker's
+"ready" log line (main.lifespan), reads each worker's RSS from /proc and
+then stops the server with SIGTERM, timing how long the graceful shutdown
+takes.
+
+Usage:
+    python benchmarks/startup_bench.py --workers 1,2,4 [--output startup.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict
+
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def rss_mb(pid: int) -> float:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def measure(workers: int, timeout: float) -> Dict[str, object]:
+    """
+    Start serve.py with `workers` workers and wait for each one's ready log line
+
+    Returns:
+        Time until the first and the last worker were ready, per-worker RSS
+        and the SIGTERM-to-exit shutdown time
+    """
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix="campaign-startup-")
+    env = dict(
+        os.environ,
+        SQLITE_DATABASE_PATH=os.path.join(workdir, "campaigns.db"),
+        JWT_KEYS_DIR=os.path.join(workdir, "jwt_keys"),
+        JWT_GENERATE_DEV_KEY="true",
+        LOG_LEVEL="INFO",
+        LOG_JSON="true",
+    )
+
+    ready: Dict[int, float] = {}
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers)],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+
+    def read_logs():
+        for line in server.stdout:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get("logger") == "main" and "ready in" in entry.get("msg", ""):
+                ready[int(entry["msg"].split()[1])] = time.perf_counter() - started
+
+    reader = threading.Thread(target=read_logs, daemon=True)
+    reader.start()
+    try:
+        while len(ready) < workers:
+            if time.perf_counter() - started > timeout:
+                raise RuntimeError(f"{len(ready)} of {workers} workers ready after {timeout} s")
+            if server.poll() is not None:
+                raise RuntimeError(f"serve.py exited with status {server.returncode}")
+            time.sleep(0.02)
+
+        response = requests.get(f"http://127.0.0.1:{port}/health", timeout=5)
+        response.raise_for_status()
+        worker_rss = [rss_mb(pid) for pid in ready]
+
+        stop_started = time.perf_counter()
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=timeout)
+        shutdown = time.perf_counter() - stop_started
+
+        return {
+            "workers": workers,
+            "first_ready_s": round(min(ready.values()), 3),
+            "all_ready_s": round(max(ready.values()), 3),
+            "worker_rss_mb": [round(value, 1) for value in worker_rss],
+            "total_rss_mb": round(sum(worker_rss), 1),
+            "shutdown_s": round(shutdown, 3),
+        }
+    finally:
+        if server.poll() is None:
+            server.kill()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure serve.py start-up time and memory")
+    parser.add_argument(
+        "--workers", type=lambda value: [int(count) for count in value.split(",")],
+        default=[1, 2, 4], help="Comma-separated worker counts"
+    )
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = []
+    for workers in args.workers:
+        result = measure(workers, args.timeout)
+        results.append(result)
+        per_worker = result["total_rss_mb"] / workers
+        print(
+            f"workers {workers:>2}: first ready {result['first_ready_s'] * 1000:6.0f} ms, "
+            f"all ready {result['all_ready_s'] * 1000:6.0f} ms, "
+            f"{per_worker:6.1f} MiB per worker ({result['total_rss_mb']:.1f} MiB total), "
+            f"shutdown {result['shutdown_s'] * 1000:6.0f} ms"
+        )
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# Export campaign data into a columnar file for analytics
+#
+# Examples:
+#   python export_data.py campaigns --out campaigns.parquet
+#   python export_data.py campaigns --since "2025-11-01 00:00:00" --out nov.rcol --format rcol
+#   python export_data.py user_identifiers --out users.arrow --format arrow
+
+import argparse
+import json
+import sys
+
+from services.export_service import EXPORT_TABLES, export_table
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export campaign data to a columnar file")
+    parser.add_argument("table", choices=sorted(EXPORT_TABLES), help="Table to export")
+    parser.add_argument("--out", required=True, help="Output file path")
+    parser.add_argument("--since", help="Only rows updated at or after this timestamp")
+    parser.add_argument("--until", help="Only rows updated before this timestamp")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows per chunk")
+    parser.add_argument(
+        "--format",
+        default="auto",
+        choices=["auto", "parquet", "arrow", "rcol"],
+        help="Output format (auto = parquet when pyarrow is installed, else rcol)"
+    )
+    args = parser.parse_args()
+
+    try:
+        summary = export_table(
+            args.table,
+            args.out,
+            since=args.since,
+            until=args.until,
+            chunk_size=args.chunk_size,
+            fmt=args.format
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+
+    print(json.dumps(summary, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
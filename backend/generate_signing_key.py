@@ -0,0 +1,58 @@
+# Generate a JWT signing key (P-256, for JWT_ALGORITHM=ES256)
+#
+# Writes <kid>.pem to JWT_KEYS_DIR (default: jwt_keys/ next to this file).
+# Copy the same key files to every worker host, then restart the workers.
+#
+# Examples:
+#   python generate_signing_key.py
+#   python generate_signing_key.py --kid 2026-q1 --dir /etc/rize/jwt_keys
+#   python generate_signing_key.py --secret   # JWT_SECRET_KEY for the HS256 opt-out
+
+import argparse
+import os
+import secrets
+import sys
+from datetime import datetime
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from config import settings
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Generate a JWT signing key")
+    parser.add_argument(
+        "--dir",
+        default=settings.JWT_KEYS_DIR or os.path.join(os.path.dirname(os.path.abspath(__file__)), "jwt_keys"),
+        help="Key directory (default: JWT_KEYS_DIR)"
+    )
+    parser.add_argument("--kid", default=datetime.utcnow().strftime("%Y%m%d"), help="Key ID (default: today)")
+    parser.add_argument("--secret", action="store_true", help="Print an HS256 JWT_SECRET_KEY instead")
+    args = parser.parse_args()
+
+    if args.secret:
+        # 256-bit shared secret
+        print(f"JWT_SECRET_KEY={secrets.token_hex(32)}")
+        return 0
+
+    path = os.path.join(args.dir, f"{args.kid}.pem")
+    if os.path.exists(path):
+        print(f"{path} already exists; pick another --kid", file=sys.stderr)
+        return 1
+
+    pem = ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    )
+    os.makedirs(args.dir, exist_ok=True)
+    # Readable by the owner only
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as key_file:
+        key_file.write(pem)
+
+    print(f"Wrote JWT signing key {path} (kid {args.kid})")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
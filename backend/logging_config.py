@@ -0,0 +1,121 @@
+"""
+Structured, non-blocking logging
+
+Application loggers hand records to a QueueHandler; a background
+QueueListener thread formats them as JSON lines and writes them out, so
+request handlers never wait on console I/O. Every record carries the
+current request's correlation ID. Records logged with extra={"sampled": True}
+(routine success events) are kept only for a fraction of requests, decided
+once per request so a request's events are kept or dropped together.
+
+Use %-style arguments (logger.debug("... %s", value)) rather than f-strings:
+when a level is disabled the logger returns before any formatting happens.
+"""
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Correlation ID of the request being handled (set by RequestIdMiddleware)
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Random draw in [0, 1) made once per request (set by RequestIdMiddleware);
+# its sampled records are kept if the draw is below the sample rate
+log_sample_var: ContextVar[Optional[float]] = ContextVar("log_sample", default=None)
+
+# Root of the application's logger hierarchy
+APP_LOGGERS = ("auth", "routes", "services", "repositories", "middleware", "migrations", "main")
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current correlation ID to each record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SuccessSampler(logging.Filter):
+    """
+    Keep only a fraction of records marked with extra={"sampled": True}
+
+    Within a request all of them share the request's draw (log_sample_var);
+    outside one, each record is sampled on its own.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "sampled", False) and self.rate < 1:
+            draw = log_sample_var.get()
+            return (draw if draw is not None else random.random()) < self.rate
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Render a record as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                  + ".%03dZ" % record.msecs,
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry and key != "sampled":
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class _TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+def configure_logging(level: str = "INFO", json_output: bool = True, success_sample_rate: float = 1.0):
+    """
+    Route application loggers through a queue to a background writer
+
+    Safe to call more than once; later calls are ignored while the
+    listener is running.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(JsonFormatter() if json_output else _TextFormatter())
+
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.addFilter(SuccessSampler(success_sample_rate))
+    queue_handler.addFilter(RequestIdFilter())
+
+    for name in APP_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.setLevel(level.upper())
+        logger.handlers = [queue_handler]
+        logger.propagate = False
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,217 +1,209 @@
-from fastapi import FastAPI, HTTPException, Query
+"""
+Rize DID Authentication API
+
+`create_app()` builds the application; resources that need opening and
+closing (database pools, HTTP clients, background tasks) belong to its
+lifespan. `main:app` is kept for `uvicorn main:app` and the dev server;
+production uses serve.py, which runs `main:create_app` as a factory.
+"""
+import time
+
+# Measured before the heavy imports so start-up time includes them
+PROCESS_STARTED = time.perf_counter()
+
+import logging
+import os
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional
+from fastapi.responses import ORJSONResponse, Response
 import uvicorn
 
+import metrics
+from auth.jwt_utils import load_signing_keys
 from config import settings
-from auth.challenge_store import challenge_store
-from auth.cardano_verifier import cardano_verifier  # Use Cardano verifier (no Docker needed)
-from auth.jwt_utils import create_access_token
+from logging_config import configure_logging, shutdown_logging
+from middleware.admission import AdmissionController, AdmissionMiddleware, RouteClass
+from middleware.compression import CompressionMiddleware
+from middleware.metrics import MetricsMiddleware
+from middleware.profiling import ProfilingMiddleware
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.request_id import RequestIdMiddleware
+from routes.auth import router as auth_router
 from routes.campaigns import router as campaigns_router
-
-# Initialize FastAPI app
-app = FastAPI(
-    title="Rize DID Authentication API",
-    description="DID-based authentication using Hyperledger Identus",
-    version="1.0.0"
+from services.campaign_service import campaign_service
+from services.dispatcher import scheduled_dispatcher
+from services.job_client import job_client
+from services.maintenance import create_scheduler
+from services.rate_limiter import rate_limiter
+from services.token_service import token_service
+
+IMPORT_DURATION = time.perf_counter() - PROCESS_STARTED
+
+STARTUP_DURATION = metrics.gauge(
+    "app_startup_duration_seconds",
+    "Time from process start until the app was ready to serve",
+    ("phase",)
 )
-
-# Configure CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+RESIDENT_MEMORY = metrics.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory of this worker process",
+    callback=metrics.resident_memory_bytes
 )
 
-# Include routers
-app.include_router(campaigns_router)
-
-# ============================================================
-# Pydantic Models
-# ============================================================
-
-class ChallengeResponse(BaseModel):
-    """Response model for challenge generation."""
-    challenge: str = Field(..., description="Random challenge string to be signed")
-    did: str = Field(..., description="The DID requesting authentication")
-
-class VerifyRequest(BaseModel):
-    """Request model for signature verification."""
-    did: str = Field(..., description="The DID claiming authentication")
-    challenge: str = Field(..., description="The challenge that was signed")
-    signature: str = Field(..., description="JWS signature of the challenge")
-
-class AuthResponse(BaseModel):
-    """Response model for successful authentication."""
-    access_token: str = Field(..., description="JWT access token")
-    token_type: str = Field(default="bearer", description="Token type")
-    did: str = Field(..., description="Authenticated DID")
-
-class ErrorResponse(BaseModel):
-    """Response model for errors."""
-    detail: str = Field(..., description="Error message")
+logger = logging.getLogger(__name__)
 
-# ============================================================
-# API Endpoints
-# ============================================================
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources before serving and release them on shutdown."""
+    started = time.perf_counter()
+    configure_logging(
+        level=settings.LOG_LEVEL,
+        json_output=settings.LOG_JSON,
+        success_sample_rate=settings.LOG_SUCCESS_SAMPLE_RATE
+    )
 
-@app.get("/")
-async def root():
-    """Root endpoint with API information."""
-    return {
-        "name": "Rize DID Authentication API",
-        "version": "1.0.0",
-        "status": "running",
-        "identus_agent": settings.IDENTUS_AGENT_URL
-    }
-
-@app.get("/health")
-async def health_check():
-    """Health check endpoint."""
-    return {"status": "healthy"}
-
-@app.get(
-    "/auth/challenge",
-    response_model=ChallengeResponse,
-    responses={
-        400: {"model": ErrorResponse, "description": "Invalid request"},
-        500: {"model": ErrorResponse, "description": "Internal server error"}
-    }
-)
-async def get_challenge(did: str = Query(..., description="The DID requesting authentication")):
-    """
-    Generate a random challenge for DID authentication.
-    
-    The client must sign this challenge with their DID's private key
-    and send it back to the /auth/verify endpoint.
-    
-    Args:
-        did: The DID in format "did:prism:..." or other supported DID methods
-        
-    Returns:
-        ChallengeResponse with the challenge string
-    """
+    # Fails before anything is opened if JWT_KEYS_DIR has no keys
+    load_signing_keys()
+    await campaign_service.repository.connect(
+        run_migrations=settings.RUN_MIGRATIONS_ON_STARTUP
+    )
+    # Tokens revoked before this worker started
+    await token_service.sync_denylist()
+
+    scheduler = create_scheduler() if settings.MAINTENANCE_ENABLED else None
+    if scheduler is not None:
+        scheduler.start()
+    if settings.SCHEDULED_DISPATCH_ENABLED:
+        scheduled_dispatcher.start()
+
+    ready = time.perf_counter()
+    STARTUP_DURATION.set(IMPORT_DURATION, phase="import")
+    STARTUP_DURATION.set(ready - started, phase="lifespan")
+    STARTUP_DURATION.set(ready - PROCESS_STARTED, phase="total")
+    logger.info(
+        "Worker %d ready in %.0f ms (imports %.0f ms, lifespan %.0f ms), RSS %.1f MiB",
+        os.getpid(),
+        (ready - PROCESS_STARTED) * 1000,
+        IMPORT_DURATION * 1000,
+        (ready - started) * 1000,
+        metrics.resident_memory_bytes() / (1024 * 1024)
+    )
     try:
-        if not did or not did.startswith("did:"):
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid DID format. Must start with 'did:'"
-            )
-        
-        # Generate challenge
-        challenge = challenge_store.create_challenge(did)
-        
-        return ChallengeResponse(challenge=challenge, did=did)
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate challenge: {str(e)}"
+        yield
+    finally:
+        # Drain is done by uvicorn (timeout_graceful_shutdown) before this runs
+        if scheduler is not None:
+            await scheduler.stop()
+        await scheduled_dispatcher.stop()
+        await campaign_service.repository.close()
+        job_client.close()
+        rate_limiter.close()
+        logger.info("Worker %d stopped", os.getpid())
+        shutdown_logging()
+
+def create_admission_controller() -> AdmissionController:
+    """Route classes and limits for admission control, from settings"""
+    def route_class(name: str, priority: int, max_concurrency: int) -> RouteClass:
+        return RouteClass(
+            name, priority, max_concurrency,
+            max_queue=settings.ADMISSION_QUEUE_SIZE,
+            max_wait=settings.ADMISSION_MAX_WAIT_SECONDS
         )
 
-@app.post(
-    "/auth/verify",
-    response_model=AuthResponse,
-    responses={
-        400: {"model": ErrorResponse, "description": "Invalid request"},
-        401: {"model": ErrorResponse, "description": "Authentication failed"},
-        500: {"model": ErrorResponse, "description": "Internal server error"}
-    }
-)
-async def verify_authentication(request: VerifyRequest):
+    return AdmissionController([
+        route_class("auth", 0, settings.ADMISSION_AUTH_CONCURRENCY),
+        route_class("campaign_write", 1, settings.ADMISSION_CAMPAIGN_WRITE_CONCURRENCY),
+        route_class("campaign_read", 2, settings.ADMISSION_CAMPAIGN_READ_CONCURRENCY),
+    ], settings.ADMISSION_MAX_CONCURRENCY)
+
+def create_app() -> FastAPI:
     """
-    Verify DID-based authentication.
-    
-    This endpoint:
-    1. Validates the challenge is still valid
-    2. Resolves the DID through Identus Cloud Agent
-    3. Extracts the public key from the DID Document
-    4. Verifies the JWS signature using ES256
-    5. Issues a JWT access token if valid
-    
-    Args:
-        request: VerifyRequest containing did, challenge, and signature
-        
+    Build the FastAPI application
+
     Returns:
-        AuthResponse with JWT access token
+        Configured app; shared resources are opened by its lifespan
     """
-    try:
-        # Step 1: Verify challenge exists and is valid
-        if not challenge_store.verify_challenge(request.did, request.challenge):
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid or expired challenge. Please request a new challenge."
-            )
-        
-        # Step 2: Verify DID authentication (Cardano-based verification)
-        is_valid = cardano_verifier.verify_did_authentication(
-            did=request.did,
-            challenge=request.challenge,
-            signature=request.signature
-        )
-        
-        if not is_valid:
-            raise HTTPException(
-                status_code=401,
-                detail="Signature verification failed. Authentication unsuccessful."
-            )
-        
-        # Step 3: Create JWT access token
-        access_token = create_access_token(request.did)
-        
-        return AuthResponse(
-            access_token=access_token,
-            token_type="bearer",
-            did=request.did
+    app = FastAPI(
+        title="Rize DID Authentication API",
+        description="DID-based authentication using Hyperledger Identus",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+
+    # Shed load before the routers once a route class is saturated
+    if settings.ADMISSION_ENABLED:
+        app.add_middleware(AdmissionMiddleware, controller=create_admission_controller())
+
+    # Inside CORS, so 429 (and 503) responses still get CORS headers
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
+
+    # Configure CORS
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Compress large responses (campaign lists); small auth responses skip it
+    if settings.COMPRESSION_ENABLED:
+        app.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY
         )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Authentication verification failed: {str(e)}"
+
+    # Profiles cover every middleware below it and the route handler
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(
+            ProfilingMiddleware,
+            output_dir=settings.PROFILING_OUTPUT_DIR
+                or os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles"),
+            token=settings.PROFILING_TOKEN,
+            sample_rate=settings.PROFILING_SAMPLE_RATE,
+            mode=settings.PROFILING_MODE,
+            interval=settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
         )
 
-@app.get("/auth/me")
-async def get_current_user(token: str = Query(..., description="JWT access token")):
-    """
-    Get current authenticated user information from JWT token.
-    
-    Args:
-        token: JWT access token
-        
-    Returns:
-        User information including DID
-    """
-    try:
-        from auth.jwt_utils import verify_token
-        
-        payload = verify_token(token)
-        if not payload:
-            raise HTTPException(
-                status_code=401,
-                detail="Invalid or expired token"
-            )
-        
+    # Outermost, so latency includes compression and CORS handling
+    app.add_middleware(MetricsMiddleware)
+
+    # Correlation ID for every log record written while handling a request
+    app.add_middleware(RequestIdMiddleware)
+
+    # Include routers
+    app.include_router(auth_router)
+    app.include_router(campaigns_router)
+
+    @app.get("/")
+    async def root():
+        """Root endpoint with API information."""
         return {
-            "did": payload.get("did"),
-            "authenticated": True,
-            "expires_at": payload.get("exp")
+            "name": "Rize DID Authentication API",
+            "version": "1.0.0",
+            "status": "running",
+            "identus_agent": settings.IDENTUS_AGENT_URL
         }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to get user info: {str(e)}"
-        )
+
+    @app.get("/health")
+    async def health_check():
+        """Health check endpoint."""
+        return {"status": "healthy"}
+
+    @app.get("/metrics", include_in_schema=False)
+    async def get_metrics():
+        """Prometheus metrics for this worker process."""
+        return Response(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+    return app
+
+app = create_app()
 
 # ============================================================
 # Main Entry Point
@@ -226,9 +218,11 @@ if __name__ == "__main__":
 ╚════════════════════════════════════════════════════════════╝
     """)
     
+    # Development server; use serve.py for multi-worker production serving
     uvicorn.run(
-        "main:app",
+        "main:create_app",
+        factory=True,
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=True
+        reload=settings.API_RELOAD
     )
@@ -0,0 +1,230 @@
+"""
+Admission control and load shedding
+
+Requests are grouped into route classes (auth, campaign writes, campaign
+reads), each with its own concurrency limit, under a worker-wide limit.
+Requests over the limit wait in a bounded queue; when a slot frees up, the
+waiter of the highest-priority class is admitted first, so logins keep
+working while list requests back up. A request is rejected with 503
+straight away when its class queue is full or when the expected wait
+exceeds its deadline, and after the deadline if it is still queued.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+import metrics
+
+QUEUE_DEPTH = metrics.gauge(
+    "admission_queue_depth",
+    "Requests waiting for admission",
+    ("route_class",)
+)
+IN_FLIGHT = metrics.gauge(
+    "admission_in_flight",
+    "Admitted requests being handled",
+    ("route_class",)
+)
+SHED = metrics.counter(
+    "admission_shed_total",
+    "Requests rejected by admission control",
+    ("route_class", "reason")
+)
+WAIT_DURATION = metrics.histogram(
+    "admission_wait_seconds",
+    "Time admitted requests spent queued",
+    ("route_class",)
+)
+
+# Client-supplied time budget in seconds (e.g. its own request timeout)
+DEADLINE_HEADER = b"x-request-timeout"
+
+# Weight of the latest request in the per-class service time average
+_EWMA_WEIGHT = 0.1
+
+@dataclass
+class RouteClass:
+    """Concurrency budget for a group of routes; lower priority values go first"""
+    name: str
+    priority: int
+    max_concurrency: int
+    max_queue: int
+    max_wait: float
+    in_flight: int = 0
+    queued: int = 0
+    # Moving average of handling time, used to predict queue waits
+    service_time: float = 0.05
+
+def classify(method: str, path: str) -> Optional[str]:
+    """Route class of a request, or None for routes that bypass admission"""
+    if path.startswith("/auth/"):
+        return "auth"
+    if path == "/campaigns" or path.startswith("/campaigns/"):
+        return "campaign_write" if method == "POST" else "campaign_read"
+    return None
+
+class Overloaded(Exception):
+    """Raised when a request is shed; `reason` labels the shed metric"""
+
+    def __init__(self, reason: str):
+        super().__init__(reason)
+        self.reason = reason
+
+class AdmissionController:
+    """Per-class and worker-wide concurrency limits with a priority wait queue"""
+
+    def __init__(self, classes: List[RouteClass], max_concurrency: int):
+        self.classes: Dict[str, RouteClass] = {route_class.name: route_class for route_class in classes}
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        # (priority, arrival, route class, future)
+        self._waiters: list = []
+        self._arrivals = itertools.count()
+
+    def _can_admit(self, route_class: RouteClass) -> bool:
+        return (self.in_flight < self.max_concurrency
+                and route_class.in_flight < route_class.max_concurrency)
+
+    def _admit(self, route_class: RouteClass):
+        self.in_flight += 1
+        route_class.in_flight += 1
+        IN_FLIGHT.set(route_class.in_flight, route_class=route_class.name)
+
+    def _expected_wait(self, route_class: RouteClass) -> float:
+        """Rough wait for a new arrival: the queue ahead drains max_concurrency at a time"""
+        ahead = sum(
+            other.queued for other in self.classes.values()
+            if other.priority <= route_class.priority
+        )
+        return (ahead + 1) * route_class.service_time / route_class.max_concurrency
+
+    async def acquire(self, name: str, deadline: Optional[float] = None):
+        """
+        Wait for a slot in route class `name`
+
+        Args:
+            name: Route class
+            deadline: Client time budget in seconds (capped at the class max_wait)
+
+        Raises:
+            Overloaded: The request should be rejected
+        """
+        route_class = self.classes[name]
+        # Don't overtake queued requests of equal or higher priority that
+        # could run now (ones whose own class is full do not count)
+        overtaking = any(
+            waiter[0] <= route_class.priority and not waiter[3].done()
+            and self._can_admit(self.classes[waiter[2]])
+            for waiter in self._waiters
+        )
+        if self._can_admit(route_class) and not overtaking:
+            self._admit(route_class)
+            return
+
+        budget = min(route_class.max_wait, deadline) if deadline is not None else route_class.max_wait
+        if route_class.queued >= route_class.max_queue:
+            raise Overloaded("queue_full")
+        if self._expected_wait(route_class) > budget:
+            raise Overloaded("deadline")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (route_class.priority, next(self._arrivals), name, future))
+        route_class.queued += 1
+        QUEUE_DEPTH.set(route_class.queued, route_class=name)
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=budget)
+        except asyncio.TimeoutError:
+            if not future.done():
+                future.cancel()
+                raise Overloaded("timeout")
+            # Admitted just as the wait timed out; keep the slot
+        except asyncio.CancelledError:
+            # Client went away; give back a slot granted in the meantime
+            if future.done() and not future.cancelled():
+                self.release(name)
+            else:
+                future.cancel()
+            raise
+        finally:
+            route_class.queued -= 1
+            QUEUE_DEPTH.set(route_class.queued, route_class=name)
+        WAIT_DURATION.observe(time.perf_counter() - started, route_class=name)
+
+    def release(self, name: str, service_time: Optional[float] = None):
+        """Free a slot and admit waiters in priority order"""
+        route_class = self.classes[name]
+        self.in_flight -= 1
+        route_class.in_flight -= 1
+        IN_FLIGHT.set(route_class.in_flight, route_class=name)
+        if service_time is not None:
+            route_class.service_time += _EWMA_WEIGHT * (service_time - route_class.service_time)
+        self._dispatch()
+
+    def _dispatch(self):
+        skipped = []
+        while self._waiters and self.in_flight < self.max_concurrency:
+            waiter = heapq.heappop(self._waiters)
+            future = waiter[3]
+            if future.done():
+                continue  # timed out or cancelled
+            waiting_class = self.classes[waiter[2]]
+            if not self._can_admit(waiting_class):
+                # Its class is full; later classes may still have room
+                skipped.append(waiter)
+                continue
+            self._admit(waiting_class)
+            future.set_result(None)
+        for waiter in skipped:
+            heapq.heappush(self._waiters, waiter)
+
+def _client_deadline(scope: Scope) -> Optional[float]:
+    for name, value in scope["headers"]:
+        if name == DEADLINE_HEADER:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying admission control before the routers
+
+    Rejected requests get 503 with Retry-After so clients and load
+    balancers back off instead of piling up more work.
+    """
+
+    def __init__(self, app: ASGIApp, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        name = classify(scope["method"], scope["path"]) if scope["type"] == "http" else None
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.acquire(name, _client_deadline(scope))
+        except Overloaded as e:
+            SHED.inc(route_class=name, reason=e.reason)
+            response = ORJSONResponse(
+                {"detail": "Server is overloaded. Please retry shortly."},
+                status_code=503,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(name, time.perf_counter() - started)
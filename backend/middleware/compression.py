@@ -0,0 +1,162 @@
+"""
+Response compression middleware (brotli when available, otherwise gzip)
+
+Bodies below a minimum size are sent as-is, so small auth responses skip the
+compression overhead. Server-sent events are never compressed, and other
+streaming responses are compressed chunk by chunk with a flush after each
+chunk so clients receive data as soon as it is produced.
+"""
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Content types that are already compressed or must not be buffered
+_SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "audio/", "application/zip", "application/gzip")
+
+def _accepted_encodings(header: str) -> set:
+    """Parse Accept-Encoding into the set of codings with a non-zero q-value"""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+class _GzipEncoder:
+    name = "gzip"
+
+    def __init__(self, level: int):
+        # wbits=16+MAX_WBITS writes a gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH)
+
+class _BrotliEncoder:
+    name = "br"
+
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._compressor.process(data) + self._compressor.finish()
+
+class CompressionMiddleware:
+    """ASGI middleware compressing response bodies above minimum_size"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def _encoder_for(self, accept_encoding: str):
+        accepted = _accepted_encodings(accept_encoding)
+        if brotli is not None and "br" in accepted:
+            return lambda: _BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return lambda: _GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        make_encoder = self._encoder_for(Headers(scope=scope).get("accept-encoding", ""))
+        if make_encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(send, make_encoder, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+class _CompressionResponder:
+    def __init__(self, send: Send, make_encoder, minimum_size: int):
+        self._send = send
+        self._make_encoder = make_encoder
+        self._minimum_size = minimum_size
+        self._start: Optional[Message] = None
+        self._passthrough = False
+        self._encoder = None
+
+    async def send(self, message: Message):
+        message_type = message["type"]
+
+        if message_type == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            if "content-encoding" in headers or content_type.startswith(_SKIP_CONTENT_TYPES):
+                self._passthrough = True
+                await self._send(message)
+            else:
+                # Hold the start message until the first body chunk decides
+                self._start = message
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+
+            if not more_body and len(body) < self._minimum_size:
+                self._passthrough = True
+                await self._send(start)
+                await self._send(message)
+                return
+
+            self._encoder = self._make_encoder()
+            headers["Content-Encoding"] = self._encoder.name
+            headers.add_vary_header("Accept-Encoding")
+
+            if not more_body:
+                body = self._encoder.finish(body)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+
+            # Streaming: length is unknown, flush after every chunk
+            del headers["Content-Length"]
+            await self._send(start)
+
+        if more_body:
+            chunk = self._encoder.compress(body)
+        else:
+            chunk = self._encoder.finish(body)
+        await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
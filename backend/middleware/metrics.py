@@ -0,0 +1,56 @@
+"""
+Per-route request latency metrics
+"""
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+import metrics
+
+REQUEST_DURATION = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status code",
+    ("method", "route", "status")
+)
+REQUESTS_IN_PROGRESS = metrics.gauge(
+    "http_requests_in_progress",
+    "HTTP requests currently being handled",
+)
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route
+
+    Routes are labelled by their path template (e.g. /campaigns/{campaign_id})
+    so label cardinality stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        REQUESTS_IN_PROGRESS.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_PROGRESS.dec()
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                method=scope["method"],
+                route=getattr(route, "path", "unmatched"),
+                status=status_code
+            )
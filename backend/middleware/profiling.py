@@ -0,0 +1,189 @@
+"""
+Opt-in per-request profiling
+
+When PROFILING_ENABLED is set, a request is profiled if it carries
+`X-Profile: <PROFILING_TOKEN>` or is picked by PROFILING_SAMPLE_RATE. Two
+profilers are available:
+
+- "sampling": a background thread records the stacks of the event loop
+  thread and the asyncio worker threads (where SQLite calls run) every few
+  milliseconds. The output is folded stacks (`frame;frame;frame count`),
+  which flamegraph.pl, speedscope and inferno read directly.
+- "cprofile": deterministic cProfile of the event loop thread, written as a
+  pstats file (snakeviz, flameprof). Coroutines of other requests that run
+  meanwhile are included.
+
+Each profile is written to PROFILING_OUTPUT_DIR, and a line with the
+route, status and timing is appended to index.jsonl there. Requests that
+are not profiled pay for one header scan and one random() call.
+"""
+import asyncio
+import cProfile
+import hmac
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from logging_config import request_id_var
+
+TRIGGER_HEADER = b"x-profile"
+RESULT_HEADER = "X-Profile-Id"
+
+# Innermost frames of an executor thread that is waiting for work
+_IDLE_LEAVES = ("_worker (thread.py", "wait (threading.py")
+
+logger = logging.getLogger(__name__)
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+class StackSampler:
+    """
+    Periodically record the Python stacks of selected threads
+
+    Samples the thread that started it (the event loop) and threads named
+    like the default asyncio executor's ("asyncio_N") while they are busy.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._target = threading.get_ident()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiling-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id, "")
+                if thread_id != self._target and not name.startswith("asyncio_"):
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                # Executor threads waiting for work are idle, not slow
+                if thread_id != self._target and labels[0].startswith(_IDLE_LEAVES):
+                    continue
+                labels.append("event-loop" if thread_id == self._target else name)
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles single requests on demand"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        output_dir: str,
+        token: str = "",
+        sample_rate: float = 0.0,
+        mode: str = "sampling",
+        interval: float = 0.002
+    ):
+        if mode not in ("sampling", "cprofile"):
+            raise ValueError(f"Unknown PROFILING_MODE: {mode}")
+        self.app = app
+        self.output_dir = output_dir
+        self.token = token.encode() if token else b""
+        self.sample_rate = sample_rate
+        self.mode = mode
+        self.interval = interval
+        # cProfile cannot nest, and overlapping samplers would double-count
+        self._active = False
+
+    def _triggered(self, scope: Scope) -> bool:
+        if self.token:
+            for name, value in scope["headers"]:
+                if name == TRIGGER_HEADER:
+                    return hmac.compare_digest(value, self.token)
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or self._active or not self._triggered(scope):
+            await self.app(scope, receive, send)
+            return
+
+        self._active = True
+        profile_id = "%s-%s" % (time.strftime("%Y%m%dT%H%M%S"), request_id_var.get())
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[RESULT_HEADER] = profile_id
+            await send(message)
+
+        profiler = None
+        sampler = None
+        if self.mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            sampler = StackSampler(self.interval)
+            sampler.start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            if profiler is not None:
+                profiler.disable()
+            stacks = sampler.stop() if sampler is not None else None
+            self._active = False
+            route = getattr(scope.get("route"), "path", scope["path"])
+            await asyncio.to_thread(
+                self._write, profile_id, profiler, stacks, {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "route": route,
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 2),
+                    "samples": sampler.samples if sampler is not None else None,
+                }
+            )
+
+    def _write(self, profile_id: str, profiler: Optional[cProfile.Profile], stacks: Optional[Dict], info: dict):
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            route_slug = re.sub(r"[^A-Za-z0-9]+", "_", info["route"]).strip("_") or "root"
+            name = f"{profile_id}_{info['method']}_{route_slug}_{info['duration_ms']:.0f}ms"
+            if profiler is not None:
+                filename = name + ".prof"
+                profiler.dump_stats(os.path.join(self.output_dir, filename))
+            else:
+                filename = name + ".folded"
+                with open(os.path.join(self.output_dir, filename), "w") as output:
+                    for stack, count in stacks.items():
+                        output.write(f"{stack} {count}\n")
+
+            entry = {"id": profile_id, "file": filename, "mode": self.mode,
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S"), **info}
+            with open(os.path.join(self.output_dir, "index.jsonl"), "a") as index:
+                index.write(json.dumps(entry) + "\n")
+            logger.info("Profiled %s %s in %.1f ms", info["method"], info["route"], info["duration_ms"],
+                        extra={"profile": filename})
+        except OSError as e:
+            logger.warning("Failed to write profile %s: %s", profile_id, e)
@@ -0,0 +1,54 @@
+"""
+Per-request correlation IDs
+"""
+import random
+import re
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from logging_config import log_sample_var, request_id_var
+
+HEADER = "X-Request-ID"
+
+# Accept caller-supplied IDs only if they are short and log-safe
+_VALID_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+class RequestIdMiddleware:
+    """
+    Assign each request a correlation ID
+
+    Reuses a valid incoming X-Request-ID (e.g. from a load balancer) or
+    generates one, exposes it to loggers through request_id_var, and echoes
+    it in the response headers. Also draws the request's log sampling value
+    (log_sample_var), so its sampled records are kept or dropped together.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = incoming if incoming and _VALID_ID.match(incoming) else uuid.uuid4().hex
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[HEADER] = request_id
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        sample_token = log_sample_var.set(random.random())
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            log_sample_var.reset(sample_token)
+            request_id_var.reset(token)
@@ -0,0 +1,40 @@
+# Move inline campaign input_text/campaign_description values into the
+# compressed, deduplicated campaign_blobs table and report the space saved.
+#
+# Usage:
+#   python migrate_text_blobs.py              # migrate and report
+#   python migrate_text_blobs.py --report     # report only
+#   python migrate_text_blobs.py --vacuum     # also reclaim freed pages
+
+import argparse
+import json
+
+from database import get_db, init_database
+from services import blob_store
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate campaign text fields to blob storage")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per transaction")
+    parser.add_argument("--report", action="store_true", help="Only print the space report")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM after migrating")
+    args = parser.parse_args()
+
+    init_database()
+
+    with get_db() as conn:
+        if args.report:
+            report = blob_store.space_report(conn)
+        else:
+            report = blob_store.migrate_inline_texts(conn, batch_size=args.batch_size)
+
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        report["freelist_bytes"] = conn.execute("PRAGMA freelist_count").fetchone()[0] * page_size
+
+        if args.vacuum:
+            conn.execute("VACUUM")
+            report["file_bytes_after_vacuum"] = conn.execute("PRAGMA page_count").fetchone()[0] * page_size
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,452 @@
+"""
+Versioned schema migrations for the SQLite database
+
+Each migration has a version number and is applied at most once; applied
+versions are recorded in the `schema_version` table. Migrations run from the
+application startup hook or from the command line, which migrates the
+DATABASE_BACKEND database (PostgreSQL migrations are in repositories/postgres.py):
+
+    python migrations.py            # apply pending migrations
+    python migrations.py --status   # show applied and pending versions
+"""
+import argparse
+import asyncio
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from database import DATABASE_PATH
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Migration:
+    """A single ordered schema change"""
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+    # Online migrations run outside the version transaction (see create_index_online)
+    online: bool = False
+
+def create_index_online(conn: sqlite3.Connection, name: str, table: str, columns: str, where: str = ""):
+    """
+    Build an index without wrapping it in the migration transaction
+
+    SQLite has no concurrent index build, but in WAL mode readers keep
+    working from their snapshot while the build holds the write lock. Running
+    the statement on its own (autocommit) keeps that lock for the build only,
+    and ANALYZE afterwards lets the planner use the new index straight away.
+    """
+    predicate = f" WHERE {where}" if where else ""
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({columns}){predicate}")
+    conn.execute(f"ANALYZE {name}")
+
+def _initial_schema(conn: sqlite3.Connection):
+    """Tables and indexes of the original schema"""
+    # Create user_identifiers table to store unique hex per DID
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS user_identifiers (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            did TEXT UNIQUE NOT NULL,
+            identifier_from_purchaser TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Create campaigns table with all fields
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaigns (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            campaign_id TEXT UNIQUE NOT NULL,
+            did TEXT NOT NULL,
+            identifier_from_purchaser TEXT NOT NULL,
+
+            -- Campaign details (all fields for display)
+            campaign_name TEXT NOT NULL,
+            campaign_description TEXT NOT NULL,
+            campaign_objective TEXT,
+            target_audience TEXT,
+            budget REAL,
+            duration_days INTEGER,
+            start_date TEXT,
+            end_date TEXT,
+
+            -- Processing fields (sent to external API)
+            input_text TEXT NOT NULL,
+
+            -- Status tracking
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+            FOREIGN KEY (did) REFERENCES user_identifiers(did)
+        )
+    """)
+
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_campaigns_did
+        ON campaigns(did)
+    """)
+
+def _campaign_text_blobs(conn: sqlite3.Connection):
+    """Content-addressed storage for large text fields (services/blob_store.py)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            raw_size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    """)
+
+    # Databases created before versioning may already have these columns
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(campaigns)")}
+    for column in ("input_text_hash", "description_hash"):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE campaigns ADD COLUMN {column} TEXT")
+
+def _campaigns_did_created_index(conn: sqlite3.Connection):
+    """Serve per-DID listings in created_at order straight from the index"""
+    create_index_online(conn, "idx_campaigns_did_created", "campaigns", "did, created_at DESC")
+    # Both are now redundant: the composite index covers did lookups and
+    # UNIQUE(did) already indexes user_identifiers
+    conn.execute("DROP INDEX IF EXISTS idx_campaigns_did")
+    conn.execute("DROP INDEX IF EXISTS idx_user_identifiers_did")
+
+def _campaign_events(conn: sqlite3.Connection):
+    """Append-only history of campaign status changes"""
+    # Millisecond timestamps: a campaign can change status several times
+    # within one second
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaign_events (
+            id INTEGER PRIMARY KEY,
+            campaign_id TEXT NOT NULL,
+            did TEXT NOT NULL,
+            status TEXT NOT NULL,
+            ts TEXT NOT NULL DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now'))
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_campaign_events_campaign_ts
+        ON campaign_events(campaign_id, ts)
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_campaign_events_did_ts
+        ON campaign_events(did, ts)
+    """)
+
+    # Seed the history of existing campaigns from what the rows still know:
+    # creation, and the last status change
+    conn.execute("""
+        INSERT INTO campaign_events (campaign_id, did, status, ts)
+        SELECT campaign_id, did, 'pending', strftime('%Y-%m-%d %H:%M:%f', created_at)
+        FROM campaigns
+    """)
+    conn.execute("""
+        INSERT INTO campaign_events (campaign_id, did, status, ts)
+        SELECT campaign_id, did, status, strftime('%Y-%m-%d %H:%M:%f', updated_at)
+        FROM campaigns
+        WHERE status != 'pending'
+    """)
+
+def _maintenance_leases(conn: sqlite3.Connection):
+    """Leases that let one worker at a time run a maintenance task"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS maintenance_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+
+def _pending_campaigns_index(conn: sqlite3.Connection):
+    """Find stale pending campaigns without scanning the table"""
+    create_index_online(conn, "idx_campaigns_pending_created", "campaigns", "created_at",
+                        where="status = 'pending'")
+
+def _campaign_start_at(conn: sqlite3.Connection):
+    """Normalized UTC start time of campaigns dispatched on their start_date"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(campaigns)")}
+    if "start_at" not in columns:
+        conn.execute("ALTER TABLE campaigns ADD COLUMN start_at TIMESTAMP")
+
+def _scheduled_campaigns_index(conn: sqlite3.Connection):
+    """Load the dispatch queue in start order without scanning the table"""
+    create_index_online(conn, "idx_campaigns_scheduled_start", "campaigns", "start_at",
+                        where="status = 'scheduled'")
+
+def _utc_datetime(column: str) -> str:
+    """
+    SQL normalizing a free-text campaign date like models.parse_timestamp
+
+    datetime() converts ISO 8601 values with an offset to UTC and returns
+    NULL for text that is not a date. Digit-only values of 9 or more digits
+    are Unix seconds; 8 digits are a basic ISO date (YYYYMMDD).
+    """
+    value = f"trim({column})"
+    return f"""
+        CASE WHEN {value} GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]*'
+                  AND {value} NOT GLOB '*[^0-9]*'
+             THEN datetime({value}, 'unixepoch')
+             WHEN {value} GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+             THEN datetime(substr({value}, 1, 4) || '-' || substr({value}, 5, 2) || '-' || substr({value}, 7, 2))
+             ELSE datetime({column}) END
+    """
+
+def _campaign_end_at(conn: sqlite3.Connection):
+    """Normalized UTC start and end of every campaign, for range filters"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(campaigns)")}
+    if "end_at" not in columns:
+        conn.execute("ALTER TABLE campaigns ADD COLUMN end_at TIMESTAMP")
+    conn.execute(f"""
+        UPDATE campaigns
+        SET start_at = COALESCE(start_at, {_utc_datetime("start_date")}),
+            end_at = {_utc_datetime("end_date")}
+        WHERE start_date IS NOT NULL OR end_date IS NOT NULL
+    """)
+
+def _campaign_filter_indexes(conn: sqlite3.Connection):
+    """Per-DID indexes for the GET /campaigns filters"""
+    create_index_online(conn, "idx_campaigns_did_status_created", "campaigns", "did, status, created_at DESC")
+    create_index_online(conn, "idx_campaigns_did_objective_created", "campaigns",
+                        "did, campaign_objective, created_at DESC")
+    create_index_online(conn, "idx_campaigns_did_start", "campaigns", "did, start_at")
+    create_index_online(conn, "idx_campaigns_did_budget", "campaigns", "did, budget")
+
+def _auth_tokens(conn: sqlite3.Connection):
+    """Refresh tokens (stored hashed) and revoked access tokens; times are Unix seconds"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            token_hash TEXT PRIMARY KEY,
+            did TEXT NOT NULL,
+            family_id TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            used_at REAL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens(family_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens(expires_at)")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL,
+            revoked_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked ON revoked_tokens(revoked_at)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens(expires_at)")
+
+def _campaigns_archive(conn: sqlite3.Connection):
+    """Cold campaigns, moved out of campaigns by the archiver (same columns)"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS campaigns_archive (
+            id INTEGER PRIMARY KEY,
+            campaign_id TEXT UNIQUE NOT NULL,
+            did TEXT NOT NULL,
+            identifier_from_purchaser TEXT NOT NULL,
+            campaign_name TEXT NOT NULL,
+            campaign_description TEXT NOT NULL,
+            campaign_objective TEXT,
+            target_audience TEXT,
+            budget REAL,
+            duration_days INTEGER,
+            start_date TEXT,
+            end_date TEXT,
+            start_at TIMESTAMP,
+            end_at TIMESTAMP,
+            input_text TEXT NOT NULL,
+            status TEXT,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            input_text_hash TEXT,
+            description_hash TEXT,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_campaigns_archive_did_created
+        ON campaigns_archive(did, created_at DESC)
+    """)
+
+def _archivable_campaigns_index(conn: sqlite3.Connection):
+    """Find campaigns to archive by status and age without scanning the table"""
+    create_index_online(conn, "idx_campaigns_status_updated", "campaigns", "status, updated_at")
+
+def _job_submissions(conn: sqlite3.Connection):
+    """Recently submitted jobs by content hash, and the job each campaign reuses"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS job_submissions (
+            dedup_key TEXT PRIMARY KEY,
+            campaign_id TEXT NOT NULL,
+            submitted_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_submissions_submitted ON job_submissions(submitted_at)")
+    for table in ("campaigns", "campaigns_archive"):
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+        if "job_campaign_id" not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN job_campaign_id TEXT")
+
+def _unix_campaign_dates(conn: sqlite3.Connection):
+    """Backfill start_at/end_at of Unix-time dates, which migration 9 left NULL"""
+    for table in ("campaigns", "campaigns_archive"):
+        conn.execute(f"""
+            UPDATE {table}
+            SET start_at = COALESCE(start_at, {_utc_datetime("start_date")}),
+                end_at = COALESCE(end_at, {_utc_datetime("end_date")})
+            WHERE (start_at IS NULL AND start_date IS NOT NULL)
+               OR (end_at IS NULL AND end_date IS NOT NULL)
+        """)
+
+def _basic_iso_campaign_dates(conn: sqlite3.Connection):
+    """Recompute start_at/end_at of YYYYMMDD dates, which migration 16 read as Unix time"""
+    for table in ("campaigns", "campaigns_archive"):
+        conn.execute(f"""
+            UPDATE {table}
+            SET start_at = CASE WHEN trim(start_date) GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+                                THEN {_utc_datetime("start_date")} ELSE start_at END,
+                end_at = CASE WHEN trim(end_date) GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+                              THEN {_utc_datetime("end_date")} ELSE end_at END
+            WHERE trim(start_date) GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+               OR trim(end_date) GLOB '[0-9][0-9][0-9][0-9][0-9][0-9][0-9][0-9]'
+        """)
+
+def _auth_challenges(conn: sqlite3.Connection):
+    """Outstanding sign-in challenges, one per DID, shared by all workers; times are Unix seconds"""
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS auth_challenges (
+            did TEXT PRIMARY KEY,
+            challenge TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_auth_challenges_expires ON auth_challenges(expires_at)")
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial schema", _initial_schema),
+    Migration(2, "campaign text blobs", _campaign_text_blobs),
+    Migration(3, "campaigns (did, created_at) index", _campaigns_did_created_index, online=True),
+    Migration(4, "campaign status events", _campaign_events),
+    Migration(5, "maintenance leases", _maintenance_leases),
+    Migration(6, "pending campaigns index", _pending_campaigns_index, online=True),
+    Migration(7, "campaign start time", _campaign_start_at),
+    Migration(8, "scheduled campaigns index", _scheduled_campaigns_index, online=True),
+    Migration(9, "campaign end time", _campaign_end_at),
+    Migration(10, "campaign filter indexes", _campaign_filter_indexes, online=True),
+    Migration(11, "auth tokens", _auth_tokens),
+    Migration(12, "campaigns archive", _campaigns_archive),
+    Migration(13, "archivable campaigns index", _archivable_campaigns_index, online=True),
+    Migration(14, "job submissions", _job_submissions),
+    Migration(15, "auth challenges", _auth_challenges),
+    Migration(16, "unix campaign dates", _unix_campaign_dates),
+    Migration(17, "basic ISO campaign dates", _basic_iso_campaign_dates),
+]
+
+def _ensure_version_table(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+def applied_versions(conn: sqlite3.Connection) -> List[int]:
+    """Return the versions recorded in schema_version"""
+    _ensure_version_table(conn)
+    return [row[0] for row in conn.execute("SELECT version FROM schema_version ORDER BY version")]
+
+def migrate(database_path: str = DATABASE_PATH, target: Optional[int] = None) -> List[Migration]:
+    """
+    Apply pending migrations in version order
+
+    Safe to call from several workers at once: each migration takes the
+    write lock (BEGIN IMMEDIATE) and re-checks schema_version before applying.
+
+    Args:
+        database_path: SQLite file to migrate
+        target: Stop after this version (default: latest)
+
+    Returns:
+        Migrations applied by this call
+    """
+    conn = sqlite3.connect(database_path, isolation_level=None, timeout=30)
+    applied = []
+    try:
+        # WAL lets readers continue while migrations hold the write lock.
+        # The setting persists in the database file.
+        conn.execute("PRAGMA journal_mode=WAL")
+        _ensure_version_table(conn)
+
+        for migration in MIGRATIONS:
+            if target is not None and migration.version > target:
+                break
+            if migration.version in applied_versions(conn):
+                continue
+
+            started = time.perf_counter()
+            if migration.online:
+                migration.apply(conn)
+                conn.execute(
+                    "INSERT OR IGNORE INTO schema_version (version, name) VALUES (?, ?)",
+                    (migration.version, migration.name)
+                )
+            else:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    exists = conn.execute(
+                        "SELECT 1 FROM schema_version WHERE version = ?",
+                        (migration.version,)
+                    ).fetchone()
+                    if exists:
+                        conn.execute("ROLLBACK")
+                        continue
+                    migration.apply(conn)
+                    conn.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                        (migration.version, migration.name)
+                    )
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+
+            applied.append(migration)
+            logger.info("Applied migration %d (%s) in %.1f ms", migration.version, migration.name,
+                        (time.perf_counter() - started) * 1000)
+    finally:
+        conn.close()
+
+    return applied
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply database schema migrations")
+    parser.add_argument("--status", action="store_true", help="Show applied and pending migrations")
+    parser.add_argument("--target", type=int, help="Migrate up to this version")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    from config import settings
+    from repositories import create_repository
+
+    async def run():
+        repository = create_repository()
+        await repository.connect(run_migrations=False)
+        try:
+            if args.status:
+                for version, name, applied in await repository.migration_status():
+                    state = "applied" if applied else "pending"
+                    print(f"{version:>4}  {state:<8} {name}")
+                return
+
+            if not await repository.migrate(args.target):
+                print(f"The {settings.DATABASE_BACKEND} database is up to date")
+        finally:
+            await repository.close()
+
+    asyncio.run(run())
+
+if __name__ == "__main__":
+    main()
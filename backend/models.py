@@ -1,9 +1,37 @@
 """
 Pydantic models for request/response validation
 """
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, field_validator, model_validator, validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timezone
+
+from config import settings
+
+# Digit-only dates this long are Unix seconds (from 1973-03-03); shorter
+# ones are ISO 8601 basic dates. migrations._utc_datetime and
+# repositories.postgres.TRY_TIMESTAMPTZ apply the same rule in SQL.
+UNIX_TIME_MIN_DIGITS = 9
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a campaign date as an aware UTC datetime
+    
+    Accepts ISO 8601 dates (midnight UTC), date-times (UTC unless they carry
+    an offset) and Unix timestamps in seconds. Only digit strings of at least
+    UNIX_TIME_MIN_DIGITS digits are Unix time: "20240601" is a basic ISO date.
+    
+    Raises:
+        ValueError: The value is none of these
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.isdigit() and len(value) >= UNIX_TIME_MIN_DIGITS:
+        return datetime.fromtimestamp(int(value), timezone.utc)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        return parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
 
 class CreateCampaignRequest(BaseModel):
     """Request model for creating a campaign"""
@@ -13,9 +41,38 @@ class CreateCampaignRequest(BaseModel):
     target_audience: Optional[str] = Field(None, description="Target audience")
     budget: Optional[float] = Field(None, ge=0, description="Campaign budget")
     duration_days: Optional[int] = Field(None, ge=1, description="Campaign duration in days")
-    start_date: Optional[str] = Field(None, description="Campaign start date")
-    end_date: Optional[str] = Field(None, description="Campaign end date")
+    start_date: Optional[str] = Field(
+        None,
+        description="Campaign start (ISO 8601 date or date-time, or Unix time); "
+                    "a future start schedules the job for then"
+    )
+    end_date: Optional[str] = Field(None, description="Campaign end, in the same formats")
     input_text: str = Field(..., min_length=1, description="Detailed explanation for processing")
+    
+    @field_validator("start_date", "end_date")
+    @classmethod
+    def check_date(cls, value: Optional[str]) -> Optional[str]:
+        try:
+            parse_timestamp(value)
+        except (ValueError, OverflowError, OSError):
+            raise ValueError("must be an ISO 8601 date or date-time, or a Unix timestamp")
+        return value
+    
+    @model_validator(mode="after")
+    def check_date_range(self):
+        start, end = parse_timestamp(self.start_date), parse_timestamp(self.end_date)
+        if start and end and end < start:
+            raise ValueError("end_date is before start_date")
+        return self
+
+class BulkCreateCampaignRequest(BaseModel):
+    """Request model for creating many campaigns at once"""
+    campaigns: list[CreateCampaignRequest] = Field(
+        ...,
+        min_length=1,
+        max_length=settings.BULK_CREATE_MAX_ITEMS,
+        description="Campaigns to create in a single transaction"
+    )
 
 class CampaignResponse(BaseModel):
     """Response model for campaign"""
@@ -24,23 +81,95 @@ class CampaignResponse(BaseModel):
     did: str
     identifier_from_purchaser: str
     campaign_name: str
-    campaign_description: str
+    campaign_description: Optional[str] = Field(
+        None, description="Omitted (null) from lists unless include_text=true"
+    )
     campaign_objective: Optional[str]
     target_audience: Optional[str]
     budget: Optional[float]
     duration_days: Optional[int]
     start_date: Optional[str]
     end_date: Optional[str]
-    input_text: str
+    start_at: Optional[str] = Field(None, description="start_date normalized to UTC")
+    end_at: Optional[str] = Field(None, description="end_date normalized to UTC")
+    input_text: Optional[str] = Field(
+        None, description="Omitted (null) from lists unless include_text=true"
+    )
     status: str
     created_at: str
     updated_at: str
+    job_campaign_id: Optional[str] = Field(
+        None, description="Campaign whose identical job this campaign reuses (None: its own job)"
+    )
+
+class CampaignFilters(BaseModel):
+    """Filters for listing campaigns; unset filters match everything"""
+    status: Optional[str] = None
+    campaign_objective: Optional[str] = None
+    target_audience: Optional[str] = None
+    budget_min: Optional[float] = None
+    budget_max: Optional[float] = None
+    # Parsed by parse_timestamp: ISO 8601 dates or date-times, or Unix time;
+    # naive values are UTC. Ranges include their start and exclude their end.
+    start_from: Optional[datetime] = None
+    start_to: Optional[datetime] = None
+    end_from: Optional[datetime] = None
+    end_to: Optional[datetime] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+    # Also list campaigns moved to the archive
+    include_archived: bool = False
 
 class CampaignListResponse(BaseModel):
     """Response model for listing campaigns"""
     campaigns: list[CampaignResponse]
     total: int
 
+class BulkCampaignResult(BaseModel):
+    """Per-item result of a bulk campaign creation"""
+    index: int = Field(..., description="Position of the item in the request")
+    campaign: CampaignResponse
+    job_submitted: bool = Field(..., description="Whether the job API accepted the job")
+
+class BulkCreateCampaignResponse(BaseModel):
+    """Response model for bulk campaign creation"""
+    results: list[BulkCampaignResult]
+    total: int
+    submitted: int
+    pending: int
+    scheduled: int = Field(0, description="Campaigns held until their start date")
+
+class CampaignEvent(BaseModel):
+    """A status a campaign entered, and how long it stayed there"""
+    status: str
+    entered_at: str
+    left_at: Optional[str] = Field(None, description="None while this is the current status")
+    duration_seconds: float = Field(..., description="Time in this status (up to now if current)")
+
+class StageDuration(BaseModel):
+    """Total time a campaign has spent in one status"""
+    status: str
+    entries: int = Field(..., description="Times the campaign entered this status")
+    total_seconds: float
+
+class CampaignTimelineResponse(BaseModel):
+    """Response model for a campaign's status history"""
+    campaign_id: str
+    status: str
+    events: list[CampaignEvent]
+    stages: list[StageDuration]
+
+class CampaignStatusEvent(BaseModel):
+    """A status change of one of the user's campaigns"""
+    campaign_id: str
+    status: str
+    ts: str
+
+class CampaignEventListResponse(BaseModel):
+    """Response model for status changes in a time range"""
+    events: list[CampaignStatusEvent]
+    total: int
+
 class UserIdentifierResponse(BaseModel):
     """Response model for user identifier"""
     identifier: str
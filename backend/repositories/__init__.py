@@ -0,0 +1,18 @@
+# Repositories package
+from config import settings
+
+def create_repository():
+    """Build the campaign repository selected by settings.DATABASE_BACKEND"""
+    if settings.DATABASE_BACKEND == "postgres":
+        from repositories.postgres import PostgresCampaignRepository
+        
+        return PostgresCampaignRepository(
+            settings.POSTGRES_DSN,
+            min_size=settings.POSTGRES_POOL_MIN_SIZE,
+            max_size=settings.POSTGRES_POOL_MAX_SIZE
+        )
+    if settings.DATABASE_BACKEND == "sqlite":
+        from repositories.sqlite import SQLiteCampaignRepository
+        
+        return SQLiteCampaignRepository()
+    raise ValueError(f"Unknown DATABASE_BACKEND: {settings.DATABASE_BACKEND}")
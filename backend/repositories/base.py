@@ -0,0 +1,326 @@
+"""
+Storage interface for campaigns and user identifiers
+"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import CampaignFilters, CampaignResponse, CreateCampaignRequest
+
+# A campaign as returned by repositories: a plain dict with the fields of
+# CampaignResponse. Rows are mapped straight to dicts and serialized without
+# building (and re-validating) a pydantic model per row.
+CampaignRecord = Dict[str, Any]
+
+CAMPAIGN_FIELDS = tuple(CampaignResponse.model_fields)
+
+# CampaignFilters field -> (column, operator). Only these fragments are
+# written into SQL; filter values are always bound parameters.
+CAMPAIGN_FILTERS: Dict[str, Tuple[str, str]] = {
+    "status": ("status", "="),
+    "campaign_objective": ("campaign_objective", "="),
+    "target_audience": ("target_audience", "="),
+    "budget_min": ("budget", ">="),
+    "budget_max": ("budget", "<="),
+    "start_from": ("start_at", ">="),
+    "start_to": ("start_at", "<"),
+    "end_from": ("end_at", ">="),
+    "end_to": ("end_at", "<"),
+    "created_from": ("created_at", ">="),
+    "created_to": ("created_at", "<"),
+}
+
+def filter_conditions(filters: Optional[CampaignFilters]) -> List[Tuple[str, str, Any]]:
+    """(column, operator, value) of each filter that is set"""
+    if filters is None:
+        return []
+    return [
+        (column, operator, getattr(filters, name))
+        for name, (column, operator) in CAMPAIGN_FILTERS.items()
+        if getattr(filters, name) is not None
+    ]
+
+# A row of the campaign status history (campaign_events), also a plain dict
+EventRecord = Dict[str, Any]
+
+class CampaignRepository(ABC):
+    """
+    Persistence operations used by CampaignService.
+
+    Implementations are async so a networked backend can share a connection
+    pool across requests; the SQLite implementation runs its blocking calls
+    in worker threads.
+    """
+
+    async def connect(self, run_migrations: bool = True):
+        """Open pools and bring the schema up to date"""
+
+    async def close(self):
+        """Release pools and connections"""
+
+    @abstractmethod
+    async def migrate(self, target: Optional[int] = None) -> List[int]:
+        """
+        Apply pending schema migrations in version order
+
+        Args:
+            target: Last version to apply (default: all of them)
+
+        Returns:
+            Versions applied by this call
+        """
+
+    @abstractmethod
+    async def migration_status(self) -> List[Tuple[int, str, bool]]:
+        """(version, name, applied) of every migration, in version order"""
+
+    @abstractmethod
+    async def get_or_create_user_identifier(self, did: str, new_identifier: str) -> str:
+        """
+        Return the identifier stored for a DID, storing new_identifier if none exists
+
+        Args:
+            did: User's DID
+            new_identifier: Identifier to use if the DID has none yet
+
+        Returns:
+            The DID's identifier
+        """
+
+    @abstractmethod
+    async def insert_campaigns(
+        self,
+        did: str,
+        identifier: str,
+        campaign_ids: List[str],
+        requests: List[CreateCampaignRequest],
+        start_times: Optional[List[Optional[datetime]]] = None,
+        end_times: Optional[List[Optional[datetime]]] = None,
+        statuses: Optional[List[str]] = None
+    ) -> List[CampaignRecord]:
+        """
+        Insert campaigns in a single transaction
+
+        Args:
+            start_times: Per campaign, start_date normalized to UTC
+            end_times: Per campaign, end_date normalized to UTC
+            statuses: Per campaign, "pending" (default) or "scheduled"
+
+        Returns:
+            Created campaigns, in request order
+        """
+
+    @abstractmethod
+    async def list_campaigns_by_did(
+        self,
+        did: str,
+        filters: Optional[CampaignFilters] = None,
+        include_text: bool = False
+    ) -> List[CampaignRecord]:
+        """
+        Return a DID's campaigns matching filters, newest first
+
+        Archived campaigns are included only with filters.include_archived.
+        input_text and campaign_description are None unless include_text:
+        lists rarely show them and they are the costliest fields to read.
+        """
+
+    @abstractmethod
+    async def get_campaign(self, campaign_id: str) -> Optional[CampaignRecord]:
+        """Return a campaign by its campaign_id, or None; archived campaigns are found too"""
+
+    @abstractmethod
+    async def update_status(self, campaign_ids: List[str], status: str) -> int:
+        """
+        Set the status of campaigns in one transaction
+
+        Campaigns whose status changes get a campaign_events row in the
+        same transaction.
+
+        Returns:
+            Number of campaigns updated
+        """
+
+    @abstractmethod
+    async def get_campaign_timeline(self, campaign_id: str) -> Dict[str, List[EventRecord]]:
+        """
+        Return a campaign's status history and the time spent per status
+
+        Returns:
+            {"events": [...], "stages": [...]}: events in order with the time
+            spent in each (the current status counts up to now), and per
+            status the number of entries and the total seconds
+        """
+
+    @abstractmethod
+    async def list_events_by_did(
+        self,
+        did: str,
+        since: datetime,
+        until: datetime,
+        limit: int
+    ) -> List[EventRecord]:
+        """Return a DID's status events with since <= ts < until (UTC), oldest first"""
+
+    @abstractmethod
+    async def expire_pending_campaigns(self, created_before: datetime, limit: int) -> int:
+        """
+        Move campaigns still pending since before created_before (UTC) to "expired"
+
+        Returns:
+            Number of campaigns expired (at most limit)
+        """
+
+    @abstractmethod
+    async def archive_campaigns(self, updated_before: datetime, statuses: List[str], limit: int) -> int:
+        """
+        Move campaigns in one of statuses, unchanged since updated_before
+        (UTC), from campaigns to campaigns_archive in one transaction
+
+        Returns:
+            Number of campaigns archived (at most limit)
+        """
+
+    @abstractmethod
+    async def list_scheduled_campaigns(self, due_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        """Return campaign_id and start_at of scheduled campaigns due before due_before (UTC), soonest first"""
+
+    @abstractmethod
+    async def claim_scheduled_campaigns(self, campaign_ids: List[str]) -> List[CampaignRecord]:
+        """
+        Move campaigns that are still scheduled to "pending" for dispatch
+
+        Workers dispatching at the same time claim disjoint sets.
+
+        Returns:
+            The campaigns this call claimed
+        """
+
+    # Sign-in challenges (auth/challenge_store.py). Times are Unix seconds.
+
+    @abstractmethod
+    async def insert_challenge(self, did: str, challenge: str, expires_at: float):
+        """Store the challenge of a DID, replacing its previous one"""
+
+    @abstractmethod
+    async def consume_challenge(self, did: str, challenge: str) -> bool:
+        """
+        Delete the DID's challenge if it matches and has not expired
+
+        Returns:
+            True if the challenge was valid (it cannot be used again)
+        """
+
+    @abstractmethod
+    async def prune_challenges(self) -> int:
+        """
+        Delete expired challenges
+
+        Returns:
+            Number of challenges deleted
+        """
+
+    @abstractmethod
+    async def count_challenges(self) -> int:
+        """Number of stored challenges, expired or not"""
+
+    # Refresh tokens and revoked access tokens (services/token_service.py).
+    # Times are Unix seconds.
+
+    @abstractmethod
+    async def insert_refresh_token(self, token_hash: str, did: str, family_id: str, expires_at: float):
+        """Store a refresh token (by hash) as the latest of its family"""
+
+    @abstractmethod
+    async def use_refresh_token(self, token_hash: str, reuse_grace: float) -> Optional[Dict[str, Any]]:
+        """
+        Mark an unexpired refresh token as used
+
+        A token first used within the last reuse_grace seconds can be used
+        again (concurrent tabs, retries). A token used before that is being
+        replayed: its whole family is revoked.
+
+        Returns:
+            did and family_id of the token, or None if it cannot be used
+        """
+
+    @abstractmethod
+    async def revoke_refresh_family(self, token_hash: str) -> int:
+        """
+        Revoke the family (chain of rotated tokens) of a refresh token
+
+        Returns:
+            Number of tokens revoked
+        """
+
+    @abstractmethod
+    async def revoke_access_token(self, jti: str, expires_at: float):
+        """Record an access token as revoked until it expires"""
+
+    @abstractmethod
+    async def list_revoked_tokens(self, revoked_since: float) -> List[Dict[str, Any]]:
+        """Return jti and expires_at of unexpired tokens revoked at or after revoked_since"""
+
+    @abstractmethod
+    async def prune_auth_tokens(self) -> int:
+        """
+        Delete expired refresh tokens and revocations of expired access tokens
+
+        Returns:
+            Number of rows deleted
+        """
+
+    # Job deduplication (services/job_submitter.py). Times are Unix seconds.
+
+    @abstractmethod
+    async def find_job_submissions(self, dedup_keys: List[str], submitted_since: float) -> Dict[str, str]:
+        """Return dedup key -> campaign_id of the jobs among dedup_keys submitted since submitted_since"""
+
+    @abstractmethod
+    async def record_job_submissions(self, submissions: Dict[str, str]):
+        """Record jobs submitted now, as dedup key -> campaign_id (replacing older records)"""
+
+    @abstractmethod
+    async def link_campaign_jobs(self, links: Dict[str, str]) -> int:
+        """
+        Set job_campaign_id: campaign_id -> campaign whose job it reuses
+
+        Returns:
+            Number of campaigns updated
+        """
+
+    @abstractmethod
+    async def prune_job_submissions(self, submitted_before: float) -> int:
+        """
+        Delete job submissions recorded before submitted_before
+
+        Returns:
+            Number of rows deleted
+        """
+
+    # Maintenance (services/scheduler.py)
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take the named lease for ttl seconds if it is free, expired or already ours
+
+        Returns:
+            True if owner now holds the lease
+        """
+
+    async def checkpoint(self) -> Optional[Dict[str, Any]]:
+        """Checkpoint the write-ahead log, where the backend does not do it itself"""
+
+    async def analyze_if_stale(self, growth: float) -> bool:
+        """
+        Refresh planner statistics of tables that grew by more than `growth`
+        (a fraction) since they were last analyzed
+
+        Returns:
+            True if statistics were refreshed
+        """
+        return False
+
+    async def optimize(self):
+        """Routine storage upkeep, where the backend does not do it itself"""
@@ -0,0 +1,806 @@
+"""
+PostgreSQL implementation of the campaign repository
+
+Lets several API nodes share one database through an asyncpg connection
+pool. Large text fields are stored inline: PostgreSQL compresses them
+out of line (TOAST) by itself, so the SQLite blob table is not needed here.
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+from models import CampaignFilters, CreateCampaignRequest
+from repositories.base import CampaignRecord, CampaignRepository, EventRecord, filter_conditions
+
+# Timestamps are rendered like SQLite's CURRENT_TIMESTAMP so API responses
+# look the same on both backends
+CAMPAIGN_COLUMNS = """
+    id, campaign_id, did, identifier_from_purchaser,
+    campaign_name, campaign_description, campaign_objective,
+    target_audience, budget, duration_days, start_date, end_date,
+    to_char(start_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS start_at,
+    to_char(end_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS end_at,
+    input_text, status,
+    to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS created_at,
+    to_char(updated_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS updated_at,
+    job_campaign_id
+"""
+
+# CAMPAIGN_COLUMNS without the large text fields (None, not detoasted)
+SUMMARY_COLUMNS = """
+    id, campaign_id, did, identifier_from_purchaser,
+    campaign_name, NULL::text AS campaign_description, campaign_objective,
+    target_audience, budget, duration_days, start_date, end_date,
+    to_char(start_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS start_at,
+    to_char(end_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS end_at,
+    NULL::text AS input_text, status,
+    to_char(created_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS created_at,
+    to_char(updated_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS updated_at,
+    job_campaign_id
+"""
+
+# Stored columns of campaigns, copied as they are into campaigns_archive
+ARCHIVED_COLUMNS = """
+    id, campaign_id, did, identifier_from_purchaser,
+    campaign_name, campaign_description, campaign_objective,
+    target_audience, budget, duration_days, start_date, end_date, start_at, end_at,
+    input_text, status, created_at, updated_at, job_campaign_id
+"""
+
+# Event timestamps keep milliseconds, as in SQLite's campaign_events.ts
+EVENT_TS_FORMAT = "YYYY-MM-DD HH24:MI:SS.MS"
+
+# A campaign's events with the time spent in each status. The current
+# status (no next event) counts up to now.
+TIMELINE_EVENTS = """
+    SELECT
+        id, status, ts,
+        LEAD(ts) OVER (ORDER BY ts, id) AS next_ts,
+        round(EXTRACT(EPOCH FROM COALESCE(LEAD(ts) OVER (ORDER BY ts, id), now()) - ts), 3)::float8
+            AS duration_seconds
+    FROM campaign_events
+    WHERE campaign_id = $1
+"""
+
+# Parses a free-text campaign date like models.parse_timestamp: digit-only
+# values are Unix seconds, values without an offset are UTC (the session
+# time zone must be UTC), and text that is not a date gives NULL
+TRY_TIMESTAMPTZ = """
+    CREATE OR REPLACE FUNCTION pg_temp.try_timestamptz(value TEXT) RETURNS TIMESTAMPTZ AS $$
+    BEGIN
+        -- 9+ digits are Unix seconds; 8 are YYYYMMDD (models.parse_timestamp)
+        IF btrim(value) ~ '^[0-9]{9,}$' THEN
+            RETURN to_timestamp(btrim(value)::double precision);
+        END IF;
+        RETURN value::timestamptz;
+    EXCEPTION WHEN others THEN
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+"""
+
+# (version, name, statements, online). Online steps run outside a
+# transaction so they can use CREATE INDEX CONCURRENTLY.
+MIGRATIONS = [
+    (1, "initial schema", [
+        """
+        CREATE TABLE IF NOT EXISTS user_identifiers (
+            id BIGSERIAL PRIMARY KEY,
+            did TEXT UNIQUE NOT NULL,
+            identifier_from_purchaser TEXT UNIQUE NOT NULL,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS campaigns (
+            id BIGSERIAL PRIMARY KEY,
+            campaign_id TEXT UNIQUE NOT NULL,
+            did TEXT NOT NULL REFERENCES user_identifiers(did),
+            identifier_from_purchaser TEXT NOT NULL,
+            campaign_name TEXT NOT NULL,
+            campaign_description TEXT NOT NULL,
+            campaign_objective TEXT,
+            target_audience TEXT,
+            budget DOUBLE PRECISION,
+            duration_days INTEGER,
+            start_date TEXT,
+            end_date TEXT,
+            input_text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+    ], False),
+    (2, "campaigns (did, created_at) index", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_did_created
+        ON campaigns (did, created_at DESC)
+        """,
+    ], True),
+    (3, "campaign status events", [
+        """
+        CREATE TABLE IF NOT EXISTS campaign_events (
+            id BIGSERIAL PRIMARY KEY,
+            campaign_id TEXT NOT NULL,
+            did TEXT NOT NULL,
+            status TEXT NOT NULL,
+            ts TIMESTAMPTZ NOT NULL DEFAULT clock_timestamp()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_campaign_events_campaign_ts ON campaign_events (campaign_id, ts)",
+        "CREATE INDEX IF NOT EXISTS idx_campaign_events_did_ts ON campaign_events (did, ts)",
+        """
+        INSERT INTO campaign_events (campaign_id, did, status, ts)
+        SELECT campaign_id, did, 'pending', created_at FROM campaigns
+        UNION ALL
+        SELECT campaign_id, did, status, updated_at FROM campaigns WHERE status <> 'pending'
+        """,
+    ], False),
+    (4, "maintenance leases", [
+        """
+        CREATE TABLE IF NOT EXISTS maintenance_leases (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL
+        )
+        """,
+    ], False),
+    (5, "pending campaigns index", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_pending_created
+        ON campaigns (created_at) WHERE status = 'pending'
+        """,
+    ], True),
+    (6, "campaign start time", [
+        "ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS start_at TIMESTAMPTZ",
+    ], False),
+    (7, "scheduled campaigns index", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_scheduled_start
+        ON campaigns (start_at) WHERE status = 'scheduled'
+        """,
+    ], True),
+    (8, "campaign end time", [
+        "ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS end_at TIMESTAMPTZ",
+        # Backfill from the free-text dates; values that are not dates stay
+        # NULL, values without an offset are UTC
+        "SET LOCAL TimeZone = 'UTC'",
+        TRY_TIMESTAMPTZ,
+        """
+        UPDATE campaigns
+        SET start_at = COALESCE(start_at, pg_temp.try_timestamptz(start_date)),
+            end_at = pg_temp.try_timestamptz(end_date)
+        WHERE start_date IS NOT NULL OR end_date IS NOT NULL
+        """,
+    ], False),
+    (9, "campaign filter indexes", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_did_status_created
+        ON campaigns (did, status, created_at DESC)
+        """,
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_did_objective_created
+        ON campaigns (did, campaign_objective, created_at DESC)
+        """,
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_did_start ON campaigns (did, start_at)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_did_budget ON campaigns (did, budget)",
+    ], True),
+    (10, "auth tokens", [
+        """
+        CREATE TABLE IF NOT EXISTS refresh_tokens (
+            token_hash TEXT PRIMARY KEY,
+            did TEXT NOT NULL,
+            family_id TEXT NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL,
+            used_at TIMESTAMPTZ
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_family ON refresh_tokens (family_id)",
+        "CREATE INDEX IF NOT EXISTS idx_refresh_tokens_expires ON refresh_tokens (expires_at)",
+        """
+        CREATE TABLE IF NOT EXISTS revoked_tokens (
+            jti TEXT PRIMARY KEY,
+            expires_at TIMESTAMPTZ NOT NULL,
+            revoked_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_revoked ON revoked_tokens (revoked_at)",
+        "CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires ON revoked_tokens (expires_at)",
+    ], False),
+    (11, "campaigns archive", [
+        # Same columns as campaigns; LIKE copies NOT NULL but not the id
+        # sequence, keys or the foreign key
+        """
+        CREATE TABLE IF NOT EXISTS campaigns_archive (
+            LIKE campaigns,
+            archived_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            UNIQUE (campaign_id)
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_campaigns_archive_did_created
+        ON campaigns_archive (did, created_at DESC)
+        """,
+    ], False),
+    (12, "archivable campaigns index", [
+        """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_status_updated
+        ON campaigns (status, updated_at)
+        """,
+    ], True),
+    (13, "job submissions", [
+        """
+        CREATE TABLE IF NOT EXISTS job_submissions (
+            dedup_key TEXT PRIMARY KEY,
+            campaign_id TEXT NOT NULL,
+            submitted_at TIMESTAMPTZ NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_job_submissions_submitted ON job_submissions (submitted_at)",
+        "ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS job_campaign_id TEXT",
+        "ALTER TABLE campaigns_archive ADD COLUMN IF NOT EXISTS job_campaign_id TEXT",
+    ], False),
+    (14, "auth challenges", [
+        """
+        CREATE TABLE IF NOT EXISTS auth_challenges (
+            did TEXT PRIMARY KEY,
+            challenge TEXT NOT NULL,
+            expires_at TIMESTAMPTZ NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_auth_challenges_expires ON auth_challenges (expires_at)",
+    ], False),
+    # Migration 8 left Unix-time dates NULL
+    (15, "unix campaign dates", [
+        "SET LOCAL TimeZone = 'UTC'",
+        TRY_TIMESTAMPTZ,
+        """
+        UPDATE campaigns
+        SET start_at = COALESCE(start_at, pg_temp.try_timestamptz(start_date)),
+            end_at = COALESCE(end_at, pg_temp.try_timestamptz(end_date))
+        WHERE (start_at IS NULL AND start_date IS NOT NULL)
+           OR (end_at IS NULL AND end_date IS NOT NULL)
+        """,
+        """
+        UPDATE campaigns_archive
+        SET start_at = COALESCE(start_at, pg_temp.try_timestamptz(start_date)),
+            end_at = COALESCE(end_at, pg_temp.try_timestamptz(end_date))
+        WHERE (start_at IS NULL AND start_date IS NOT NULL)
+           OR (end_at IS NULL AND end_date IS NOT NULL)
+        """,
+    ], False),
+    # Migration 15 read YYYYMMDD dates as Unix time
+    (16, "basic ISO campaign dates", [
+        "SET LOCAL TimeZone = 'UTC'",
+        TRY_TIMESTAMPTZ,
+        """
+        UPDATE campaigns
+        SET start_at = CASE WHEN btrim(start_date) ~ '^[0-9]{8}$'
+                            THEN pg_temp.try_timestamptz(start_date) ELSE start_at END,
+            end_at = CASE WHEN btrim(end_date) ~ '^[0-9]{8}$'
+                          THEN pg_temp.try_timestamptz(end_date) ELSE end_at END
+        WHERE btrim(start_date) ~ '^[0-9]{8}$' OR btrim(end_date) ~ '^[0-9]{8}$'
+        """,
+        """
+        UPDATE campaigns_archive
+        SET start_at = CASE WHEN btrim(start_date) ~ '^[0-9]{8}$'
+                            THEN pg_temp.try_timestamptz(start_date) ELSE start_at END,
+            end_at = CASE WHEN btrim(end_date) ~ '^[0-9]{8}$'
+                          THEN pg_temp.try_timestamptz(end_date) ELSE end_at END
+        WHERE btrim(start_date) ~ '^[0-9]{8}$' OR btrim(end_date) ~ '^[0-9]{8}$'
+        """,
+    ], False),
+]
+
+# Arbitrary key for the advisory lock that serializes migrations across nodes
+_MIGRATION_LOCK_ID = 7202511
+
+logger = logging.getLogger(__name__)
+
+class PostgresCampaignRepository(CampaignRepository):
+    """Campaign storage in a shared PostgreSQL database"""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10):
+        if asyncpg is None:
+            raise RuntimeError("DATABASE_BACKEND=postgres requires the asyncpg package")
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            raise RuntimeError("PostgreSQL repository used before connect()")
+        return self._pool
+
+    async def connect(self, run_migrations: bool = True):
+        if self._pool is None:
+            self._pool = await asyncpg.create_pool(
+                self.dsn, min_size=self.min_size, max_size=self.max_size
+            )
+        if run_migrations:
+            await self.migrate()
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def migrate(self, target: Optional[int] = None) -> List[int]:
+        """Apply pending migrations; an advisory lock keeps nodes from racing"""
+        applied = []
+        async with self.pool.acquire() as conn:
+            await conn.execute("SELECT pg_advisory_lock($1)", _MIGRATION_LOCK_ID)
+            try:
+                await conn.execute("""
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT NOT NULL,
+                        applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+                    )
+                """)
+                done = {
+                    row['version']
+                    for row in await conn.fetch("SELECT version FROM schema_version")
+                }
+                for version, name, statements, online in MIGRATIONS:
+                    if target is not None and version > target:
+                        break
+                    if version in done:
+                        continue
+                    if online:
+                        for statement in statements:
+                            await conn.execute(statement)
+                        await conn.execute(
+                            "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                            version, name
+                        )
+                    else:
+                        async with conn.transaction():
+                            for statement in statements:
+                                await conn.execute(statement)
+                            await conn.execute(
+                                "INSERT INTO schema_version (version, name) VALUES ($1, $2)",
+                                version, name
+                            )
+                    applied.append(version)
+                    logger.info("Applied PostgreSQL migration %d (%s)", version, name)
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", _MIGRATION_LOCK_ID)
+        return applied
+
+    async def migration_status(self) -> List[Tuple[int, str, bool]]:
+        async with self.pool.acquire() as conn:
+            done = set()
+            if await conn.fetchval("SELECT to_regclass('schema_version') IS NOT NULL"):
+                done = {row['version'] for row in await conn.fetch("SELECT version FROM schema_version")}
+        return [(version, name, version in done) for version, name, _, _ in MIGRATIONS]
+
+    async def get_or_create_user_identifier(self, did: str, new_identifier: str) -> str:
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO user_identifiers (did, identifier_from_purchaser)
+                VALUES ($1, $2)
+                ON CONFLICT (did) DO NOTHING
+            """, did, new_identifier)
+            return await conn.fetchval("""
+                SELECT identifier_from_purchaser
+                FROM user_identifiers
+                WHERE did = $1
+            """, did)
+
+    async def insert_campaigns(
+        self,
+        did: str,
+        identifier: str,
+        campaign_ids: List[str],
+        requests: List[CreateCampaignRequest],
+        start_times: Optional[List[Optional[datetime]]] = None,
+        end_times: Optional[List[Optional[datetime]]] = None,
+        statuses: Optional[List[str]] = None
+    ) -> List[CampaignRecord]:
+        start_times = start_times or [None] * len(campaign_ids)
+        end_times = end_times or [None] * len(campaign_ids)
+        statuses = statuses or ['pending'] * len(campaign_ids)
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                await conn.executemany("""
+                    INSERT INTO campaigns
+                    (campaign_id, did, identifier_from_purchaser, campaign_name,
+                     campaign_description, campaign_objective, target_audience,
+                     budget, duration_days, start_date, end_date, start_at, end_at, input_text, status)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+                """, [
+                    (campaign_id, did, identifier, req.campaign_name, req.campaign_description,
+                     req.campaign_objective, req.target_audience, req.budget, req.duration_days,
+                     req.start_date, req.end_date, start_time, end_time, req.input_text, status)
+                    for campaign_id, req, start_time, end_time, status
+                    in zip(campaign_ids, requests, start_times, end_times, statuses)
+                ])
+                await conn.executemany("""
+                    INSERT INTO campaign_events (campaign_id, did, status)
+                    VALUES ($1, $2, $3)
+                """, list(zip(campaign_ids, [did] * len(campaign_ids), statuses)))
+
+            rows = await conn.fetch(f"""
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns
+                WHERE campaign_id = ANY($1::text[])
+            """, campaign_ids)
+
+        campaigns = {row['campaign_id']: dict(row) for row in rows}
+        return [campaigns[campaign_id] for campaign_id in campaign_ids]
+
+    async def list_campaigns_by_did(
+        self,
+        did: str,
+        filters: Optional[CampaignFilters] = None,
+        include_text: bool = False
+    ) -> List[CampaignRecord]:
+        params: List[Any] = [did]
+        filters_by_column = []
+        for column, operator, value in filter_conditions(filters):
+            params.append(value)
+            filters_by_column.append((column, operator, len(params)))
+
+        columns = CAMPAIGN_COLUMNS if include_text else SUMMARY_COLUMNS
+
+        def select(table: str) -> str:
+            # Columns are qualified: the output columns of the same name are text
+            conditions = [f"{table}.did = $1"] + [
+                f"{table}.{column} {operator} ${index}" for column, operator, index in filters_by_column
+            ]
+            return f"SELECT {columns} FROM {table} WHERE {' AND '.join(conditions)}"
+
+        if filters is not None and filters.include_archived:
+            # created_at is rendered as sortable text
+            query = f"""
+                {select("campaigns")}
+                UNION ALL
+                {select("campaigns_archive")}
+                ORDER BY created_at COLLATE "C" DESC
+            """
+        else:
+            query = f"{select('campaigns')} ORDER BY campaigns.created_at DESC"
+
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, *params)
+        return [dict(row) for row in rows]
+
+    async def get_campaign(self, campaign_id: str) -> Optional[CampaignRecord]:
+        async with self.pool.acquire() as conn:
+            # The archive is only read when the campaign is not in campaigns
+            row = await conn.fetchrow(f"""
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns
+                WHERE campaign_id = $1
+                UNION ALL
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns_archive
+                WHERE campaign_id = $1
+                LIMIT 1
+            """, campaign_id)
+        return dict(row) if row else None
+
+    async def update_status(self, campaign_ids: List[str], status: str) -> int:
+        if not campaign_ids:
+            return 0
+        async with self.pool.acquire() as conn:
+            # One statement: the old statuses are read under row locks, and
+            # the events of actual transitions are written with the update
+            return await conn.fetchval("""
+                WITH previous AS (
+                    SELECT campaign_id, status
+                    FROM campaigns
+                    WHERE campaign_id = ANY($2::text[])
+                    FOR UPDATE
+                ),
+                updated AS (
+                    UPDATE campaigns
+                    SET status = $1, updated_at = now()
+                    FROM previous
+                    WHERE campaigns.campaign_id = previous.campaign_id
+                    RETURNING campaigns.campaign_id, campaigns.did, previous.status AS previous_status
+                ),
+                events AS (
+                    INSERT INTO campaign_events (campaign_id, did, status)
+                    SELECT campaign_id, did, $1
+                    FROM updated
+                    WHERE previous_status IS DISTINCT FROM $1
+                )
+                SELECT count(*) FROM updated
+            """, status, campaign_ids)
+
+    async def get_campaign_timeline(self, campaign_id: str) -> Dict[str, List[EventRecord]]:
+        async with self.pool.acquire() as conn:
+            events = await conn.fetch(f"""
+                SELECT
+                    status,
+                    to_char(ts AT TIME ZONE 'UTC', '{EVENT_TS_FORMAT}') AS entered_at,
+                    to_char(next_ts AT TIME ZONE 'UTC', '{EVENT_TS_FORMAT}') AS left_at,
+                    duration_seconds
+                FROM ({TIMELINE_EVENTS}) AS timeline
+                ORDER BY ts, id
+            """, campaign_id)
+            stages = await conn.fetch(f"""
+                SELECT status, count(*) AS entries, sum(duration_seconds) AS total_seconds
+                FROM ({TIMELINE_EVENTS}) AS timeline
+                GROUP BY status
+                ORDER BY min(ts)
+            """, campaign_id)
+        return {"events": [dict(row) for row in events], "stages": [dict(row) for row in stages]}
+
+    async def list_events_by_did(
+        self,
+        did: str,
+        since: datetime,
+        until: datetime,
+        limit: int
+    ) -> List[EventRecord]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(f"""
+                SELECT campaign_id, status, to_char(ts AT TIME ZONE 'UTC', '{EVENT_TS_FORMAT}') AS ts
+                FROM campaign_events
+                WHERE did = $1 AND ts >= $2 AND ts < $3
+                ORDER BY campaign_events.ts
+                LIMIT $4
+            """, did, since, until, limit)
+        return [dict(row) for row in rows]
+
+    async def list_scheduled_campaigns(self, due_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT campaign_id, to_char(start_at AT TIME ZONE 'UTC', 'YYYY-MM-DD HH24:MI:SS') AS start_at
+                FROM campaigns
+                WHERE status = 'scheduled' AND campaigns.start_at < $1
+                ORDER BY campaigns.start_at
+                LIMIT $2
+            """, due_before, limit)
+        return [dict(row) for row in rows]
+
+    async def claim_scheduled_campaigns(self, campaign_ids: List[str]) -> List[CampaignRecord]:
+        if not campaign_ids:
+            return []
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # Rows locked by another worker's claim are skipped, not waited for
+                rows = await conn.fetch(f"""
+                    WITH claimed AS (
+                        UPDATE campaigns
+                        SET status = 'pending', updated_at = now()
+                        WHERE campaign_id IN (
+                            SELECT campaign_id FROM campaigns
+                            WHERE campaign_id = ANY($1::text[]) AND status = 'scheduled'
+                            FOR UPDATE SKIP LOCKED
+                        )
+                        RETURNING *
+                    ),
+                    events AS (
+                        INSERT INTO campaign_events (campaign_id, did, status)
+                        SELECT campaign_id, did, 'pending' FROM claimed
+                    )
+                    SELECT {CAMPAIGN_COLUMNS} FROM claimed
+                """, campaign_ids)
+        return [dict(row) for row in rows]
+
+    async def expire_pending_campaigns(self, created_before: datetime, limit: int) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH stale AS (
+                    SELECT campaign_id
+                    FROM campaigns
+                    WHERE status = 'pending' AND created_at < $1
+                        -- Scheduled campaigns were waiting for their start, not stuck
+                        AND (start_at IS NULL OR start_at < $1)
+                    ORDER BY created_at
+                    LIMIT $2
+                    FOR UPDATE SKIP LOCKED
+                ),
+                expired AS (
+                    UPDATE campaigns
+                    SET status = 'expired', updated_at = now()
+                    FROM stale
+                    WHERE campaigns.campaign_id = stale.campaign_id
+                    RETURNING campaigns.campaign_id, campaigns.did
+                ),
+                events AS (
+                    INSERT INTO campaign_events (campaign_id, did, status)
+                    SELECT campaign_id, did, 'expired' FROM expired
+                )
+                SELECT count(*) FROM expired
+            """, created_before, limit)
+
+    async def archive_campaigns(self, updated_before: datetime, statuses: List[str], limit: int) -> int:
+        if not statuses:
+            return 0
+        async with self.pool.acquire() as conn:
+            # Rows locked by a concurrent status update are left for the next batch
+            return await conn.fetchval(f"""
+                WITH cold AS (
+                    SELECT id
+                    FROM campaigns
+                    WHERE status = ANY($1::text[]) AND updated_at < $2
+                    LIMIT $3
+                    FOR UPDATE SKIP LOCKED
+                ),
+                moved AS (
+                    DELETE FROM campaigns
+                    USING cold
+                    WHERE campaigns.id = cold.id
+                    RETURNING campaigns.*
+                ),
+                archived AS (
+                    INSERT INTO campaigns_archive ({ARCHIVED_COLUMNS})
+                    SELECT {ARCHIVED_COLUMNS} FROM moved
+                    RETURNING 1
+                )
+                SELECT count(*) FROM archived
+            """, statuses, updated_before, limit)
+
+    async def insert_challenge(self, did: str, challenge: str, expires_at: float):
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO auth_challenges (did, challenge, expires_at)
+                VALUES ($1, $2, to_timestamp($3))
+                ON CONFLICT (did) DO UPDATE SET
+                    challenge = EXCLUDED.challenge,
+                    expires_at = EXCLUDED.expires_at
+            """, did, challenge, expires_at)
+
+    async def consume_challenge(self, did: str, challenge: str) -> bool:
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow("""
+                DELETE FROM auth_challenges
+                WHERE did = $1 AND challenge = $2 AND expires_at > now()
+                RETURNING did
+            """, did, challenge)
+        return row is not None
+
+    async def prune_challenges(self) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH pruned AS (
+                    DELETE FROM auth_challenges WHERE expires_at <= now() RETURNING 1
+                )
+                SELECT count(*) FROM pruned
+            """)
+
+    async def count_challenges(self) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("SELECT count(*) FROM auth_challenges")
+
+    async def insert_refresh_token(self, token_hash: str, did: str, family_id: str, expires_at: float):
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO refresh_tokens (token_hash, did, family_id, expires_at)
+                VALUES ($1, $2, $3, to_timestamp($4))
+            """, token_hash, did, family_id, expires_at)
+
+    async def use_refresh_token(self, token_hash: str, reuse_grace: float) -> Optional[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            async with conn.transaction():
+                # used_at keeps the first use, so the grace window does not slide
+                row = await conn.fetchrow("""
+                    UPDATE refresh_tokens SET used_at = COALESCE(used_at, now())
+                    WHERE token_hash = $1 AND expires_at > now()
+                      AND (used_at IS NULL OR used_at > now() - make_interval(secs => $2))
+                    RETURNING did, family_id
+                """, token_hash, reuse_grace)
+                if row is None:
+                    # Replayed after the grace window: the chain may be stolen, end it
+                    await conn.execute("""
+                        DELETE FROM refresh_tokens
+                        WHERE family_id = (
+                            SELECT family_id FROM refresh_tokens
+                            WHERE token_hash = $1 AND used_at IS NOT NULL
+                        )
+                    """, token_hash)
+        return dict(row) if row is not None else None
+
+    async def revoke_refresh_family(self, token_hash: str) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH revoked AS (
+                    DELETE FROM refresh_tokens
+                    WHERE family_id = (SELECT family_id FROM refresh_tokens WHERE token_hash = $1)
+                    RETURNING 1
+                )
+                SELECT count(*) FROM revoked
+            """, token_hash)
+
+    async def revoke_access_token(self, jti: str, expires_at: float):
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO revoked_tokens (jti, expires_at)
+                VALUES ($1, to_timestamp($2))
+                ON CONFLICT (jti) DO NOTHING
+            """, jti, expires_at)
+
+    async def list_revoked_tokens(self, revoked_since: float) -> List[Dict[str, Any]]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT jti, EXTRACT(EPOCH FROM expires_at)::float8 AS expires_at
+                FROM revoked_tokens
+                WHERE revoked_at >= to_timestamp($1) AND expires_at > now()
+            """, revoked_since)
+        return [dict(row) for row in rows]
+
+    async def prune_auth_tokens(self) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH refresh AS (
+                    DELETE FROM refresh_tokens WHERE expires_at <= now() RETURNING 1
+                ),
+                revoked AS (
+                    DELETE FROM revoked_tokens WHERE expires_at <= now() RETURNING 1
+                )
+                SELECT (SELECT count(*) FROM refresh) + (SELECT count(*) FROM revoked)
+            """)
+
+    async def find_job_submissions(self, dedup_keys: List[str], submitted_since: float) -> Dict[str, str]:
+        if not dedup_keys:
+            return {}
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch("""
+                SELECT dedup_key, campaign_id
+                FROM job_submissions
+                WHERE dedup_key = ANY($1::text[]) AND submitted_at >= to_timestamp($2)
+            """, dedup_keys, submitted_since)
+        return {row['dedup_key']: row['campaign_id'] for row in rows}
+
+    async def record_job_submissions(self, submissions: Dict[str, str]):
+        if not submissions:
+            return
+        async with self.pool.acquire() as conn:
+            await conn.execute("""
+                INSERT INTO job_submissions (dedup_key, campaign_id, submitted_at)
+                SELECT dedup_key, campaign_id, now()
+                FROM unnest($1::text[], $2::text[]) AS s(dedup_key, campaign_id)
+                ON CONFLICT (dedup_key) DO UPDATE SET
+                    campaign_id = excluded.campaign_id,
+                    submitted_at = excluded.submitted_at
+            """, list(submissions), list(submissions.values()))
+
+    async def link_campaign_jobs(self, links: Dict[str, str]) -> int:
+        if not links:
+            return 0
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH linked AS (
+                    UPDATE campaigns
+                    SET job_campaign_id = links.job_campaign_id
+                    FROM unnest($1::text[], $2::text[]) AS links(campaign_id, job_campaign_id)
+                    WHERE campaigns.campaign_id = links.campaign_id
+                    RETURNING 1
+                )
+                SELECT count(*) FROM linked
+            """, list(links), list(links.values()))
+
+    async def prune_job_submissions(self, submitted_before: float) -> int:
+        async with self.pool.acquire() as conn:
+            return await conn.fetchval("""
+                WITH pruned AS (
+                    DELETE FROM job_submissions WHERE submitted_at < to_timestamp($1) RETURNING 1
+                )
+                SELECT count(*) FROM pruned
+            """, submitted_before)
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        async with self.pool.acquire() as conn:
+            holder = await conn.fetchval("""
+                INSERT INTO maintenance_leases (name, owner, expires_at)
+                VALUES ($1, $2, now() + make_interval(secs => $3))
+                ON CONFLICT (name) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE maintenance_leases.expires_at <= now() OR maintenance_leases.owner = $2
+                RETURNING owner
+            """, name, owner, ttl)
+        return holder is not None
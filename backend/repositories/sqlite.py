@@ -0,0 +1,730 @@
+"""
+SQLite implementation of the campaign repository
+"""
+import asyncio
+import sqlite3
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from database import DATABASE_PATH, get_db
+from migrations import MIGRATIONS, applied_versions, migrate
+from models import CampaignFilters, CreateCampaignRequest
+from repositories.base import (
+    CAMPAIGN_FIELDS, CampaignRecord, CampaignRepository, EventRecord, filter_conditions
+)
+from services import blob_store
+
+CAMPAIGN_COLUMNS = """
+    id, campaign_id, did, identifier_from_purchaser,
+    campaign_name, campaign_description, campaign_objective,
+    target_audience, budget, duration_days, start_date, end_date, start_at, end_at,
+    input_text, status, created_at, updated_at,
+    input_text_hash, description_hash, job_campaign_id
+"""
+
+# CAMPAIGN_COLUMNS without the large text fields (None, no blob is read)
+SUMMARY_COLUMNS = """
+    id, campaign_id, did, identifier_from_purchaser,
+    campaign_name, NULL AS campaign_description, campaign_objective,
+    target_audience, budget, duration_days, start_date, end_date, start_at, end_at,
+    NULL AS input_text, status, created_at, updated_at,
+    NULL AS input_text_hash, NULL AS description_hash, job_campaign_id
+"""
+
+# A campaign's events with the time spent in each status. The current
+# status (no next event) counts up to now.
+TIMELINE_EVENTS = """
+    SELECT
+        status, ts AS entered_at,
+        LEAD(ts) OVER timeline AS left_at,
+        round((julianday(COALESCE(LEAD(ts) OVER timeline, 'now')) - julianday(ts)) * 86400, 3)
+            AS duration_seconds
+    FROM campaign_events
+    WHERE campaign_id = ?
+    WINDOW timeline AS (ORDER BY ts, id)
+"""
+
+# Tables whose planner statistics analyze_if_stale keeps current
+ANALYZED_TABLES = ("campaigns", "campaigns_archive", "campaign_events", "user_identifiers")
+
+def format_timestamp(value: datetime) -> str:
+    """Render a UTC datetime like the ts column of campaign_events"""
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+
+def _column_value(value):
+    """Datetimes as stored in campaigns (CURRENT_TIMESTAMP format, UTC)"""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+def rows_to_records(cursor: sqlite3.Cursor, rows) -> List[CampaignRecord]:
+    """
+    Map campaigns rows to campaign records
+
+    Text fields stored in campaign_blobs are fetched in one query and
+    each distinct value is decompressed once. Rows not yet migrated to
+    blob storage keep their inline values.
+    """
+    texts = blob_store.load_texts(
+        cursor,
+        [row[column] for row in rows for column in blob_store.BLOB_FIELDS.values()]
+    )
+
+    records = []
+    for row in rows:
+        record = {field: row[field] for field in CAMPAIGN_FIELDS}
+        for field, hash_column in blob_store.BLOB_FIELDS.items():
+            digest = row[hash_column]
+            if digest:
+                record[field] = texts[digest]
+        records.append(record)
+    return records
+
+class SQLiteCampaignRepository(CampaignRepository):
+    """Campaign storage in the local campaigns.db file"""
+
+    def __init__(self, database_path: str = DATABASE_PATH):
+        self.database_path = database_path
+
+    async def connect(self, run_migrations: bool = True):
+        if run_migrations:
+            await self.migrate()
+
+    async def migrate(self, target: Optional[int] = None) -> List[int]:
+        applied = await asyncio.to_thread(migrate, self.database_path, target)
+        return [migration.version for migration in applied]
+
+    async def migration_status(self) -> List[Tuple[int, str, bool]]:
+        return await asyncio.to_thread(self._migration_status)
+
+    async def get_or_create_user_identifier(self, did: str, new_identifier: str) -> str:
+        return await asyncio.to_thread(self._get_or_create_user_identifier, did, new_identifier)
+
+    async def insert_campaigns(
+        self,
+        did: str,
+        identifier: str,
+        campaign_ids: List[str],
+        requests: List[CreateCampaignRequest],
+        start_times: Optional[List[Optional[datetime]]] = None,
+        end_times: Optional[List[Optional[datetime]]] = None,
+        statuses: Optional[List[str]] = None
+    ) -> List[CampaignRecord]:
+        return await asyncio.to_thread(
+            self._insert_campaigns, did, identifier, campaign_ids, requests,
+            start_times, end_times, statuses
+        )
+
+    async def list_campaigns_by_did(
+        self,
+        did: str,
+        filters: Optional[CampaignFilters] = None,
+        include_text: bool = False
+    ) -> List[CampaignRecord]:
+        return await asyncio.to_thread(self._list_campaigns_by_did, did, filters, include_text)
+
+    async def get_campaign(self, campaign_id: str) -> Optional[CampaignRecord]:
+        return await asyncio.to_thread(self._get_campaign, campaign_id)
+
+    async def update_status(self, campaign_ids: List[str], status: str) -> int:
+        if not campaign_ids:
+            return 0
+        return await asyncio.to_thread(self._update_status, campaign_ids, status)
+
+    async def get_campaign_timeline(self, campaign_id: str) -> Dict[str, List[EventRecord]]:
+        return await asyncio.to_thread(self._get_campaign_timeline, campaign_id)
+
+    async def list_events_by_did(
+        self,
+        did: str,
+        since: datetime,
+        until: datetime,
+        limit: int
+    ) -> List[EventRecord]:
+        return await asyncio.to_thread(self._list_events_by_did, did, since, until, limit)
+
+    async def list_scheduled_campaigns(self, due_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._list_scheduled_campaigns, due_before, limit)
+
+    async def claim_scheduled_campaigns(self, campaign_ids: List[str]) -> List[CampaignRecord]:
+        if not campaign_ids:
+            return []
+        return await asyncio.to_thread(self._claim_scheduled_campaigns, campaign_ids)
+
+    async def expire_pending_campaigns(self, created_before: datetime, limit: int) -> int:
+        return await asyncio.to_thread(self._expire_pending_campaigns, created_before, limit)
+
+    async def archive_campaigns(self, updated_before: datetime, statuses: List[str], limit: int) -> int:
+        if not statuses:
+            return 0
+        return await asyncio.to_thread(self._archive_campaigns, updated_before, statuses, limit)
+
+    async def insert_challenge(self, did: str, challenge: str, expires_at: float):
+        await asyncio.to_thread(self._insert_challenge, did, challenge, expires_at)
+
+    async def consume_challenge(self, did: str, challenge: str) -> bool:
+        return await asyncio.to_thread(self._consume_challenge, did, challenge)
+
+    async def prune_challenges(self) -> int:
+        return await asyncio.to_thread(self._prune_challenges)
+
+    async def count_challenges(self) -> int:
+        return await asyncio.to_thread(self._count_challenges)
+
+    async def insert_refresh_token(self, token_hash: str, did: str, family_id: str, expires_at: float):
+        await asyncio.to_thread(self._insert_refresh_token, token_hash, did, family_id, expires_at)
+
+    async def use_refresh_token(self, token_hash: str, reuse_grace: float) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self._use_refresh_token, token_hash, reuse_grace)
+
+    async def revoke_refresh_family(self, token_hash: str) -> int:
+        return await asyncio.to_thread(self._revoke_refresh_family, token_hash)
+
+    async def revoke_access_token(self, jti: str, expires_at: float):
+        await asyncio.to_thread(self._revoke_access_token, jti, expires_at)
+
+    async def list_revoked_tokens(self, revoked_since: float) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self._list_revoked_tokens, revoked_since)
+
+    async def prune_auth_tokens(self) -> int:
+        return await asyncio.to_thread(self._prune_auth_tokens)
+
+    async def find_job_submissions(self, dedup_keys: List[str], submitted_since: float) -> Dict[str, str]:
+        if not dedup_keys:
+            return {}
+        return await asyncio.to_thread(self._find_job_submissions, dedup_keys, submitted_since)
+
+    async def record_job_submissions(self, submissions: Dict[str, str]):
+        if submissions:
+            await asyncio.to_thread(self._record_job_submissions, submissions)
+
+    async def link_campaign_jobs(self, links: Dict[str, str]) -> int:
+        if not links:
+            return 0
+        return await asyncio.to_thread(self._link_campaign_jobs, links)
+
+    async def prune_job_submissions(self, submitted_before: float) -> int:
+        return await asyncio.to_thread(self._prune_job_submissions, submitted_before)
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return await asyncio.to_thread(self._acquire_lease, name, owner, ttl)
+
+    async def checkpoint(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._checkpoint)
+
+    async def analyze_if_stale(self, growth: float) -> bool:
+        return await asyncio.to_thread(self._analyze_if_stale, growth)
+
+    async def optimize(self):
+        await asyncio.to_thread(self._optimize)
+
+    # Blocking implementations, run in worker threads
+
+    def _get_or_create_user_identifier(self, did: str, new_identifier: str) -> str:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+
+            # A concurrent request may create the row first; keep whichever won
+            cursor.execute("""
+                INSERT OR IGNORE INTO user_identifiers (did, identifier_from_purchaser)
+                VALUES (?, ?)
+            """, (did, new_identifier))
+            conn.commit()
+
+            cursor.execute("""
+                SELECT identifier_from_purchaser
+                FROM user_identifiers
+                WHERE did = ?
+            """, (did,))
+
+            return cursor.fetchone()['identifier_from_purchaser']
+
+    def _insert_campaigns(
+        self,
+        did: str,
+        identifier: str,
+        campaign_ids: List[str],
+        requests: List[CreateCampaignRequest],
+        start_times: Optional[List[Optional[datetime]]] = None,
+        end_times: Optional[List[Optional[datetime]]] = None,
+        statuses: Optional[List[str]] = None
+    ) -> List[CampaignRecord]:
+        no_times = [None] * len(campaign_ids)
+        start_ats = [_column_value(start_time) for start_time in start_times or no_times]
+        end_ats = [_column_value(end_time) for end_time in end_times or no_times]
+        statuses = statuses or ['pending'] * len(campaign_ids)
+
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+
+            # Large text fields go to the deduplicated blob table
+            input_hashes = blob_store.put_texts(cursor, [req.input_text for req in requests])
+            description_hashes = blob_store.put_texts(
+                cursor, [req.campaign_description for req in requests]
+            )
+
+            cursor.executemany("""
+                INSERT INTO campaigns
+                (campaign_id, did, identifier_from_purchaser, campaign_name,
+                 campaign_description, campaign_objective, target_audience,
+                 budget, duration_days, start_date, end_date, start_at, end_at, input_text,
+                 status, input_text_hash, description_hash)
+                VALUES (?, ?, ?, ?, '', ?, ?, ?, ?, ?, ?, ?, ?, '', ?, ?, ?)
+            """, [
+                (campaign_id, did, identifier, req.campaign_name,
+                 req.campaign_objective, req.target_audience, req.budget, req.duration_days,
+                 req.start_date, req.end_date, start_at, end_at, status, input_hash, description_hash)
+                for campaign_id, req, start_at, end_at, status, input_hash, description_hash
+                in zip(campaign_ids, requests, start_ats, end_ats, statuses,
+                       input_hashes, description_hashes)
+            ])
+            cursor.executemany("""
+                INSERT INTO campaign_events (campaign_id, did, status)
+                VALUES (?, ?, ?)
+            """, list(zip(campaign_ids, [did] * len(campaign_ids), statuses)))
+            conn.commit()
+
+            # Fetch the created campaigns
+            placeholders = ", ".join("?" for _ in campaign_ids)
+            cursor.execute(f"""
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns
+                WHERE campaign_id IN ({placeholders})
+            """, campaign_ids)
+
+            campaigns = {
+                campaign['campaign_id']: campaign
+                for campaign in rows_to_records(cursor, cursor.fetchall())
+            }
+
+        return [campaigns[campaign_id] for campaign_id in campaign_ids]
+
+    def _list_campaigns_by_did(
+        self,
+        did: str,
+        filters: Optional[CampaignFilters] = None,
+        include_text: bool = False
+    ) -> List[CampaignRecord]:
+        conditions = ["did = ?"]
+        params = [did]
+        for column, operator, value in filter_conditions(filters):
+            conditions.append(f"{column} {operator} ?")
+            params.append(_column_value(value))
+
+        columns = CAMPAIGN_COLUMNS if include_text else SUMMARY_COLUMNS
+        tables = ["campaigns"]
+        if filters is not None and filters.include_archived:
+            tables.append("campaigns_archive")
+        # Each table is read in created_at order from its index; SQLite
+        # merges the two
+        query = " UNION ALL ".join(
+            f"SELECT {columns} FROM {table} WHERE {' AND '.join(conditions)}"
+            for table in tables
+        )
+
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"{query} ORDER BY created_at DESC", params * len(tables))
+
+            return rows_to_records(cursor, cursor.fetchall())
+
+    def _get_campaign(self, campaign_id: str) -> Optional[CampaignRecord]:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            # The archive is only read when the campaign is not in campaigns
+            cursor.execute(f"""
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns
+                WHERE campaign_id = :campaign_id
+                UNION ALL
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns_archive
+                WHERE campaign_id = :campaign_id
+                LIMIT 1
+            """, {"campaign_id": campaign_id})
+
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            return rows_to_records(cursor, [row])[0]
+
+    def _update_status(self, campaign_ids: List[str], status: str) -> int:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            params = [{"status": status, "campaign_id": campaign_id} for campaign_id in campaign_ids]
+
+            # Record the transition before the row loses its old status; both
+            # statements commit together
+            cursor.executemany("""
+                INSERT INTO campaign_events (campaign_id, did, status)
+                SELECT campaign_id, did, :status
+                FROM campaigns
+                WHERE campaign_id = :campaign_id AND status IS NOT :status
+            """, params)
+            cursor.executemany("""
+                UPDATE campaigns
+                SET status = :status, updated_at = CURRENT_TIMESTAMP
+                WHERE campaign_id = :campaign_id
+            """, params)
+            updated = cursor.rowcount
+            conn.commit()
+
+            return updated
+
+    def _get_campaign_timeline(self, campaign_id: str) -> Dict[str, List[EventRecord]]:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            # Rows come out in window order, which follows the
+            # (campaign_id, ts) index
+            cursor.execute(TIMELINE_EVENTS, (campaign_id,))
+            events = [dict(row) for row in cursor.fetchall()]
+
+            cursor.execute(f"""
+                WITH timeline AS ({TIMELINE_EVENTS})
+                SELECT status, COUNT(*) AS entries, round(SUM(duration_seconds), 3) AS total_seconds
+                FROM timeline
+                GROUP BY status
+                ORDER BY MIN(entered_at)
+            """, (campaign_id,))
+            stages = [dict(row) for row in cursor.fetchall()]
+
+        return {"events": events, "stages": stages}
+
+    def _list_events_by_did(
+        self,
+        did: str,
+        since: datetime,
+        until: datetime,
+        limit: int
+    ) -> List[EventRecord]:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT campaign_id, status, ts
+                FROM campaign_events
+                WHERE did = ? AND ts >= ? AND ts < ?
+                ORDER BY ts
+                LIMIT ?
+            """, (did, format_timestamp(since), format_timestamp(until), limit))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _list_scheduled_campaigns(self, due_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT campaign_id, start_at
+                FROM campaigns
+                WHERE status = 'scheduled' AND start_at < ?
+                ORDER BY start_at
+                LIMIT ?
+            """, (due_before.strftime("%Y-%m-%d %H:%M:%S"), limit))
+
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _claim_scheduled_campaigns(self, campaign_ids: List[str]) -> List[CampaignRecord]:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            placeholders = ", ".join("?" for _ in campaign_ids)
+
+            # The event INSERT takes the write lock, so no other worker can
+            # claim these rows before the UPDATE
+            cursor.execute(f"""
+                INSERT INTO campaign_events (campaign_id, did, status)
+                SELECT campaign_id, did, 'pending'
+                FROM campaigns
+                WHERE campaign_id IN ({placeholders}) AND status = 'scheduled'
+            """, campaign_ids)
+            cursor.execute(f"""
+                UPDATE campaigns
+                SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+                WHERE campaign_id IN ({placeholders}) AND status = 'scheduled'
+                RETURNING {CAMPAIGN_COLUMNS}
+            """, campaign_ids)
+            rows = cursor.fetchall()
+            conn.commit()
+
+            return rows_to_records(cursor, rows)
+
+    def _expire_pending_campaigns(self, created_before: datetime, limit: int) -> int:
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT campaign_id
+                FROM campaigns
+                WHERE status = 'pending' AND created_at < :before
+                    -- Scheduled campaigns were waiting for their start, not stuck
+                    AND (start_at IS NULL OR start_at < :before)
+                ORDER BY created_at
+                LIMIT :limit
+            """, {"before": created_before.strftime("%Y-%m-%d %H:%M:%S"), "limit": limit})
+            campaign_ids = [row['campaign_id'] for row in cursor.fetchall()]
+            if not campaign_ids:
+                return 0
+
+            # Re-checked in the transaction: a job may have been submitted
+            # since the SELECT
+            placeholders = ", ".join("?" for _ in campaign_ids)
+            cursor.execute(f"""
+                INSERT INTO campaign_events (campaign_id, did, status)
+                SELECT campaign_id, did, 'expired'
+                FROM campaigns
+                WHERE campaign_id IN ({placeholders}) AND status = 'pending'
+            """, campaign_ids)
+            cursor.execute(f"""
+                UPDATE campaigns
+                SET status = 'expired', updated_at = CURRENT_TIMESTAMP
+                WHERE campaign_id IN ({placeholders}) AND status = 'pending'
+            """, campaign_ids)
+            expired = cursor.rowcount
+            conn.commit()
+
+            return expired
+
+    def _archive_campaigns(self, updated_before: datetime, statuses: List[str], limit: int) -> int:
+        status_placeholders = ", ".join("?" for _ in statuses)
+        before = updated_before.strftime("%Y-%m-%d %H:%M:%S")
+        with get_db(self.database_path) as conn:
+            cursor = conn.cursor()
+            # Picked before the transaction, so the write lock is held for
+            # the move only
+            cursor.execute(f"""
+                SELECT campaign_id
+                FROM campaigns
+                WHERE status IN ({status_placeholders}) AND updated_at < ?
+                ORDER BY status, updated_at
+                LIMIT ?
+            """, [*statuses, before, limit])
+            campaign_ids = [row['campaign_id'] for row in cursor.fetchall()]
+            if not campaign_ids:
+                return 0
+
+            # Re-checked in the transaction: a campaign may have changed
+            # since the SELECT
+            placeholders = ", ".join("?" for _ in campaign_ids)
+            cold = f"""
+                campaign_id IN ({placeholders})
+                AND status IN ({status_placeholders}) AND updated_at < ?
+            """
+            params = [*campaign_ids, *statuses, before]
+            cursor.execute(f"""
+                INSERT INTO campaigns_archive ({CAMPAIGN_COLUMNS})
+                SELECT {CAMPAIGN_COLUMNS}
+                FROM campaigns
+                WHERE {cold}
+            """, params)
+            cursor.execute(f"DELETE FROM campaigns WHERE {cold}", params)
+            archived = cursor.rowcount
+            conn.commit()
+
+            return archived
+
+    def _migration_status(self) -> List[Tuple[int, str, bool]]:
+        with get_db(self.database_path) as conn:
+            done = set(applied_versions(conn))
+        return [(migration.version, migration.name, migration.version in done) for migration in MIGRATIONS]
+
+    def _insert_challenge(self, did: str, challenge: str, expires_at: float):
+        with get_db(self.database_path) as conn:
+            conn.execute("""
+                INSERT INTO auth_challenges (did, challenge, expires_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT(did) DO UPDATE SET
+                    challenge = excluded.challenge,
+                    expires_at = excluded.expires_at
+            """, (did, challenge, expires_at))
+            conn.commit()
+
+    def _consume_challenge(self, did: str, challenge: str) -> bool:
+        with get_db(self.database_path) as conn:
+            row = conn.execute("""
+                DELETE FROM auth_challenges
+                WHERE did = ? AND challenge = ? AND expires_at > ?
+                RETURNING did
+            """, (did, challenge, time.time())).fetchone()
+            conn.commit()
+
+            return row is not None
+
+    def _prune_challenges(self) -> int:
+        with get_db(self.database_path) as conn:
+            deleted = conn.execute(
+                "DELETE FROM auth_challenges WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+            conn.commit()
+
+            return deleted
+
+    def _count_challenges(self) -> int:
+        with get_db(self.database_path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM auth_challenges").fetchone()[0]
+
+    def _insert_refresh_token(self, token_hash: str, did: str, family_id: str, expires_at: float):
+        with get_db(self.database_path) as conn:
+            conn.execute("""
+                INSERT INTO refresh_tokens (token_hash, did, family_id, expires_at)
+                VALUES (?, ?, ?, ?)
+            """, (token_hash, did, family_id, expires_at))
+            conn.commit()
+
+    def _use_refresh_token(self, token_hash: str, reuse_grace: float) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with get_db(self.database_path) as conn:
+            # used_at keeps the first use, so the grace window does not slide
+            row = conn.execute("""
+                UPDATE refresh_tokens SET used_at = COALESCE(used_at, :now)
+                WHERE token_hash = :token_hash AND expires_at > :now
+                  AND (used_at IS NULL OR used_at > :now - :grace)
+                RETURNING did, family_id
+            """, {"token_hash": token_hash, "now": now, "grace": reuse_grace}).fetchone()
+            if row is None:
+                # Replayed after the grace window: the chain may be stolen, end it
+                conn.execute("""
+                    DELETE FROM refresh_tokens
+                    WHERE family_id = (
+                        SELECT family_id FROM refresh_tokens
+                        WHERE token_hash = ? AND used_at IS NOT NULL
+                    )
+                """, (token_hash,))
+            conn.commit()
+
+            return dict(row) if row is not None else None
+
+    def _revoke_refresh_family(self, token_hash: str) -> int:
+        with get_db(self.database_path) as conn:
+            cursor = conn.execute("""
+                DELETE FROM refresh_tokens
+                WHERE family_id = (SELECT family_id FROM refresh_tokens WHERE token_hash = ?)
+            """, (token_hash,))
+            conn.commit()
+
+            return cursor.rowcount
+
+    def _revoke_access_token(self, jti: str, expires_at: float):
+        with get_db(self.database_path) as conn:
+            conn.execute("""
+                INSERT OR IGNORE INTO revoked_tokens (jti, expires_at, revoked_at)
+                VALUES (?, ?, ?)
+            """, (jti, expires_at, time.time()))
+            conn.commit()
+
+    def _list_revoked_tokens(self, revoked_since: float) -> List[Dict[str, Any]]:
+        with get_db(self.database_path) as conn:
+            rows = conn.execute("""
+                SELECT jti, expires_at
+                FROM revoked_tokens
+                WHERE revoked_at >= ? AND expires_at > ?
+            """, (revoked_since, time.time())).fetchall()
+
+            return [dict(row) for row in rows]
+
+    def _prune_auth_tokens(self) -> int:
+        now = time.time()
+        with get_db(self.database_path) as conn:
+            deleted = conn.execute(
+                "DELETE FROM refresh_tokens WHERE expires_at <= ?", (now,)
+            ).rowcount
+            deleted += conn.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at <= ?", (now,)
+            ).rowcount
+            conn.commit()
+
+            return deleted
+
+    def _find_job_submissions(self, dedup_keys: List[str], submitted_since: float) -> Dict[str, str]:
+        placeholders = ", ".join("?" for _ in dedup_keys)
+        with get_db(self.database_path) as conn:
+            rows = conn.execute(f"""
+                SELECT dedup_key, campaign_id
+                FROM job_submissions
+                WHERE dedup_key IN ({placeholders}) AND submitted_at >= ?
+            """, [*dedup_keys, submitted_since]).fetchall()
+
+            return {row['dedup_key']: row['campaign_id'] for row in rows}
+
+    def _record_job_submissions(self, submissions: Dict[str, str]):
+        now = time.time()
+        with get_db(self.database_path) as conn:
+            conn.executemany("""
+                INSERT INTO job_submissions (dedup_key, campaign_id, submitted_at)
+                VALUES (?, ?, ?)
+                ON CONFLICT (dedup_key) DO UPDATE SET
+                    campaign_id = excluded.campaign_id,
+                    submitted_at = excluded.submitted_at
+            """, [(dedup_key, campaign_id, now) for dedup_key, campaign_id in submissions.items()])
+            conn.commit()
+
+    def _link_campaign_jobs(self, links: Dict[str, str]) -> int:
+        with get_db(self.database_path) as conn:
+            cursor = conn.executemany("""
+                UPDATE campaigns SET job_campaign_id = ? WHERE campaign_id = ?
+            """, [(job_campaign_id, campaign_id) for campaign_id, job_campaign_id in links.items()])
+            updated = cursor.rowcount
+            conn.commit()
+
+            return updated
+
+    def _prune_job_submissions(self, submitted_before: float) -> int:
+        with get_db(self.database_path) as conn:
+            deleted = conn.execute(
+                "DELETE FROM job_submissions WHERE submitted_at < ?", (submitted_before,)
+            ).rowcount
+            conn.commit()
+
+            return deleted
+
+    def _acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with get_db(self.database_path) as conn:
+            # In DO UPDATE, bare column names refer to the stored lease; no
+            # row is returned if someone else holds it
+            row = conn.execute("""
+                INSERT INTO maintenance_leases (name, owner, expires_at)
+                VALUES (:name, :owner, :expires_at)
+                ON CONFLICT (name) DO UPDATE SET
+                    owner = excluded.owner,
+                    expires_at = excluded.expires_at
+                WHERE expires_at <= :now OR owner = :owner
+                RETURNING owner
+            """, {"name": name, "owner": owner, "expires_at": now + ttl, "now": now}).fetchone()
+            conn.commit()
+
+            return row is not None
+
+    def _checkpoint(self) -> Dict[str, Any]:
+        with get_db(self.database_path) as conn:
+            # TRUNCATE also shrinks the WAL file; it reports busy instead of
+            # waiting for readers that still use old frames
+            busy, log_frames, checkpointed = conn.execute(
+                "PRAGMA wal_checkpoint(TRUNCATE)"
+            ).fetchone()
+
+            return {"busy": bool(busy), "log_frames": log_frames, "checkpointed": checkpointed}
+
+    def _analyze_if_stale(self, growth: float) -> bool:
+        with get_db(self.database_path) as conn:
+            # sqlite_stat1 rows start with the table's row count at the last ANALYZE
+            try:
+                analyzed = {
+                    row['tbl']: int(row['stat'].split()[0])
+                    for row in conn.execute("SELECT tbl, stat FROM sqlite_stat1")
+                }
+            except sqlite3.OperationalError:
+                analyzed = {}  # never analyzed
+
+            stale = [
+                table for table in ANALYZED_TABLES
+                if conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                > analyzed.get(table, 0) * (1 + growth)
+            ]
+            for table in stale:
+                conn.execute(f"ANALYZE {table}")
+            conn.commit()
+
+            return bool(stale)
+
+    def _optimize(self):
+        with get_db(self.database_path) as conn:
+            conn.execute("PRAGMA optimize")
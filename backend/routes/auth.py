@@ -0,0 +1,291 @@
+"""
+DID authentication routes for FastAPI
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from pydantic import BaseModel, Field
+
+import metrics
+from auth.challenge_store import challenge_store
+from auth.did_registry import did_verifiers
+from auth.jwt_utils import signing_keys, verify_token
+from config import settings
+from services.token_service import token_service
+
+router = APIRouter(tags=["auth"])
+bearer = HTTPBearer(auto_error=False)
+
+AUTH_VERIFICATIONS = metrics.counter(
+    "auth_verifications_total",
+    "DID authentication attempts by result",
+    ("result",)
+)
+
+# ============================================================
+# Pydantic Models
+# ============================================================
+
+class ChallengeResponse(BaseModel):
+    """Response model for challenge generation."""
+    challenge: str = Field(..., description="Random challenge string to be signed")
+    did: str = Field(..., description="The DID requesting authentication")
+
+class VerifyRequest(BaseModel):
+    """Request model for signature verification."""
+    did: str = Field(..., description="The DID claiming authentication")
+    challenge: str = Field(..., description="The challenge that was signed")
+    signature: str = Field(..., description="JWS signature of the challenge")
+
+class AuthResponse(BaseModel):
+    """Response model for successful authentication."""
+    access_token: str = Field(..., description="JWT access token")
+    token_type: str = Field(default="bearer", description="Token type")
+    did: str = Field(..., description="Authenticated DID")
+    refresh_token: str = Field(..., description="Single-use token for POST /auth/refresh")
+    expires_in: int = Field(..., description="Access token lifetime in seconds")
+
+class RefreshRequest(BaseModel):
+    """Request model for refreshing an access token."""
+    refresh_token: str = Field(..., description="Refresh token from the last sign-in or refresh")
+
+class LogoutRequest(BaseModel):
+    """Request model for logging out."""
+    refresh_token: Optional[str] = Field(None, description="Refresh token to revoke with its chain")
+
+class ErrorResponse(BaseModel):
+    """Response model for errors."""
+    detail: str = Field(..., description="Error message")
+
+# ============================================================
+# API Endpoints
+# ============================================================
+
+@router.get(
+    "/auth/challenge",
+    response_model=ChallengeResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    }
+)
+async def get_challenge(did: str = Query(..., description="The DID requesting authentication")):
+    """
+    Generate a random challenge for DID authentication.
+    
+    The client must sign this challenge with their DID's private key
+    and send it back to the /auth/verify endpoint.
+    
+    Args:
+        did: The DID in format "did:key:...", "did:prism:..." or other supported DID methods
+        
+    Returns:
+        ChallengeResponse with the challenge string
+    """
+    try:
+        if not did or not did.startswith("did:"):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid DID format. Must start with 'did:'"
+            )
+        
+        # Generate challenge
+        challenge = await challenge_store.create_challenge(did)
+        
+        return ChallengeResponse(challenge=challenge, did=did)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate challenge: {str(e)}"
+        )
+
+@router.post(
+    "/auth/verify",
+    response_model=AuthResponse,
+    responses={
+        400: {"model": ErrorResponse, "description": "Invalid request"},
+        401: {"model": ErrorResponse, "description": "Authentication failed"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    }
+)
+async def verify_authentication(request: VerifyRequest):
+    """
+    Verify DID-based authentication.
+    
+    This endpoint:
+    1. Validates the challenge is still valid
+    2. Verifies the JWS signature with the verifier for the DID's method
+       (did:key and did:prism locally, others through Identus if enabled)
+    3. Issues a JWT access token if valid
+    
+    Args:
+        request: VerifyRequest containing did, challenge, and signature
+        
+    Returns:
+        AuthResponse with JWT access token
+    """
+    try:
+        # Step 1: Verify challenge exists and is valid
+        if not await challenge_store.verify_challenge(request.did, request.challenge):
+            AUTH_VERIFICATIONS.inc(result="invalid_challenge")
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired challenge. Please request a new challenge."
+            )
+        
+        # Step 2: Verify DID authentication (verifier chosen by DID method)
+        is_valid = await did_verifiers.verify_did_authentication(
+            did=request.did,
+            challenge=request.challenge,
+            signature=request.signature
+        )
+        
+        if not is_valid:
+            AUTH_VERIFICATIONS.inc(result="invalid_signature")
+            raise HTTPException(
+                status_code=401,
+                detail="Signature verification failed. Authentication unsuccessful."
+            )
+        
+        # Step 3: Create JWT access token and refresh token
+        tokens = await token_service.issue(request.did)
+        AUTH_VERIFICATIONS.inc(result="success")
+        
+        return AuthResponse(
+            token_type="bearer",
+            did=request.did,
+            **tokens
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        AUTH_VERIFICATIONS.inc(result="error")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Authentication verification failed: {str(e)}"
+        )
+
+@router.post(
+    "/auth/refresh",
+    response_model=AuthResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Invalid, expired or reused refresh token"},
+        500: {"model": ErrorResponse, "description": "Internal server error"}
+    }
+)
+async def refresh_access_token(request: RefreshRequest):
+    """
+    Exchange a refresh token for a new access token and refresh token.
+    
+    The refresh token is used up. Presenting it again revokes every refresh
+    token of the sign-in.
+    
+    Args:
+        request: RefreshRequest containing the refresh token
+        
+    Returns:
+        AuthResponse with the new tokens
+    """
+    try:
+        tokens = await token_service.refresh(request.refresh_token)
+        if tokens is None:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired refresh token. Please sign in again."
+            )
+        
+        return AuthResponse(token_type="bearer", **tokens)
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Token refresh failed: {str(e)}"
+        )
+
+@router.post("/auth/logout", status_code=204)
+async def logout(
+    request: Optional[LogoutRequest] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)
+):
+    """
+    Revoke the access token of the Authorization header and, if given,
+    the refresh token with the rest of its chain.
+    """
+    payload = verify_token(credentials.credentials) if credentials else None
+    if not payload:
+        raise HTTPException(
+            status_code=401,
+            detail="Invalid or expired token"
+        )
+    
+    try:
+        await token_service.revoke(payload, request.refresh_token if request else None)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Logout failed: {str(e)}"
+        )
+
+@router.get("/auth/me")
+async def get_current_user(
+    token: Optional[str] = Query(None, description="JWT access token (deprecated: use the Authorization header)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)
+):
+    """
+    Get current authenticated user information from JWT token.
+    
+    Args:
+        token: JWT access token, when not sent as "Authorization: Bearer"
+        
+    Returns:
+        User information including DID
+    """
+    try:
+        token = credentials.credentials if credentials else token
+        if not token:
+            raise HTTPException(
+                status_code=401,
+                detail="Missing access token"
+            )
+        payload = verify_token(token)
+        if not payload:
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid or expired token"
+            )
+        
+        return {
+            "did": payload.get("did"),
+            "authenticated": True,
+            "expires_at": payload.get("exp")
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to get user info: {str(e)}"
+        )
+
+@router.get("/.well-known/jwks.json")
+async def get_jwks():
+    """
+    Public keys that verify access tokens (JSON Web Key Set).
+    
+    Other services can cache this and verify tokens locally, picking the
+    key by the token's "kid" header. Empty when tokens are signed with a
+    shared secret (HS256).
+    """
+    return ORJSONResponse(
+        signing_keys.jwks if signing_keys is not None else {"keys": []},
+        headers={"Cache-Control": f"public, max-age={settings.JWT_JWKS_MAX_AGE}"}
+    )
@@ -1,17 +1,26 @@
 """
 Campaign routes for FastAPI
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-import requests
-from typing import List
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
 
-from models import CreateCampaignRequest, CampaignResponse, CampaignListResponse, UserIdentifierResponse
+from models import (
+    CreateCampaignRequest, CampaignResponse, CampaignListResponse, UserIdentifierResponse,
+    BulkCreateCampaignRequest, BulkCreateCampaignResponse, CampaignTimelineResponse,
+    CampaignEventListResponse, CampaignFilters, parse_timestamp
+)
 from services.campaign_service import campaign_service
+from services.dispatcher import scheduled_dispatcher
+from services.job_submitter import job_submitter
 from auth.jwt_utils import verify_token
-from config import settings
 
-router = APIRouter(prefix="/campaigns", tags=["campaigns"])
+# Campaign records are plain dicts built straight from database rows. Handlers
+# return them in an ORJSONResponse, which skips FastAPI's response_model
+# re-validation; response_model is kept for the OpenAPI schema only.
+router = APIRouter(prefix="/campaigns", tags=["campaigns"], default_response_class=ORJSONResponse)
 security = HTTPBearer()
 
 def get_current_did(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
@@ -36,13 +45,49 @@ def get_current_did(credentials: HTTPAuthorizationCredentials = Depends(security
     
     return did
 
+async def get_campaign_filters(
+    status: Optional[str] = Query(None),
+    campaign_objective: Optional[str] = Query(None),
+    target_audience: Optional[str] = Query(None),
+    budget_min: Optional[float] = Query(None, ge=0),
+    budget_max: Optional[float] = Query(None, ge=0),
+    start_from: Optional[str] = Query(None, description="start_at on or after"),
+    start_to: Optional[str] = Query(None, description="start_at before"),
+    end_from: Optional[str] = Query(None, description="end_at on or after"),
+    end_to: Optional[str] = Query(None, description="end_at before"),
+    created_from: Optional[str] = Query(None, description="created_at on or after"),
+    created_to: Optional[str] = Query(None, description="created_at before"),
+    include_archived: bool = Query(False, description="Also list archived campaigns")
+) -> CampaignFilters:
+    """
+    Dependency collecting the GET /campaigns filters from the query string
+
+    Date bounds take the formats of campaign start and end dates.
+    """
+    dates = {
+        "start_from": start_from, "start_to": start_to, "end_from": end_from, "end_to": end_to,
+        "created_from": created_from, "created_to": created_to
+    }
+    try:
+        dates = {name: parse_timestamp(value) for name, value in dates.items()}
+    except (ValueError, OverflowError, OSError):
+        # The status filter shadows fastapi.status here
+        raise HTTPException(
+            status_code=422,
+            detail="Date filters must be ISO 8601 dates or date-times, or Unix timestamps"
+        )
+    return CampaignFilters(
+        status=status, campaign_objective=campaign_objective, target_audience=target_audience,
+        budget_min=budget_min, budget_max=budget_max, include_archived=include_archived, **dates
+    )
+
 @router.get("/identifier", response_model=UserIdentifierResponse)
 async def get_user_identifier(did: str = Depends(get_current_did)):
     """
     Get or create the unique identifier for the authenticated user
     """
     try:
-        identifier = campaign_service.get_or_create_user_identifier(did)
+        identifier = await campaign_service.get_or_create_user_identifier(did)
         return UserIdentifierResponse(identifier=identifier, did=did)
     except Exception as e:
         raise HTTPException(
@@ -53,17 +98,15 @@ async def get_user_identifier(did: str = Depends(get_current_did)):
 @router.post("", response_model=CampaignResponse, status_code=status.HTTP_201_CREATED)
 async def create_campaign(
     request: CreateCampaignRequest,
+    reuse_jobs: bool = Query(True, description="Reuse an identical recent job (when enabled)"),
     did: str = Depends(get_current_did)
 ):
     """
     Create a new campaign and submit job to external API
     """
     try:
-        # Get or create user identifier (unique per DID)
-        identifier = campaign_service.get_or_create_user_identifier(did)
-        
-        # Store campaign in database
-        campaign = campaign_service.create_campaign(
+        # Store campaign in database (assigns the DID's unique identifier)
+        campaign = await campaign_service.create_campaign(
             did=did,
             campaign_name=request.campaign_name,
             campaign_description=request.campaign_description,
@@ -76,34 +119,21 @@ async def create_campaign(
             input_text=request.input_text
         )
         
-        # Prepare request for external API (only send identifier and input_text)
-        job_request = {
-            "identifier_from_purchaser": identifier,
-            "input_data": {
-                "text": request.input_text
-            }
-        }
+        if campaign["status"] == "scheduled":
+            # Future start date: the job is submitted when it is due
+            scheduled_dispatcher.add(campaign["campaign_id"], campaign["start_at"])
+            return ORJSONResponse(campaign, status_code=status.HTTP_201_CREATED)
         
-        # Submit job to external API
-        try:
-            response = requests.post(
-                settings.JOB_API_URL,
-                json=job_request,
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                # Update campaign status to processing
-                campaign_service.update_campaign_status(campaign.campaign_id, "processing")
-                campaign.status = "processing"
-            else:
-                print(f"Job API returned status {response.status_code}: {response.text}")
-                
-        except requests.RequestException as e:
-            print(f"Failed to submit job to external API: {str(e)}")
-            # Campaign remains in pending status
+        # Submit job to external API (only identifier and input_text are sent),
+        # or link an identical recent one
+        submitted = (await job_submitter.submit_campaigns([campaign], reuse=reuse_jobs))[0]
+        if submitted:
+            # Update campaign status to processing
+            await campaign_service.update_campaign_status(campaign["campaign_id"], "processing")
+            campaign["status"] = "processing"
+        # Otherwise the campaign remains in pending status
         
-        return campaign
+        return ORJSONResponse(campaign, status_code=status.HTTP_201_CREATED)
         
     except Exception as e:
         raise HTTPException(
@@ -111,23 +141,100 @@ async def create_campaign(
             detail=f"Failed to create campaign: {str(e)}"
         )
 
-@router.get("", response_model=CampaignListResponse)
-async def get_campaigns(did: str = Depends(get_current_did)):
+@router.post("/bulk", response_model=BulkCreateCampaignResponse, status_code=status.HTTP_201_CREATED)
+async def create_campaigns_bulk(
+    request: BulkCreateCampaignRequest,
+    reuse_jobs: bool = Query(True, description="Reuse identical recent jobs (when enabled)"),
+    did: str = Depends(get_current_did)
+):
     """
-    Get all campaigns for the authenticated user
+    Create many campaigns in one transaction and submit their jobs as a batch
     """
     try:
-        campaigns = campaign_service.get_campaigns_by_did(did)
-        return CampaignListResponse(
-            campaigns=campaigns,
-            total=len(campaigns)
+        campaigns = await campaign_service.create_campaigns_bulk(did, request.campaigns)
+        
+        # Campaigns with a future start date are dispatched when due
+        immediate = [campaign for campaign in campaigns if campaign["status"] != "scheduled"]
+        for campaign in campaigns:
+            if campaign["status"] == "scheduled":
+                scheduled_dispatcher.add(campaign["campaign_id"], campaign["start_at"])
+        
+        accepted = await job_submitter.submit_campaigns(immediate, reuse=reuse_jobs)
+        submitted = {
+            campaign["campaign_id"]
+            for campaign, ok in zip(immediate, accepted) if ok
+        }
+        await campaign_service.update_campaigns_status(list(submitted), "processing")
+        
+        results = []
+        for index, campaign in enumerate(campaigns):
+            ok = campaign["campaign_id"] in submitted
+            if ok:
+                campaign["status"] = "processing"
+            results.append({"index": index, "campaign": campaign, "job_submitted": ok})
+        
+        return ORJSONResponse({
+            "results": results,
+            "total": len(results),
+            "submitted": len(submitted),
+            "pending": len(immediate) - len(submitted),
+            "scheduled": len(campaigns) - len(immediate)
+        }, status_code=status.HTTP_201_CREATED)
+        
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to create campaigns: {str(e)}"
         )
+
+@router.get("", response_model=CampaignListResponse)
+async def get_campaigns(
+    filters: CampaignFilters = Depends(get_campaign_filters),
+    include_text: bool = Query(
+        False, description="Include input_text and campaign_description (null otherwise)"
+    ),
+    did: str = Depends(get_current_did)
+):
+    """
+    Get the authenticated user's campaigns, optionally filtered by status,
+    objective, audience, budget and start/end/creation date ranges, and
+    including archived campaigns. The large text fields are left out unless
+    include_text is set; GET /campaigns/{campaign_id} always has them.
+    """
+    try:
+        campaigns = await campaign_service.get_campaigns_by_did(did, filters, include_text)
+        return ORJSONResponse({
+            "campaigns": campaigns,
+            "total": len(campaigns)
+        })
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch campaigns: {str(e)}"
         )
 
+# Declared before /{campaign_id} so "events" is not taken for a campaign ID
+@router.get("/events", response_model=CampaignEventListResponse)
+async def get_campaign_events(
+    since: Optional[datetime] = Query(None, description="Start of the range (default: 7 days ago)"),
+    until: Optional[datetime] = Query(None, description="End of the range, exclusive (default: now)"),
+    limit: int = Query(1000, ge=1, le=10000),
+    did: str = Depends(get_current_did)
+):
+    """
+    Get the status changes of the authenticated user's campaigns in a time range
+    """
+    until = until or datetime.now(timezone.utc)
+    since = since or until - timedelta(days=7)
+    try:
+        events = await campaign_service.get_campaign_events_by_did(did, since, until, limit)
+        return ORJSONResponse({"events": events, "total": len(events)})
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch campaign events: {str(e)}"
+        )
+
 @router.get("/{campaign_id}", response_model=CampaignResponse)
 async def get_campaign(
     campaign_id: str,
@@ -136,7 +243,7 @@ async def get_campaign(
     """
     Get a specific campaign by ID
     """
-    campaign = campaign_service.get_campaign_by_id(campaign_id)
+    campaign = await campaign_service.get_campaign_by_id(campaign_id)
     
     if not campaign:
         raise HTTPException(
@@ -145,10 +252,39 @@ async def get_campaign(
         )
     
     # Verify the campaign belongs to the authenticated user
-    if campaign.did != did:
+    if campaign["did"] != did:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    return ORJSONResponse(campaign)
+
+@router.get("/{campaign_id}/timeline", response_model=CampaignTimelineResponse)
+async def get_campaign_timeline(
+    campaign_id: str,
+    did: str = Depends(get_current_did)
+):
+    """
+    Get a campaign's status history and the time it spent in each status
+    """
+    campaign = await campaign_service.get_campaign_by_id(campaign_id)
+    
+    if not campaign:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Campaign not found"
+        )
+    
+    if campaign["did"] != did:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Access denied"
         )
     
-    return campaign
+    timeline = await campaign_service.get_campaign_timeline(campaign_id)
+    return ORJSONResponse({
+        "campaign_id": campaign_id,
+        "status": campaign["status"],
+        **timeline
+    })
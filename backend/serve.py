@@ -0,0 +1,85 @@
+"""
+Production entry point
+
+Runs `main:create_app` under uvicorn with several worker processes, uvloop
+and httptools when installed, a configurable listen backlog and keep-alive,
+and a graceful drain on SIGTERM/SIGINT: workers stop accepting connections
+and give in-flight requests up to API_GRACEFUL_SHUTDOWN_TIMEOUT seconds
+before the lifespan shutdown closes pools and clients.
+
+Schema migrations run once here, before the workers start, instead of in
+every worker. Missing JWT signing keys stop the server here as well (with
+JWT_GENERATE_DEV_KEY, the key is generated here once).
+
+Usage:
+    python serve.py                      # settings from the environment / .env
+    python serve.py --workers 4 --port 8000
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+
+import uvicorn
+
+from auth.jwt_utils import load_signing_keys
+from config import settings
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+def run_migrations():
+    """Apply pending migrations for the configured backend"""
+    from repositories import create_repository
+
+    async def migrate():
+        repository = create_repository()
+        await repository.connect(run_migrations=True)
+        await repository.close()
+
+    asyncio.run(migrate())
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the API with production settings")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument(
+        "--workers", type=int, default=settings.API_WORKERS,
+        help="Worker processes (default: API_WORKERS, 0 = one per CPU core)"
+    )
+    parser.add_argument("--backlog", type=int, default=settings.API_BACKLOG)
+    parser.add_argument("--keep-alive", type=int, default=settings.API_KEEPALIVE_TIMEOUT)
+    parser.add_argument(
+        "--graceful-timeout", type=int, default=settings.API_GRACEFUL_SHUTDOWN_TIMEOUT,
+        help="Seconds in-flight requests get to finish on shutdown"
+    )
+    parser.add_argument("--access-log", action="store_true", help="Enable uvicorn access logs")
+    args = parser.parse_args()
+
+    workers = args.workers or os.cpu_count() or 1
+
+    load_signing_keys()
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        run_migrations()
+        # Workers inherit the environment; the schema is already current
+        os.environ["RUN_MIGRATIONS_ON_STARTUP"] = "false"
+
+    uvicorn.run(
+        "main:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="uvloop" if _installed("uvloop") else "asyncio",
+        http="httptools" if _installed("httptools") else "h11",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        # Request logging goes through MetricsMiddleware and the app loggers
+        access_log=args.access_log,
+        proxy_headers=True,
+        log_level=settings.LOG_LEVEL.lower(),
+    )
+
+if __name__ == "__main__":
+    main()
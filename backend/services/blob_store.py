@@ -0,0 +1,209 @@
+"""
+Content-addressed, compressed storage for large campaign text fields
+
+`input_text` and `campaign_description` are stored once per distinct value in
+the `campaign_blobs` table, keyed by the SHA-256 of the text. Campaign rows only
+carry the hash, which keeps the `campaigns` B-tree pages small for list scans.
+"""
+import hashlib
+import sqlite3
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 10
+
+# Large text fields of the campaigns table, mapped to their hash column
+BLOB_FIELDS = {
+    "input_text": "input_text_hash",
+    "campaign_description": "description_hash",
+}
+
+def content_hash(text: str) -> str:
+    """Return the content address (SHA-256 hex) of a text value"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def compress(text: str) -> tuple:
+    """
+    Compress text with the best available codec
+
+    Returns:
+        (codec, compressed bytes)
+    """
+    raw = text.encode("utf-8")
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return "zlib", zlib.compress(raw, ZLIB_LEVEL)
+
+def decompress(codec: str, data: bytes) -> str:
+    """Decompress a stored blob back to text"""
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob was stored with zstd but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown blob codec: {codec}")
+
+def put_texts(cursor: sqlite3.Cursor, texts: Iterable[str]) -> List[str]:
+    """
+    Store text values, skipping ones that already exist
+
+    Args:
+        cursor: Cursor inside the caller's transaction
+        texts: Text values to store
+
+    Returns:
+        Content hash for each text, in input order
+    """
+    texts = list(texts)
+    hashes = [content_hash(text) for text in texts]
+
+    pending = {}
+    for digest, text in zip(hashes, texts):
+        pending.setdefault(digest, text)
+
+    existing = _existing_hashes(cursor, list(pending))
+    rows = []
+    for digest, text in pending.items():
+        if digest in existing:
+            continue
+        codec, data = compress(text)
+        rows.append((digest, codec, len(text.encode("utf-8")), data))
+
+    if rows:
+        cursor.executemany("""
+            INSERT OR IGNORE INTO campaign_blobs (hash, codec, raw_size, data)
+            VALUES (?, ?, ?, ?)
+        """, rows)
+
+    return hashes
+
+def load_texts(cursor: sqlite3.Cursor, hashes: Iterable[Optional[str]]) -> Dict[str, str]:
+    """
+    Fetch and decompress text values by hash
+
+    Each distinct hash is read and decompressed once, however many rows
+    reference it.
+
+    Returns:
+        Mapping of hash -> text
+    """
+    wanted = list({digest for digest in hashes if digest})
+    texts: Dict[str, str] = {}
+
+    # Stay well below SQLite's host parameter limit
+    for start in range(0, len(wanted), 500):
+        batch = wanted[start:start + 500]
+        placeholders = ", ".join("?" for _ in batch)
+        cursor.execute(f"""
+            SELECT hash, codec, data
+            FROM campaign_blobs
+            WHERE hash IN ({placeholders})
+        """, batch)
+        for row in cursor.fetchall():
+            texts[row[0]] = decompress(row[1], row[2])
+
+    return texts
+
+def _existing_hashes(cursor: sqlite3.Cursor, hashes: List[str]) -> set:
+    """Return the subset of hashes already present in campaign_blobs"""
+    found = set()
+    for start in range(0, len(hashes), 500):
+        batch = hashes[start:start + 500]
+        placeholders = ", ".join("?" for _ in batch)
+        cursor.execute(
+            f"SELECT hash FROM campaign_blobs WHERE hash IN ({placeholders})",
+            batch
+        )
+        found.update(row[0] for row in cursor.fetchall())
+    return found
+
+def migrate_inline_texts(conn: sqlite3.Connection, batch_size: int = 1000) -> dict:
+    """
+    Move inline input_text/campaign_description values into campaign_blobs
+
+    Rows are migrated in batches, each in its own short transaction, so the
+    write lock is released between batches.
+
+    Args:
+        conn: Open database connection
+        batch_size: Rows per transaction
+
+    Returns:
+        Report with migrated row count and inline vs. blob byte totals
+    """
+    cursor = conn.cursor()
+    migrated = 0
+    inline_bytes = 0
+
+    while True:
+        cursor.execute("""
+            SELECT id, input_text, campaign_description
+            FROM campaigns
+            WHERE input_text_hash IS NULL
+            ORDER BY id
+            LIMIT ?
+        """, (batch_size,))
+        rows = cursor.fetchall()
+        if not rows:
+            break
+
+        input_hashes = put_texts(cursor, [row[1] for row in rows])
+        description_hashes = put_texts(cursor, [row[2] for row in rows])
+        cursor.executemany("""
+            UPDATE campaigns
+            SET input_text = '', campaign_description = '',
+                input_text_hash = ?, description_hash = ?
+            WHERE id = ?
+        """, [
+            (input_hash, description_hash, row[0])
+            for row, input_hash, description_hash in zip(rows, input_hashes, description_hashes)
+        ])
+        conn.commit()
+
+        migrated += len(rows)
+        inline_bytes += sum(
+            len(row[1].encode("utf-8")) + len(row[2].encode("utf-8")) for row in rows
+        )
+
+    return {"rows_migrated": migrated, "inline_bytes_moved": inline_bytes, **space_report(conn)}
+
+def space_report(conn: sqlite3.Connection) -> dict:
+    """
+    Summarize how much space blob storage saves
+
+    Returns:
+        Logical text bytes referenced by campaigns, bytes actually stored
+        in campaign_blobs, and the difference
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT COALESCE(SUM(b.raw_size), 0)
+        FROM campaigns c
+        JOIN campaign_blobs b ON b.hash = c.input_text_hash
+    """)
+    logical = cursor.fetchone()[0]
+    cursor.execute("""
+        SELECT COALESCE(SUM(b.raw_size), 0)
+        FROM campaigns c
+        JOIN campaign_blobs b ON b.hash = c.description_hash
+    """)
+    logical += cursor.fetchone()[0]
+
+    cursor.execute("SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM campaign_blobs")
+    blob_count, unique_bytes, stored_bytes = cursor.fetchone()
+
+    return {
+        "blobs": blob_count,
+        "logical_text_bytes": logical,
+        "unique_text_bytes": unique_bytes,
+        "stored_bytes": stored_bytes,
+        "saved_bytes": logical - stored_bytes,
+        "saved_ratio": round(1 - stored_bytes / logical, 4) if logical else 0.0,
+    }
@@ -1,21 +1,46 @@
 """
 Campaign service for database operations
 """
+import asyncio
 import secrets
-from typing import List, Optional
-from database import get_db
-from models import CampaignResponse
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import metrics
+from config import settings
+from models import CampaignFilters, CreateCampaignRequest, parse_timestamp
+from repositories import create_repository
+from repositories.base import CampaignRecord, CampaignRepository, EventRecord
+from services.single_flight import SingleFlight
+
+DB_QUERY_DURATION = metrics.histogram(
+    "campaign_db_query_duration_seconds",
+    "Time spent in the campaign repository per CampaignService method",
+    ("method",)
+)
+CAMPAIGNS_ARCHIVED = metrics.counter(
+    "campaigns_archived_total",
+    "Campaigns moved to campaigns_archive"
+)
 
 class CampaignService:
     """Service for managing campaigns in the database"""
     
+    def __init__(self, repository: CampaignRepository):
+        self.repository = repository
+        # Bumped by every write, and part of the coalescing keys: a read
+        # that starts after a write never shares a query started before it
+        self.data_version = 0
+        self._list_reads = SingleFlight("get_campaigns_by_did", settings.READ_COALESCING_ENABLED)
+        self._get_reads = SingleFlight("get_campaign_by_id", settings.READ_COALESCING_ENABLED)
+    
     @staticmethod
     def generate_campaign_id() -> str:
         """Generate a unique campaign ID"""
         return secrets.token_hex(16)
     
-    @staticmethod
-    def get_or_create_user_identifier(did: str) -> str:
+    @metrics.timed(DB_QUERY_DURATION, method="get_or_create_user_identifier")
+    async def get_or_create_user_identifier(self, did: str) -> str:
         """
         Get existing identifier for DID or create a new one
         Each DID gets one unique 24-character hex identifier
@@ -26,34 +51,11 @@ class CampaignService:
         Returns:
             24-character hex identifier
         """
-        with get_db() as conn:
-            cursor = conn.cursor()
-            
-            # Check if identifier exists for this DID
-            cursor.execute("""
-                SELECT identifier_from_purchaser
-                FROM user_identifiers
-                WHERE did = ?
-            """, (did,))
-            
-            row = cursor.fetchone()
-            
-            if row:
-                return row['identifier_from_purchaser']
-            
-            # Generate new identifier
-            identifier = secrets.token_hex(12)  # 12 bytes = 24 hex characters
-            
-            cursor.execute("""
-                INSERT INTO user_identifiers (did, identifier_from_purchaser)
-                VALUES (?, ?)
-            """, (did, identifier))
-            conn.commit()
-            
-            return identifier
+        # 12 bytes = 24 hex characters; only stored if the DID has none yet
+        return await self.repository.get_or_create_user_identifier(did, secrets.token_hex(12))
     
-    @staticmethod
-    def create_campaign(
+    async def create_campaign(
+        self,
         did: str,
         campaign_name: str,
         campaign_description: str,
@@ -64,7 +66,7 @@ class CampaignService:
         duration_days: Optional[int] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None
-    ) -> CampaignResponse:
+    ) -> CampaignRecord:
         """
         Create a new campaign in the database
         
@@ -83,102 +85,86 @@ class CampaignService:
         Returns:
             Created campaign data
         """
-        campaign_id = CampaignService.generate_campaign_id()
-        identifier = CampaignService.get_or_create_user_identifier(did)
-        
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO campaigns 
-                (campaign_id, did, identifier_from_purchaser, campaign_name, 
-                 campaign_description, campaign_objective, target_audience, 
-                 budget, duration_days, start_date, end_date, input_text, status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (campaign_id, did, identifier, campaign_name, campaign_description,
-                  campaign_objective, target_audience, budget, duration_days,
-                  start_date, end_date, input_text, 'pending'))
-            conn.commit()
-            
-            # Fetch the created campaign
-            cursor.execute("""
-                SELECT id, campaign_id, did, identifier_from_purchaser,
-                       campaign_name, campaign_description, campaign_objective,
-                       target_audience, budget, duration_days, start_date, end_date,
-                       input_text, status, created_at, updated_at
-                FROM campaigns
-                WHERE campaign_id = ?
-            """, (campaign_id,))
-            
-            row = cursor.fetchone()
-            
-        return CampaignResponse(
-            id=row['id'],
-            campaign_id=row['campaign_id'],
-            did=row['did'],
-            identifier_from_purchaser=row['identifier_from_purchaser'],
-            campaign_name=row['campaign_name'],
-            campaign_description=row['campaign_description'],
-            campaign_objective=row['campaign_objective'],
-            target_audience=row['target_audience'],
-            budget=row['budget'],
-            duration_days=row['duration_days'],
-            start_date=row['start_date'],
-            end_date=row['end_date'],
-            input_text=row['input_text'],
-            status=row['status'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
+        request = CreateCampaignRequest.model_construct(
+            campaign_name=campaign_name,
+            campaign_description=campaign_description,
+            campaign_objective=campaign_objective,
+            target_audience=target_audience,
+            budget=budget,
+            duration_days=duration_days,
+            start_date=start_date,
+            end_date=end_date,
+            input_text=input_text
         )
+        campaigns = await self.create_campaigns_bulk(did, [request])
+        return campaigns[0]
     
-    @staticmethod
-    def get_campaigns_by_did(did: str) -> List[CampaignResponse]:
+    @metrics.timed(DB_QUERY_DURATION, method="create_campaigns_bulk")
+    async def create_campaigns_bulk(
+        self,
+        did: str,
+        requests: List[CreateCampaignRequest]
+    ) -> List[CampaignRecord]:
         """
-        Get all campaigns for a specific DID
+        Create many campaigns for one DID in a single transaction
+        
+        The identifier is looked up once and all rows are inserted together,
+        so either every campaign is stored or none is.
         
         Args:
             did: User's DID
+            requests: Validated campaign requests
             
         Returns:
-            List of campaigns
-        """
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, campaign_id, did, identifier_from_purchaser,
-                       campaign_name, campaign_description, campaign_objective,
-                       target_audience, budget, duration_days, start_date, end_date,
-                       input_text, status, created_at, updated_at
-                FROM campaigns
-                WHERE did = ?
-                ORDER BY created_at DESC
-            """, (did,))
-            
-            rows = cursor.fetchall()
-        
-        return [
-            CampaignResponse(
-                id=row['id'],
-                campaign_id=row['campaign_id'],
-                did=row['did'],
-                identifier_from_purchaser=row['identifier_from_purchaser'],
-                campaign_name=row['campaign_name'],
-                campaign_description=row['campaign_description'],
-                campaign_objective=row['campaign_objective'],
-                target_audience=row['target_audience'],
-                budget=row['budget'],
-                duration_days=row['duration_days'],
-                start_date=row['start_date'],
-                end_date=row['end_date'],
-                input_text=row['input_text'],
-                status=row['status'],
-                created_at=row['created_at'],
-                updated_at=row['updated_at']
-            )
-            for row in rows
+            Created campaigns, in request order
+        """
+        identifier = await self.get_or_create_user_identifier(did)
+        campaign_ids = [self.generate_campaign_id() for _ in requests]
+        start_times = [parse_timestamp(req.start_date) for req in requests]
+        end_times = [parse_timestamp(req.end_date) for req in requests]
+        now = datetime.now(timezone.utc)
+        statuses = [
+            'scheduled' if settings.SCHEDULED_DISPATCH_ENABLED and start_at and start_at > now
+            else 'pending'
+            for start_at in start_times
         ]
+        campaigns = await self.repository.insert_campaigns(
+            did, identifier, campaign_ids, requests, start_times, end_times, statuses
+        )
+        self.data_version += 1
+        return campaigns
     
-    @staticmethod
-    def get_campaign_by_id(campaign_id: str) -> Optional[CampaignResponse]:
+    @metrics.timed(DB_QUERY_DURATION, method="get_campaigns_by_did")
+    async def get_campaigns_by_did(
+        self,
+        did: str,
+        filters: Optional[CampaignFilters] = None,
+        include_text: bool = False
+    ) -> List[CampaignRecord]:
+        """
+        Get the campaigns of a specific DID
+        
+        Args:
+            did: User's DID
+            filters: Optional attribute and date range filters
+            include_text: Also read input_text and campaign_description
+                (None otherwise)
+            
+        Returns:
+            List of campaigns, newest first (shared with concurrent identical
+            reads; do not modify)
+        """
+        if filters is not None:
+            filters = filters.model_copy(update={
+                name: _as_utc(value) for name, value in filters if isinstance(value, datetime)
+            })
+        key = (self.data_version, did, tuple(filters) if filters is not None else None, include_text)
+        return await self._list_reads.do(
+            key, lambda: self.repository.list_campaigns_by_did(did, filters, include_text)
+        )
+    
+    @metrics.timed(DB_QUERY_DURATION, method="get_campaign_by_id")
+    async def get_campaign_by_id(self, campaign_id: str) -> Optional[CampaignRecord]:
         """
         Get a specific campaign by its ID
         
@@ -186,45 +172,15 @@ class CampaignService:
             campaign_id: Campaign identifier
             
         Returns:
-            Campaign data or None if not found
-        """
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT id, campaign_id, did, identifier_from_purchaser,
-                       campaign_name, campaign_description, campaign_objective,
-                       target_audience, budget, duration_days, start_date, end_date,
-                       input_text, status, created_at, updated_at
-                FROM campaigns
-                WHERE campaign_id = ?
-            """, (campaign_id,))
-            
-            row = cursor.fetchone()
-        
-        if not row:
-            return None
-        
-        return CampaignResponse(
-            id=row['id'],
-            campaign_id=row['campaign_id'],
-            did=row['did'],
-            identifier_from_purchaser=row['identifier_from_purchaser'],
-            campaign_name=row['campaign_name'],
-            campaign_description=row['campaign_description'],
-            campaign_objective=row['campaign_objective'],
-            target_audience=row['target_audience'],
-            budget=row['budget'],
-            duration_days=row['duration_days'],
-            start_date=row['start_date'],
-            end_date=row['end_date'],
-            input_text=row['input_text'],
-            status=row['status'],
-            created_at=row['created_at'],
-            updated_at=row['updated_at']
+            Campaign data or None if not found (shared with concurrent
+            identical reads; do not modify)
+        """
+        return await self._get_reads.do(
+            (self.data_version, campaign_id), lambda: self.repository.get_campaign(campaign_id)
         )
     
-    @staticmethod
-    def update_campaign_status(campaign_id: str, status: str) -> bool:
+    @metrics.timed(DB_QUERY_DURATION, method="update_campaign_status")
+    async def update_campaign_status(self, campaign_id: str, status: str) -> bool:
         """
         Update campaign status
         
@@ -235,16 +191,158 @@ class CampaignService:
         Returns:
             True if updated, False if not found
         """
-        with get_db() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                UPDATE campaigns
-                SET status = ?, updated_at = CURRENT_TIMESTAMP
-                WHERE campaign_id = ?
-            """, (status, campaign_id))
-            conn.commit()
+        updated = await self.repository.update_status([campaign_id], status)
+        self.data_version += 1
+        return updated > 0
+    
+    @metrics.timed(DB_QUERY_DURATION, method="update_campaigns_status")
+    async def update_campaigns_status(self, campaign_ids: List[str], status: str) -> int:
+        """
+        Update the status of several campaigns in one transaction
+        
+        Args:
+            campaign_ids: Campaign identifiers
+            status: New status
+            
+        Returns:
+            Number of campaigns updated
+        """
+        updated = await self.repository.update_status(campaign_ids, status)
+        self.data_version += 1
+        return updated
+
+    @metrics.timed(DB_QUERY_DURATION, method="get_campaign_timeline")
+    async def get_campaign_timeline(self, campaign_id: str) -> Dict[str, List[EventRecord]]:
+        """
+        Get a campaign's status history and time spent per status
+        
+        Args:
+            campaign_id: Campaign identifier
+            
+        Returns:
+            Events in order and per-status totals (see CampaignRepository)
+        """
+        return await self.repository.get_campaign_timeline(campaign_id)
+    
+    @metrics.timed(DB_QUERY_DURATION, method="get_campaign_events_by_did")
+    async def get_campaign_events_by_did(
+        self,
+        did: str,
+        since: datetime,
+        until: datetime,
+        limit: int
+    ) -> List[EventRecord]:
+        """
+        Get the status events of a DID's campaigns in a time range
+        
+        Args:
+            did: User's DID
+            since: Start of the range (inclusive); naive values are UTC
+            until: End of the range (exclusive); naive values are UTC
+            limit: Maximum number of events
+            
+        Returns:
+            Events, oldest first
+        """
+        return await self.repository.list_events_by_did(did, _as_utc(since), _as_utc(until), limit)
+
+    @metrics.timed(DB_QUERY_DURATION, method="list_scheduled_campaigns")
+    async def list_scheduled_campaigns(self, due_before: datetime, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get scheduled campaigns due before a time, soonest first
+        
+        Args:
+            due_before: End of the window; naive values are UTC
+            limit: Maximum number of campaigns
+            
+        Returns:
+            campaign_id and start_at of each campaign
+        """
+        return await self.repository.list_scheduled_campaigns(_as_utc(due_before), limit)
+    
+    @metrics.timed(DB_QUERY_DURATION, method="claim_scheduled_campaigns")
+    async def claim_scheduled_campaigns(self, campaign_ids: List[str]) -> List[CampaignRecord]:
+        """
+        Move due scheduled campaigns to pending so their jobs can be submitted
+        
+        Args:
+            campaign_ids: Campaign identifiers
+            
+        Returns:
+            Campaigns claimed by this call (others were claimed elsewhere)
+        """
+        claimed = await self.repository.claim_scheduled_campaigns(campaign_ids)
+        self.data_version += 1
+        return claimed
+    
+    @metrics.timed(DB_QUERY_DURATION, method="expire_pending_campaigns")
+    async def expire_pending_campaigns(self, max_age: timedelta, batch_size: int = 500) -> int:
+        """
+        Mark campaigns that have been pending for longer than max_age as expired
+        
+        Works in batches of batch_size campaigns, one transaction each.
+        
+        Args:
+            max_age: Age after which a pending campaign expires
+            batch_size: Campaigns per transaction
+            
+        Returns:
+            Number of campaigns expired
+        """
+        created_before = datetime.now(timezone.utc) - max_age
+        total = 0
+        while True:
+            expired = await self.repository.expire_pending_campaigns(created_before, batch_size)
+            self.data_version += 1
+            total += expired
+            if expired < batch_size:
+                return total
+
+    @metrics.timed(DB_QUERY_DURATION, method="archive_campaigns")
+    async def archive_campaigns(
+        self,
+        max_age: timedelta,
+        statuses: List[str],
+        batch_size: int = 200,
+        pause: float = 0.1,
+        max_batches: Optional[int] = None
+    ) -> int:
+        """
+        Move campaigns in a final status that have not changed for max_age
+        to the archive
+        
+        Each batch is one transaction. Between batches the archiver sleeps
+        at least as long as the batch took (and at least pause seconds), so
+        it holds the write lock at most half of the time.
+        
+        Args:
+            max_age: Time since the last status change after which a campaign is cold
+            statuses: Final statuses that may be archived
+            batch_size: Campaigns per transaction
+            pause: Minimum seconds between batches
+            max_batches: Stop after this many batches (None: until done)
             
-            return cursor.rowcount > 0
+        Returns:
+            Number of campaigns archived
+        """
+        updated_before = datetime.now(timezone.utc) - max_age
+        total = 0
+        batches = 0
+        while True:
+            started = time.perf_counter()
+            archived = await self.repository.archive_campaigns(updated_before, statuses, batch_size)
+            self.data_version += 1
+            CAMPAIGNS_ARCHIVED.inc(archived)
+            total += archived
+            batches += 1
+            if archived < batch_size or (max_batches is not None and batches >= max_batches):
+                return total
+            await asyncio.sleep(max(pause, time.perf_counter() - started))
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
 
 # Global service instance
-campaign_service = CampaignService()
+campaign_service = CampaignService(create_repository())
@@ -0,0 +1,173 @@
+"""
+Dispatch of scheduled campaigns when their start time comes
+
+Each worker keeps a heap of the scheduled campaigns due within the next
+SCHEDULED_DISPATCH_HORIZON_SECONDS, loaded from the partial index on
+(start_at) WHERE status = 'scheduled', and sleeps until the earliest one is
+due. Campaigns created by this worker are pushed straight onto the heap;
+others are picked up when the window is reloaded, every half horizon. Since
+the queue is rebuilt from the database, nothing is lost on restart.
+
+A due campaign is claimed in the database (scheduled -> pending) before its
+job is submitted, so when several workers hold the same campaign only one
+dispatches it. Campaigns due at about the same time are dispatched in
+batches with a pause in between, which spreads a burst (many campaigns
+starting at midnight) over time instead of sending it at once.
+"""
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import List, Optional, Set, Tuple
+
+import metrics
+from config import settings
+from services.campaign_service import CampaignService, campaign_service
+from services.job_submitter import JobSubmitter, job_submitter
+
+QUEUED = metrics.gauge(
+    "scheduled_dispatch_queued",
+    "Scheduled campaigns in this worker's timer queue"
+)
+DISPATCHED = metrics.counter(
+    "scheduled_dispatch_total",
+    "Scheduled campaigns dispatched, by job submission outcome",
+    ("outcome",)
+)
+DISPATCH_DELAY = metrics.histogram(
+    "scheduled_dispatch_delay_seconds",
+    "Time from a campaign's start_at until its job was submitted",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+
+logger = logging.getLogger(__name__)
+
+def _timestamp(start_at: str) -> float:
+    """Unix time of a start_at value ("YYYY-MM-DD HH:MM:SS", UTC)"""
+    return datetime.strptime(start_at, "%Y-%m-%d %H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
+class ScheduledDispatcher:
+    """Timer queue of scheduled campaigns, run as a background task"""
+
+    def __init__(
+        self,
+        service: CampaignService,
+        submitter: JobSubmitter,
+        horizon: float = 300,
+        max_queued: int = 10000,
+        batch_size: int = 50,
+        batch_interval: float = 1.0,
+        coalesce: float = 1.0
+    ):
+        self.service = service
+        self.submitter = submitter
+        self.horizon = horizon
+        self.max_queued = max_queued
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.coalesce = coalesce
+        # (due time, campaign_id)
+        self._heap: List[Tuple[float, str]] = []
+        self._queued: Set[str] = set()
+        self._next_reload = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start dispatching on the running event loop"""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="scheduled-dispatch")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def add(self, campaign_id: str, start_at: str):
+        """Queue a campaign created by this worker, if it is due within the horizon"""
+        due = _timestamp(start_at)
+        if due >= time.time() + self.horizon or campaign_id in self._queued:
+            return
+        self._push(due, campaign_id)
+        if self._heap[0][1] == campaign_id and self._wakeup is not None:
+            self._wakeup.set()  # new earliest deadline
+
+    def _push(self, due: float, campaign_id: str):
+        heapq.heappush(self._heap, (due, campaign_id))
+        self._queued.add(campaign_id)
+        QUEUED.set(len(self._heap))
+
+    async def reload(self):
+        """Queue the scheduled campaigns due within the horizon"""
+        now = time.time()
+        window_end = datetime.fromtimestamp(now + self.horizon, timezone.utc)
+        due = await self.service.list_scheduled_campaigns(window_end, self.max_queued)
+        for campaign in due:
+            if campaign["campaign_id"] not in self._queued:
+                self._push(_timestamp(campaign["start_at"]), campaign["campaign_id"])
+        self._next_reload = now + self.horizon / 2
+        if len(due) == self.max_queued:
+            # Window cut short; come back once the loaded part is due
+            self._next_reload = min(self._next_reload, _timestamp(due[-1]["start_at"]))
+
+    async def _run(self):
+        while True:
+            try:
+                if time.time() >= self._next_reload:
+                    await self.reload()
+                if self._heap and self._heap[0][0] <= time.time():
+                    await self._dispatch_due()
+                    continue
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Unclaimed campaigns stay scheduled and come back on reload
+                logger.exception("Scheduled dispatch failed")
+                self._next_reload = time.time() + self.batch_interval
+
+            deadline = min(self._heap[0][0] if self._heap else float("inf"), self._next_reload)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(0.0, deadline - time.time()))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _dispatch_due(self):
+        """Claim and submit one batch of due campaigns"""
+        cutoff = time.time() + self.coalesce
+        batch = []
+        while self._heap and self._heap[0][0] <= cutoff and len(batch) < self.batch_size:
+            _, campaign_id = heapq.heappop(self._heap)
+            self._queued.discard(campaign_id)
+            batch.append(campaign_id)
+        QUEUED.set(len(self._heap))
+
+        campaigns = await self.service.claim_scheduled_campaigns(batch)
+        if campaigns:
+            accepted = await self.submitter.submit_campaigns(campaigns)
+            submitted = [campaign["campaign_id"] for campaign, ok in zip(campaigns, accepted) if ok]
+            # Rejected jobs stay pending, as for campaigns created without a start date
+            await self.service.update_campaigns_status(submitted, "processing")
+
+            now = time.time()
+            for campaign, ok in zip(campaigns, accepted):
+                DISPATCHED.inc(outcome="submitted" if ok else "failed")
+                DISPATCH_DELAY.observe(max(0.0, now - _timestamp(campaign["start_at"])))
+            logger.info("Dispatched %d scheduled campaigns (%d submitted)", len(campaigns), len(submitted))
+
+        if self._heap and self._heap[0][0] <= time.time() + self.coalesce:
+            # More are due: pace the batches
+            await asyncio.sleep(self.batch_interval)
+
+# Global dispatcher instance (started by the app lifespan)
+scheduled_dispatcher = ScheduledDispatcher(
+    campaign_service,
+    job_submitter,
+    horizon=settings.SCHEDULED_DISPATCH_HORIZON_SECONDS,
+    max_queued=settings.SCHEDULED_DISPATCH_MAX_QUEUED,
+    batch_size=settings.SCHEDULED_DISPATCH_BATCH_SIZE,
+    batch_interval=settings.SCHEDULED_DISPATCH_BATCH_INTERVAL,
+    coalesce=settings.SCHEDULED_DISPATCH_COALESCE_SECONDS
+)
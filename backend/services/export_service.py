@@ -0,0 +1,238 @@
+"""
+Columnar export of campaign data for analytics
+"""
+import json
+import sqlite3
+import struct
+import zlib
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from database import DATABASE_PATH
+from services import blob_store
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+# Tables that may be exported, with the column used for incremental slices
+EXPORT_TABLES: Dict[str, str] = {
+    "campaigns": "updated_at",
+    # Archived rows do not change again; slice them by when they arrived
+    "campaigns_archive": "archived_at",
+    "user_identifiers": "created_at",
+}
+
+# Magic bytes for the fallback column-chunked format
+RCOL_MAGIC = b"RCOL1\n"
+
+_LENGTH = struct.Struct("<I")
+
+def _column_type(declared: str) -> str:
+    """Map a SQLite declared type to an export column type."""
+    declared = (declared or "").upper()
+    if "INT" in declared:
+        return "int64"
+    if "REAL" in declared or "FLOA" in declared or "DOUB" in declared:
+        return "float64"
+    return "string"
+
+def _table_columns(conn: sqlite3.Connection, table: str) -> List[Tuple[str, str]]:
+    """Return (name, export type) pairs for every column of a table."""
+    rows = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    return [(row[1], _column_type(row[2])) for row in rows]
+
+class _ArrowWriter:
+    """Write record batches to a Parquet or Arrow IPC file."""
+
+    _TYPES = {"int64": "int64", "float64": "float64", "string": "string"}
+
+    def __init__(self, path: str, columns: List[Tuple[str, str]], fmt: str):
+        self.schema = pa.schema([
+            (name, getattr(pa, self._TYPES[kind])()) for name, kind in columns
+        ])
+        if fmt == "parquet":
+            self._writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+        else:
+            self._sink = pa.OSFile(path, "wb")
+            self._writer = pa_ipc.new_file(self._sink, self.schema)
+        self._fmt = fmt
+
+    def write_chunk(self, columns: Dict[str, list]):
+        batch = pa.RecordBatch.from_pydict(columns, schema=self.schema)
+        if self._fmt == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+
+    def close(self):
+        self._writer.close()
+        if self._fmt == "arrow":
+            self._sink.close()
+
+class _ChunkedColumnWriter:
+    """
+    Write the dependency-free column-chunked format.
+
+    Layout:
+        RCOL_MAGIC
+        u32 header length + JSON header {"table", "columns": [[name, type], ...]}
+        per chunk: u32 row count, then per column u32 length + zlib(JSON array)
+        u32 0 as end marker
+    """
+
+    def __init__(self, path: str, table: str, columns: List[Tuple[str, str]]):
+        self._file = open(path, "wb")
+        header = json.dumps({"table": table, "columns": columns}).encode("utf-8")
+        self._file.write(RCOL_MAGIC)
+        self._file.write(_LENGTH.pack(len(header)))
+        self._file.write(header)
+
+    def write_chunk(self, columns: Dict[str, list]):
+        row_count = len(next(iter(columns.values()))) if columns else 0
+        self._file.write(_LENGTH.pack(row_count))
+        for values in columns.values():
+            data = zlib.compress(json.dumps(values, separators=(",", ":")).encode("utf-8"))
+            self._file.write(_LENGTH.pack(len(data)))
+            self._file.write(data)
+
+    def close(self):
+        self._file.write(_LENGTH.pack(0))
+        self._file.close()
+
+def read_chunked_columns(path: str) -> Iterator[Dict[str, list]]:
+    """
+    Read a file written in the column-chunked format.
+
+    Args:
+        path: Path to an .rcol export
+
+    Yields:
+        One dict of column name -> values per chunk
+    """
+    with open(path, "rb") as f:
+        if f.read(len(RCOL_MAGIC)) != RCOL_MAGIC:
+            raise ValueError(f"Not a column-chunked export: {path}")
+        (header_len,) = _LENGTH.unpack(f.read(_LENGTH.size))
+        header = json.loads(f.read(header_len))
+        names = [name for name, _ in header["columns"]]
+
+        while True:
+            (row_count,) = _LENGTH.unpack(f.read(_LENGTH.size))
+            if row_count == 0:
+                return
+            chunk = {}
+            for name in names:
+                (length,) = _LENGTH.unpack(f.read(_LENGTH.size))
+                chunk[name] = json.loads(zlib.decompress(f.read(length)))
+            yield chunk
+
+def resolve_format(fmt: str) -> str:
+    """Pick the output format, falling back when pyarrow is unavailable."""
+    if fmt == "auto":
+        return "parquet" if pa is not None else "rcol"
+    if fmt in ("parquet", "arrow") and pa is None:
+        raise RuntimeError(f"Format '{fmt}' requires pyarrow; install it or use --format rcol")
+    if fmt not in ("parquet", "arrow", "rcol"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    return fmt
+
+def _resolve_blob_texts(conn: sqlite3.Connection, chunk: Dict[str, list]):
+    """Replace blob-backed text columns in a campaigns chunk with their values"""
+    for field, hash_column in blob_store.BLOB_FIELDS.items():
+        hashes = chunk.get(hash_column)
+        if not hashes or field not in chunk:
+            continue
+        texts = blob_store.load_texts(conn.cursor(), hashes)
+        chunk[field] = [
+            texts.get(digest, inline) for digest, inline in zip(hashes, chunk[field])
+        ]
+
+def export_table(
+    table: str,
+    output_path: str,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    chunk_size: int = 10000,
+    fmt: str = "auto",
+    database_path: str = DATABASE_PATH
+) -> dict:
+    """
+    Export a table into a columnar file in bounded-size chunks.
+
+    The export reads through a single read-only statement, so every chunk
+    comes from the same snapshot. With the database in WAL mode this does
+    not block the API's writer.
+
+    Args:
+        table: Table name (see EXPORT_TABLES)
+        output_path: Destination file
+        since: Only rows whose slice column is >= this timestamp
+        until: Only rows whose slice column is < this timestamp
+        chunk_size: Maximum number of rows held in memory at once
+        fmt: "parquet", "arrow", "rcol" or "auto"
+        database_path: SQLite file to read from
+
+    Returns:
+        Export summary with row and chunk counts
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Table '{table}' cannot be exported")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be positive")
+    fmt = resolve_format(fmt)
+    slice_column = EXPORT_TABLES[table]
+
+    conn = sqlite3.connect(f"file:{database_path}?mode=ro", uri=True)
+    try:
+        columns = _table_columns(conn, table)
+        names = [name for name, _ in columns]
+
+        conditions = []
+        params: list = []
+        if since:
+            conditions.append(f"{slice_column} >= ?")
+            params.append(since)
+        if until:
+            conditions.append(f"{slice_column} < ?")
+            params.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        if fmt == "rcol":
+            writer = _ChunkedColumnWriter(output_path, table, columns)
+        else:
+            writer = _ArrowWriter(output_path, columns, fmt)
+
+        rows_written = 0
+        chunks = 0
+        try:
+            cursor = conn.execute(
+                f"SELECT {', '.join(names)} FROM {table} {where} ORDER BY id",
+                params
+            )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = {name: list(values) for name, values in zip(names, zip(*rows))}
+                if table in ("campaigns", "campaigns_archive"):
+                    _resolve_blob_texts(conn, chunk)
+                writer.write_chunk(chunk)
+                rows_written += len(rows)
+                chunks += 1
+        finally:
+            writer.close()
+    finally:
+        conn.close()
+
+    return {
+        "table": table,
+        "format": fmt,
+        "path": output_path,
+        "rows": rows_written,
+        "chunks": chunks,
+        "since": since,
+        "until": until,
+    }
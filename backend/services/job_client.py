@@ -0,0 +1,113 @@
+"""
+Client for the external job processing API
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+from config import settings
+
+JOB_API_DURATION = metrics.histogram(
+    "job_api_request_duration_seconds",
+    "Latency of job submissions to JOB_API_URL",
+    ("outcome",)
+)
+JOB_API_ERRORS = metrics.counter(
+    "job_api_errors_total",
+    "Failed job submissions by reason",
+    ("reason",)
+)
+
+logger = logging.getLogger(__name__)
+
+class JobClient:
+    """Submits campaign jobs to JOB_API_URL over a pooled HTTP session"""
+
+    def __init__(self, url: str, timeout: float = 10, max_concurrency: int = 8):
+        self.url = url
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_concurrency)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    @staticmethod
+    def build_job_request(identifier: str, input_text: str) -> dict:
+        """Build the job payload (only identifier and input_text are sent)"""
+        return {
+            "identifier_from_purchaser": identifier,
+            "input_data": {
+                "text": input_text
+            }
+        }
+
+    def submit(self, identifier: str, input_text: str) -> bool:
+        """
+        Submit a single job
+
+        Args:
+            identifier: User's identifier_from_purchaser
+            input_text: Text to process
+
+        Returns:
+            True if the job API accepted the job, False otherwise
+        """
+        started = time.perf_counter()
+        try:
+            response = self._session.post(
+                self.url,
+                json=self.build_job_request(identifier, input_text),
+                timeout=self.timeout
+            )
+
+            if response.status_code == 200:
+                JOB_API_DURATION.observe(time.perf_counter() - started, outcome="accepted")
+                return True
+
+            JOB_API_DURATION.observe(time.perf_counter() - started, outcome="rejected")
+            JOB_API_ERRORS.inc(reason=f"status_{response.status_code}")
+            logger.warning("Job API returned status %s", response.status_code,
+                           extra={"body": response.text[:200]})
+            return False
+
+        except requests.RequestException as e:
+            JOB_API_DURATION.observe(time.perf_counter() - started, outcome="error")
+            JOB_API_ERRORS.inc(reason=type(e).__name__)
+            logger.warning("Failed to submit job to external API: %s", e)
+            return False
+
+    def submit_batch(self, jobs: List[Tuple[str, str]]) -> List[bool]:
+        """
+        Submit several jobs concurrently over the shared connection pool
+
+        Args:
+            jobs: List of (identifier, input_text) pairs
+
+        Returns:
+            One acceptance flag per job, in input order
+        """
+        if not jobs:
+            return []
+        if len(jobs) == 1:
+            return [self.submit(*jobs[0])]
+
+        workers = min(self.max_concurrency, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(lambda job: self.submit(*job), jobs))
+
+    def close(self):
+        """Close pooled connections (the session reconnects if used again)"""
+        self._session.close()
+
+# Global job client instance
+job_client = JobClient(
+    settings.JOB_API_URL,
+    timeout=settings.JOB_API_TIMEOUT,
+    max_concurrency=settings.JOB_API_MAX_CONCURRENCY
+)
@@ -0,0 +1,153 @@
+"""
+Job submission with deduplication of identical jobs
+
+Campaigns often repeat a job: the same input_text for the same
+identifier_from_purchaser (a resubmitted prompt). With JOB_DEDUP_ENABLED,
+such a campaign is linked to the earlier job instead of submitting another
+one: its job_campaign_id names the campaign that submitted the job.
+
+A job counts as reusable for JOB_DEDUP_TTL_SECONDS after it was accepted.
+Accepted jobs are recorded in job_submissions by a hash of (identifier,
+input_text), shared by all workers. A job that this worker is still
+submitting is waited for; if it is rejected, the campaigns waiting on it
+stay pending as well. Identical jobs submitted through different workers
+at the same moment may both go out.
+
+A request can bypass the reuse (?reuse_jobs=false); its jobs are
+submitted and become the ones later duplicates reuse.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, List
+
+import metrics
+from config import settings
+from repositories.base import CampaignRecord, CampaignRepository
+from services.campaign_service import campaign_service
+from services.job_client import JobClient, job_client
+
+JOB_SUBMISSIONS = metrics.counter(
+    "job_submissions_total",
+    "Campaign jobs by outcome: submitted, reused (linked to an identical earlier job) or failed",
+    ("outcome",)
+)
+
+logger = logging.getLogger(__name__)
+
+def dedup_key(identifier: str, input_text: str) -> str:
+    """Hash of the fields sent to the job API"""
+    return hashlib.sha256(f"{identifier}\0{input_text}".encode()).hexdigest()
+
+class JobSubmitter:
+    """Submits campaign jobs through a JobClient, reusing identical recent jobs"""
+
+    def __init__(self, client: JobClient, repository: CampaignRepository, ttl: float, enabled: bool = True):
+        self.client = client
+        self.repository = repository
+        self.ttl = ttl
+        self.enabled = enabled
+        # Jobs this worker is submitting: dedup key -> future of the
+        # submitting campaign_id (None if the job was rejected)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    async def submit_campaigns(self, campaigns: List[CampaignRecord], reuse: bool = True) -> List[bool]:
+        """
+        Submit the jobs of campaigns
+
+        A campaign linked to an earlier job gets job_campaign_id set, in
+        the database and in its record.
+
+        Args:
+            campaigns: Campaign records (identifier_from_purchaser, input_text)
+            reuse: Link campaigns to identical recent jobs (False submits all)
+
+        Returns:
+            Per campaign, True if its job was submitted or reused
+        """
+        if not self.enabled:
+            return await self._submit(campaigns)
+
+        keys = [dedup_key(campaign["identifier_from_purchaser"], campaign["input_text"])
+                for campaign in campaigns]
+        recent = await self.repository.find_job_submissions(keys, time.time() - self.ttl) if reuse else {}
+
+        # The first campaign of each new job submits it. Campaigns whose job
+        # is being submitted (by this call or another request) wait for it.
+        leaders: List[int] = []
+        followers: Dict[int, asyncio.Future] = {}
+        owned: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        for index, key in enumerate(keys):
+            if reuse:
+                if key in recent:
+                    continue
+                if key in self._in_flight:
+                    followers[index] = self._in_flight[key]
+                    continue
+            leaders.append(index)
+            if key not in self._in_flight:
+                self._in_flight[key] = owned[key] = loop.create_future()
+
+        submitted: Dict[str, str] = {}
+        try:
+            accepted = await self._submit([campaigns[index] for index in leaders])
+            for index, ok in zip(leaders, accepted):
+                if ok:
+                    submitted[keys[index]] = campaigns[index]["campaign_id"]
+            try:
+                await self.repository.record_job_submissions(submitted)
+            except Exception:
+                # The jobs went out; they just cannot be reused
+                logger.exception("Failed to record job submissions")
+        finally:
+            for key, future in owned.items():
+                del self._in_flight[key]
+                future.set_result(submitted.get(key))
+
+        results = [False] * len(campaigns)
+        for index, ok in zip(leaders, accepted):
+            results[index] = ok
+        links: Dict[str, str] = {}
+        for index, key in enumerate(keys):
+            if index in followers:
+                # Shielded: a cancelled request must not cancel the others' wait
+                job_campaign_id = await asyncio.shield(followers[index])
+            else:
+                job_campaign_id = recent.get(key)
+            if job_campaign_id is None:
+                if index in followers:
+                    JOB_SUBMISSIONS.inc(outcome="failed")
+                continue
+            links[campaigns[index]["campaign_id"]] = job_campaign_id
+            campaigns[index]["job_campaign_id"] = job_campaign_id
+            results[index] = True
+            JOB_SUBMISSIONS.inc(outcome="reused")
+        await self.repository.link_campaign_jobs(links)
+        if links:
+            logger.info("Reused %d identical jobs", len(links))
+        return results
+
+    async def _submit(self, campaigns: List[CampaignRecord]) -> List[bool]:
+        if not campaigns:
+            return []
+        accepted = await asyncio.to_thread(self.client.submit_batch, [
+            (campaign["identifier_from_purchaser"], campaign["input_text"])
+            for campaign in campaigns
+        ])
+        for ok in accepted:
+            JOB_SUBMISSIONS.inc(outcome="submitted" if ok else "failed")
+        return accepted
+
+    async def prune(self) -> int:
+        """Delete job submissions too old to be reused"""
+        return await self.repository.prune_job_submissions(time.time() - self.ttl)
+
+# Global submitter instance
+job_submitter = JobSubmitter(
+    job_client,
+    campaign_service.repository,
+    ttl=settings.JOB_DEDUP_TTL_SECONDS,
+    enabled=settings.JOB_DEDUP_ENABLED
+)
@@ -0,0 +1,80 @@
+"""
+Housekeeping tasks run by the maintenance scheduler
+
+Expired challenges and idle rate-limit buckets are swept here instead of on
+the request path. For SQLite, the scheduler also checkpoints the WAL (so it
+does not grow without bound under steady writes), re-analyzes tables that
+grew since their statistics were taken (e.g. after bulk loads) and runs
+PRAGMA optimize. Campaigns whose job was never submitted expire after
+PENDING_CAMPAIGN_TTL_HOURS, and campaigns in a final status move to the
+archive after ARCHIVE_AFTER_DAYS. Job submissions older than
+JOB_DEDUP_TTL_SECONDS are deleted. Each worker syncs the access tokens revoked by
+the others into its denylist, and expired auth tokens are deleted.
+"""
+import asyncio
+import functools
+from datetime import timedelta
+
+from auth.challenge_store import challenge_store
+from config import settings
+from services.campaign_service import campaign_service
+from services.job_submitter import job_submitter
+from services.rate_limiter import rate_limiter
+from services.scheduler import PeriodicTask, Scheduler
+from services.token_service import token_service
+
+async def prune_rate_limit_buckets() -> int:
+    return await asyncio.to_thread(rate_limiter.store.prune)
+
+async def expire_pending_campaigns() -> int:
+    return await campaign_service.expire_pending_campaigns(
+        timedelta(hours=settings.PENDING_CAMPAIGN_TTL_HOURS)
+    )
+
+async def archive_campaigns() -> int:
+    return await campaign_service.archive_campaigns(
+        timedelta(days=settings.ARCHIVE_AFTER_DAYS),
+        settings.ARCHIVE_STATUSES,
+        batch_size=settings.ARCHIVE_BATCH_SIZE,
+        pause=settings.ARCHIVE_BATCH_PAUSE,
+        max_batches=settings.ARCHIVE_MAX_BATCHES
+    )
+
+def create_scheduler() -> Scheduler:
+    """Maintenance tasks and intervals, from settings"""
+    repository = campaign_service.repository
+    scheduler = Scheduler(repository)
+
+    def add(name: str, interval: float, run, shared: bool = True):
+        scheduler.add(PeriodicTask(name, interval, run, shared, settings.MAINTENANCE_JITTER))
+
+    add("challenge_sweep", settings.MAINTENANCE_CHALLENGE_SWEEP_INTERVAL,
+        challenge_store.remove_expired)
+    if settings.RATE_LIMIT_ENABLED:
+        # The bucket file is per host, so a PostgreSQL lease (cluster-wide)
+        # would leave the other hosts unpruned
+        add("rate_limit_prune", settings.MAINTENANCE_RATE_LIMIT_PRUNE_INTERVAL,
+            prune_rate_limit_buckets,
+            shared=rate_limiter.store.shared and settings.DATABASE_BACKEND == "sqlite")
+
+    # The denylist is per worker
+    add("token_denylist_sync", settings.MAINTENANCE_DENYLIST_SYNC_INTERVAL, token_service.sync_denylist,
+        shared=False)
+    add("auth_token_prune", settings.MAINTENANCE_AUTH_TOKEN_PRUNE_INTERVAL, token_service.prune)
+
+    if settings.PENDING_CAMPAIGN_TTL_HOURS > 0:
+        add("pending_campaign_expiry", settings.MAINTENANCE_PENDING_EXPIRY_INTERVAL,
+            expire_pending_campaigns)
+    if settings.JOB_DEDUP_ENABLED:
+        add("job_dedup_prune", settings.MAINTENANCE_JOB_DEDUP_PRUNE_INTERVAL, job_submitter.prune)
+    if settings.ARCHIVE_AFTER_DAYS > 0:
+        add("campaign_archive", settings.MAINTENANCE_ARCHIVE_INTERVAL, archive_campaigns)
+
+    # PostgreSQL does this itself (checkpointer, autovacuum)
+    if settings.DATABASE_BACKEND == "sqlite":
+        add("sqlite_checkpoint", settings.MAINTENANCE_CHECKPOINT_INTERVAL, repository.checkpoint)
+        add("sqlite_analyze", settings.MAINTENANCE_ANALYZE_INTERVAL,
+            functools.partial(repository.analyze_if_stale, settings.MAINTENANCE_ANALYZE_GROWTH))
+        add("sqlite_optimize", settings.MAINTENANCE_OPTIMIZE_INTERVAL, repository.optimize)
+
+    return scheduler
@@ -0,0 +1,257 @@
+"""
+Token-bucket rate limiting with state shared across uvicorn workers
+
+Each bucket holds up to `capacity` tokens and refills at `refill_rate`
+tokens per second; a request spends one token or is rejected. Buckets live
+in a small SQLite file (WAL, no fsync) so every worker on the host sees the
+same counts. Each check is a single UPSERT ... RETURNING statement, so it is
+atomic without an explicit transaction. Checks run on the event loop, so
+waiting for another worker's write is capped at a few milliseconds
+(RATE_LIMIT_BUSY_TIMEOUT_MS); past that, the check fails with "database is
+locked" and the middleware lets the request through. The in-memory store is for
+single-worker setups and tests. Idle buckets are pruned by the maintenance
+scheduler.
+"""
+import math
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from config import settings
+from database import DATABASE_PATH
+
+# Buckets idle for this long are full again and can be dropped
+IDLE_BUCKET_SECONDS = 3600
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of spending one token"""
+    allowed: bool
+    remaining: float
+    retry_after: int  # whole seconds until a token is available (0 if allowed)
+
+def _decision(allowed: bool, tokens: float, cost: float, refill_rate: float) -> RateLimitDecision:
+    if allowed:
+        return RateLimitDecision(True, tokens, 0)
+    wait = (cost - tokens) / refill_rate if refill_rate > 0 else IDLE_BUCKET_SECONDS
+    return RateLimitDecision(False, tokens, max(1, math.ceil(wait)))
+
+class MemoryBucketStore:
+    """Buckets in process memory (limits are per worker)"""
+
+    # Each worker has its own buckets to prune
+    shared = False
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, capacity: float, refill_rate: float, cost: float = 1) -> RateLimitDecision:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+
+        return _decision(allowed, tokens, cost, refill_rate)
+
+    def prune(self) -> int:
+        """Drop buckets that have been idle long enough to be full again"""
+        cutoff = time.monotonic() - IDLE_BUCKET_SECONDS
+        with self._lock:
+            before = len(self._buckets)
+            self._buckets = {k: v for k, v in self._buckets.items() if v[1] >= cutoff}
+            return before - len(self._buckets)
+
+    def close(self):
+        self._buckets.clear()
+
+class SQLiteBucketStore:
+    """Buckets in a SQLite file shared by all workers on the host"""
+
+    shared = True
+
+    def __init__(self, database_path: str, busy_timeout: float = 0.005):
+        """
+        Args:
+            database_path: SQLite file of the buckets
+            busy_timeout: Seconds to wait for the write lock before failing
+        """
+        self.database_path = database_path
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit; each check is one atomic statement
+            conn = sqlite3.connect(
+                self.database_path, isolation_level=None, timeout=self.busy_timeout,
+                check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Losing the last few updates in a crash only refills buckets early
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+                    key TEXT PRIMARY KEY,
+                    tokens REAL NOT NULL,
+                    updated REAL NOT NULL,
+                    -- Outcome of the last check, returned by take()
+                    allowed INTEGER NOT NULL
+                ) WITHOUT ROWID
+            """)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def take(self, key: str, capacity: float, refill_rate: float, cost: float = 1) -> RateLimitDecision:
+        # Wall-clock time: monotonic clocks are not comparable across processes
+        now = time.time()
+        conn = self._connection()
+        # In DO UPDATE, bare column names refer to the stored row and every
+        # SET expression sees the old values. The bucket is refilled for the
+        # elapsed time, and a token is spent only if one is available.
+        tokens, allowed = conn.execute("""
+            INSERT INTO rate_limit_buckets (key, tokens, updated, allowed)
+            VALUES (:key, :capacity - :cost, :now, 1)
+            ON CONFLICT (key) DO UPDATE SET
+                tokens = min(:capacity, tokens + max(0, :now - updated) * :rate)
+                    - CASE WHEN min(:capacity, tokens + max(0, :now - updated) * :rate) >= :cost
+                           THEN :cost ELSE 0 END,
+                allowed = min(:capacity, tokens + max(0, :now - updated) * :rate) >= :cost,
+                updated = :now
+            RETURNING tokens, allowed
+        """, {"key": key, "capacity": capacity, "cost": cost, "now": now, "rate": refill_rate}).fetchone()
+
+        return _decision(bool(allowed), tokens, cost, refill_rate)
+
+    def prune(self) -> int:
+        """Drop buckets that have been idle long enough to be full again"""
+        return self._connection().execute(
+            "DELETE FROM rate_limit_buckets WHERE updated < ?",
+            (time.time() - IDLE_BUCKET_SECONDS,)
+        ).rowcount
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+def create_bucket_store(backend: str, database_path: str = "", busy_timeout: float = 0.005):
+    """
+    Build the bucket store for RATE_LIMIT_BACKEND
+
+    Args:
+        backend: "sqlite" (shared across workers) or "memory" (per worker)
+        database_path: SQLite file (default: ratelimit.db next to campaigns.db)
+        busy_timeout: Seconds a SQLite check waits for the write lock
+    """
+    if backend == "memory":
+        return MemoryBucketStore()
+    if backend == "sqlite":
+        return SQLiteBucketStore(
+            database_path or os.path.join(os.path.dirname(DATABASE_PATH), "ratelimit.db"),
+            busy_timeout
+        )
+    raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+
+@dataclass(frozen=True)
+class RateLimitRule:
+    """Budget for requests matching a method and path, per client IP or per DID"""
+    name: str
+    method: str
+    path: str  # exact path; "*" matches every path
+    scope: str  # "ip" or "did"
+    per_minute: int
+
+    @property
+    def refill_rate(self) -> float:
+        return self.per_minute / 60
+
+    def matches(self, method: str, path: str) -> bool:
+        return (self.path == "*" or self.path == path) and (self.method == "*" or self.method == method)
+
+def default_rules() -> List[RateLimitRule]:
+    """Route budgets from settings; each bucket holds one minute's budget"""
+    return [
+        RateLimitRule("challenge", "GET", "/auth/challenge", "ip", settings.RATE_LIMIT_CHALLENGE_PER_MINUTE),
+        RateLimitRule("challenge", "GET", "/auth/challenge", "did",
+                      settings.RATE_LIMIT_CHALLENGE_PER_DID_PER_MINUTE),
+        RateLimitRule("verify", "POST", "/auth/verify", "ip", settings.RATE_LIMIT_VERIFY_PER_MINUTE),
+        RateLimitRule("refresh", "POST", "/auth/refresh", "ip", settings.RATE_LIMIT_REFRESH_PER_MINUTE),
+        RateLimitRule("campaign_create", "POST", "/campaigns", "did",
+                      settings.RATE_LIMIT_CAMPAIGN_CREATE_PER_MINUTE),
+        RateLimitRule("campaign_bulk_create", "POST", "/campaigns/bulk", "did",
+                      settings.RATE_LIMIT_BULK_CREATE_PER_MINUTE),
+        RateLimitRule("default", "*", "*", "ip", settings.RATE_LIMIT_DEFAULT_PER_MINUTE),
+    ]
+
+class RateLimiter:
+    """Applies every matching rule to a request"""
+
+    def __init__(self, store, rules: List[RateLimitRule]):
+        self.store = store
+        self.rules = rules
+
+    def check(
+        self,
+        method: str,
+        path: str,
+        client_ip: str,
+        get_did: Callable[[], Optional[str]]
+    ) -> Optional[Tuple[RateLimitRule, RateLimitDecision]]:
+        """
+        Spend a token from each bucket the request falls into
+
+        Args:
+            method: HTTP method
+            path: Request path
+            client_ip: Client address
+            get_did: Returns the caller's DID, or None; only called if a
+                DID-scoped rule matches
+
+        Returns:
+            (rule, decision) of the first bucket that rejected the request,
+            or None if it is allowed
+        """
+        did = None
+        for rule in self.rules:
+            if not rule.matches(method, path):
+                continue
+            if rule.scope == "did":
+                did = did or get_did()
+                if not did:
+                    # Unauthenticated requests are covered by the IP rules
+                    continue
+                key = f"{rule.name}:did:{did}"
+            else:
+                key = f"{rule.name}:ip:{client_ip}"
+            decision = self.store.take(key, rule.per_minute, rule.refill_rate)
+            if not decision.allowed:
+                return rule, decision
+        return None
+
+    def close(self):
+        self.store.close()
+
+# Global rate limiter instance
+rate_limiter = RateLimiter(
+    create_bucket_store(
+        settings.RATE_LIMIT_BACKEND,
+        settings.RATE_LIMIT_DATABASE_PATH,
+        settings.RATE_LIMIT_BUSY_TIMEOUT_MS / 1000
+    ),
+    default_rules()
+)
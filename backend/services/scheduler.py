@@ -0,0 +1,122 @@
+"""
+In-process scheduler for periodic maintenance tasks
+
+Each worker runs the scheduler from the app lifespan. A task fires every
+`interval` seconds, give or take `jitter` (a fraction of the interval), so
+workers started together do not all wake at once. Shared tasks (database
+upkeep) run under a lease stored in the database: the first worker whose
+timer fires after the lease expired takes it for most of an interval and
+runs the task, the others skip that round. Per-worker tasks (sweeps of
+in-memory state) run in every worker.
+"""
+import asyncio
+import logging
+import os
+import random
+import socket
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import metrics
+from repositories.base import CampaignRepository
+
+TASK_DURATION = metrics.histogram(
+    "maintenance_task_duration_seconds",
+    "Time spent running a maintenance task",
+    ("task",)
+)
+TASK_RUNS = metrics.counter(
+    "maintenance_task_runs_total",
+    "Maintenance task runs by outcome (ok, error, skipped: another worker holds the lease)",
+    ("task", "outcome")
+)
+TASK_LAST_SUCCESS = metrics.gauge(
+    "maintenance_task_last_success_timestamp_seconds",
+    "Unix time of the last successful run of a task in this worker",
+    ("task",)
+)
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PeriodicTask:
+    """A maintenance job and how often to run it"""
+    name: str
+    interval: float  # seconds
+    run: Callable[[], Awaitable[Any]]
+    # Run by one worker at a time under a database lease; False runs it in
+    # every worker (for per-process state)
+    shared: bool = True
+    jitter: float = 0.1
+
+class Scheduler:
+    """Runs periodic tasks on the event loop until stopped"""
+
+    def __init__(self, repository: CampaignRepository, owner: Optional[str] = None):
+        self.repository = repository
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+        self.tasks: Dict[str, PeriodicTask] = {}
+        self._runners: List[asyncio.Task] = []
+
+    def add(self, task: PeriodicTask):
+        self.tasks[task.name] = task
+
+    def start(self):
+        """Start one timer per task on the running event loop"""
+        for task in self.tasks.values():
+            self._runners.append(
+                asyncio.create_task(self._loop(task), name=f"maintenance:{task.name}")
+            )
+
+    async def stop(self):
+        """Cancel the timers, interrupting tasks that are running"""
+        for runner in self._runners:
+            runner.cancel()
+        await asyncio.gather(*self._runners, return_exceptions=True)
+        self._runners.clear()
+
+    def _delay(self, task: PeriodicTask) -> float:
+        return task.interval * (1 + random.uniform(-task.jitter, task.jitter))
+
+    async def _loop(self, task: PeriodicTask):
+        while True:
+            await asyncio.sleep(self._delay(task))
+            await self.run_once(task.name)
+
+    async def run_once(self, name: str) -> bool:
+        """
+        Run a task now, if its lease can be taken
+
+        Errors are logged and counted, never raised: a failing task must not
+        stop the scheduler.
+
+        Returns:
+            True if the task ran successfully
+        """
+        task = self.tasks[name]
+        try:
+            # Held for most of an interval, so the next round is free even
+            # if the next worker's timer fires a little early
+            if task.shared and not await self.repository.acquire_lease(
+                name, self.owner, task.interval * (1 - task.jitter)
+            ):
+                TASK_RUNS.inc(task=name, outcome="skipped")
+                return False
+
+            started = time.perf_counter()
+            result = await task.run()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            TASK_RUNS.inc(task=name, outcome="error")
+            logger.exception("Maintenance task %s failed", name)
+            return False
+
+        duration = time.perf_counter() - started
+        TASK_DURATION.observe(duration, task=name)
+        TASK_RUNS.inc(task=name, outcome="ok")
+        TASK_LAST_SUCCESS.set(time.time(), task=name)
+        logger.info("Maintenance task %s done in %.1f ms", name, duration * 1000,
+                    extra={"task": name, "result": result})
+        return True
@@ -0,0 +1,65 @@
+"""
+Single-flight coalescing of identical concurrent reads
+
+While a read is in flight, identical reads (same key) wait for it and share
+its result instead of running their own query. Nothing is kept once the
+read completes, so a result is never older than the request that receives
+it: it was read after that request started, or concurrently with it.
+
+The computation runs as its own task. A caller that is cancelled (e.g. its
+client disconnected) stops waiting without cancelling the read for the
+others.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+import metrics
+
+COALESCED_READS = metrics.counter(
+    "campaign_reads_total",
+    "Campaign service reads by result: executed (ran a query) or coalesced "
+    "(shared an identical in-flight query)",
+    ("method", "result")
+)
+
+class SingleFlight:
+    """Shares one in-flight call per key among concurrent callers"""
+
+    def __init__(self, name: str, enabled: bool = True):
+        """
+        Args:
+            name: Method label of the metrics
+            enabled: False runs every call on its own
+        """
+        self.name = name
+        self.enabled = enabled
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await fn(), or the identical call already in flight for key
+
+        Callers of the same flight get the same result object; it must not
+        be modified.
+        """
+        if not self.enabled:
+            COALESCED_READS.inc(method=self.name, result="executed")
+            return await fn()
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(fn())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._finish(key, done))
+            COALESCED_READS.inc(method=self.name, result="executed")
+        else:
+            COALESCED_READS.inc(method=self.name, result="coalesced")
+        return await asyncio.shield(flight)
+
+    def _finish(self, key: Hashable, flight: asyncio.Task):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        # Retrieved here so an error is not reported as unhandled when every
+        # caller was cancelled; callers still awaiting get it raised
+        if not flight.cancelled():
+            flight.exception()
@@ -0,0 +1,137 @@
+"""
+Refresh tokens and access token revocation
+
+Signing in issues a short-lived access token and a refresh token. The
+refresh token is an opaque random string, stored only as a hash. Each
+refresh uses it up and returns a new pair, so a chain of refresh tokens
+(a "family") stays valid for as long as the user keeps coming back, up to
+JWT_REFRESH_TOKEN_DAYS per token. Presenting a used refresh token again
+within JWT_REFRESH_REUSE_GRACE_SECONDS of its first use (two tabs refreshing
+at once, a retry after a lost response) returns another new pair. Later, it
+means the token was copied: the whole family is then revoked, and both
+holders must sign in again.
+
+Logging out revokes the refresh family and the access token. The access
+token's ID is written to revoked_tokens and added to this worker's
+denylist at once. Other workers pick it up on their next denylist sync
+(MAINTENANCE_DENYLIST_SYNC_INTERVAL).
+"""
+import hashlib
+import logging
+import secrets
+import time
+from typing import Any, Dict, Optional
+
+import metrics
+from auth.denylist import TokenDenylist, token_denylist
+from auth.jwt_utils import create_access_token
+from config import settings
+from repositories.base import CampaignRepository
+from services.campaign_service import campaign_service
+
+REFRESHES = metrics.counter(
+    "auth_token_refreshes_total",
+    "Refresh token uses by result (success, rejected)",
+    ("result",)
+)
+REVOCATIONS = metrics.counter(
+    "auth_token_revocations_total",
+    "Access tokens revoked (logouts)"
+)
+
+# Revocations committed this long before a sync may not have been visible
+# to the previous one; re-read them
+_SYNC_OVERLAP_SECONDS = 60
+
+logger = logging.getLogger(__name__)
+
+def hash_refresh_token(refresh_token: str) -> str:
+    return hashlib.sha256(refresh_token.encode()).hexdigest()
+
+class TokenService:
+    """Issues, refreshes and revokes the tokens of a sign-in"""
+
+    def __init__(self, repository: CampaignRepository, denylist: TokenDenylist):
+        self.repository = repository
+        self.denylist = denylist
+        self._synced_until = 0.0
+
+    async def issue(self, did: str, family_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create an access token and a refresh token for a DID
+
+        Args:
+            did: Authenticated DID
+            family_id: Family of the refresh token being rotated (None starts one)
+
+        Returns:
+            access_token, refresh_token and expires_in (seconds)
+        """
+        refresh_token = secrets.token_urlsafe(32)
+        await self.repository.insert_refresh_token(
+            hash_refresh_token(refresh_token),
+            did,
+            family_id or secrets.token_hex(16),
+            time.time() + settings.JWT_REFRESH_TOKEN_DAYS * 86400
+        )
+        return {
+            "access_token": create_access_token(did),
+            "refresh_token": refresh_token,
+            "expires_in": settings.JWT_ACCESS_TOKEN_MINUTES * 60,
+        }
+
+    async def refresh(self, refresh_token: str) -> Optional[Dict[str, Any]]:
+        """
+        Exchange a refresh token for a new token pair
+
+        Returns:
+            The new tokens and did, or None if the refresh token is invalid,
+            expired or was used before the reuse grace window
+        """
+        token = await self.repository.use_refresh_token(
+            hash_refresh_token(refresh_token),
+            settings.JWT_REFRESH_REUSE_GRACE_SECONDS
+        )
+        if token is None:
+            REFRESHES.inc(result="rejected")
+            return None
+        REFRESHES.inc(result="success")
+        tokens = await self.issue(token["did"], token["family_id"])
+        return {**tokens, "did": token["did"]}
+
+    async def revoke(self, access_payload: Dict[str, Any], refresh_token: Optional[str] = None):
+        """
+        Revoke an access token and, if given, the family of a refresh token
+
+        Args:
+            access_payload: Verified claims of the access token
+            refresh_token: Refresh token of the same sign-in
+        """
+        if refresh_token:
+            await self.repository.revoke_refresh_family(hash_refresh_token(refresh_token))
+        if "jti" in access_payload:
+            await self.repository.revoke_access_token(access_payload["jti"], access_payload["exp"])
+            self.denylist.add(access_payload["jti"], access_payload["exp"])
+            REVOCATIONS.inc()
+
+    async def sync_denylist(self) -> int:
+        """
+        Add tokens revoked since the last sync (by any worker) to the denylist
+
+        Returns:
+            Number of revocations read
+        """
+        started = time.time()
+        revoked = await self.repository.list_revoked_tokens(self._synced_until - _SYNC_OVERLAP_SECONDS)
+        for token in revoked:
+            self.denylist.add(token["jti"], token["expires_at"])
+        self.denylist.prune()
+        self._synced_until = started
+        return len(revoked)
+
+    async def prune(self) -> int:
+        """Delete expired refresh tokens and revocations"""
+        return await self.repository.prune_auth_tokens()
+
+# Global service instance
+token_service = TokenService(campaign_service.repository, token_denylist)
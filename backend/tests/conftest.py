@@ -0,0 +1,75 @@
+"""
+Shared fixtures: each repository test runs against SQLite and PostgreSQL
+
+The SQLite repository uses a new database file per test. The PostgreSQL
+one uses POSTGRES_DSN (point it at a disposable database: the tests write
+campaigns and archive them) and is skipped when POSTGRES_DSN is unset,
+asyncpg is not installed or the database cannot be reached.
+"""
+import asyncio
+import os
+import sys
+from typing import Awaitable, Callable
+
+import pytest
+
+# Tests import the backend modules the way the app does (from backend/)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from repositories.base import CampaignRepository
+
+try:
+    import asyncpg
+except ImportError:  # pragma: no cover - optional dependency
+    asyncpg = None
+
+def _postgres_dsn() -> str:
+    dsn = os.environ.get("POSTGRES_DSN")
+    if not dsn:
+        pytest.skip("POSTGRES_DSN is not set")
+    if asyncpg is None:
+        pytest.skip("asyncpg is not installed")
+
+    async def probe():
+        conn = await asyncpg.connect(dsn, timeout=5)
+        await conn.close()
+
+    try:
+        asyncio.run(probe())
+    except Exception as e:
+        pytest.skip(f"PostgreSQL at POSTGRES_DSN is unavailable: {e}")
+    return dsn
+
+@pytest.fixture(params=["sqlite", "postgres"])
+def run_with_repository(request, tmp_path) -> Callable:
+    """
+    Run a scenario against a connected, migrated repository
+
+    A connection pool belongs to one event loop, so each call opens the
+    repository, awaits scenario(repository) and closes it in its own loop.
+    """
+    if request.param == "sqlite":
+        from repositories.sqlite import SQLiteCampaignRepository
+
+        def create() -> CampaignRepository:
+            return SQLiteCampaignRepository(str(tmp_path / "campaigns.db"))
+    else:
+        from repositories.postgres import PostgresCampaignRepository
+
+        dsn = _postgres_dsn()
+
+        def create() -> CampaignRepository:
+            return PostgresCampaignRepository(dsn, min_size=1, max_size=2)
+
+    def run(scenario: Callable[[CampaignRepository], Awaitable]):
+        async def main():
+            repository = create()
+            await repository.connect(run_migrations=True)
+            try:
+                return await scenario(repository)
+            finally:
+                await repository.close()
+
+        return asyncio.run(main())
+
+    return run
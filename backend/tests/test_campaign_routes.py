@@ -0,0 +1,57 @@
+"""
+GET /campaigns query parsing, with the service stubbed out
+"""
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from routes import campaigns
+
+JUNE_1 = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+@pytest.fixture
+def listed(monkeypatch):
+    """Client for the campaign routes; the filters of each list call are appended to .calls"""
+    calls = []
+
+    async def get_campaigns_by_did(did, filters, include_text=False):
+        calls.append(filters)
+        return []
+
+    monkeypatch.setattr(campaigns.campaign_service, "get_campaigns_by_did", get_campaigns_by_did)
+    app = FastAPI()
+    app.include_router(campaigns.router)
+    app.dependency_overrides[campaigns.get_current_did] = lambda: "did:prism:test"
+    client = TestClient(app)
+    client.calls = calls
+    return client
+
+@pytest.mark.parametrize("query", [
+    "start_from=2024-06-01",
+    "start_from=1717200000",
+    "start_from=2024-06-01T02:00:00%2B02:00",
+])
+def test_date_filter_formats(listed, query):
+    response = listed.get(f"/campaigns?{query}")
+
+    assert response.status_code == 200
+    assert listed.calls[-1].start_from == JUNE_1
+
+def test_all_date_filters(listed):
+    response = listed.get(
+        "/campaigns?start_from=2024-06-01&start_to=1717286400&end_from=20240601"
+        "&end_to=2024-06-02&created_from=2024-06-01T00:00:00&created_to=2024-06-02"
+    )
+
+    assert response.status_code == 200
+    filters = listed.calls[-1]
+    assert filters.start_from == filters.end_from == filters.created_from == JUNE_1
+    assert filters.start_to == filters.end_to == filters.created_to == datetime(2024, 6, 2, tzinfo=timezone.utc)
+
+def test_invalid_date_filter(listed):
+    response = listed.get("/campaigns?created_to=yesterday")
+
+    assert response.status_code == 422
+    assert listed.calls == []
@@ -0,0 +1,41 @@
+"""
+Campaign date parsing, in Python and in the SQL backfill
+"""
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+import migrations
+from models import parse_timestamp
+
+JUNE_1 = datetime(2024, 6, 1, tzinfo=timezone.utc)
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024-06-01", JUNE_1),
+    ("2024-06-01T02:00:00+02:00", JUNE_1),
+    ("2024-06-01T00:00:00", JUNE_1),
+    ("20240601", JUNE_1),
+    (" 20240601 ", JUNE_1),
+    ("1717200000", JUNE_1),
+    (None, None),
+])
+def test_parse_timestamp(value, expected):
+    assert parse_timestamp(value) == expected
+
+@pytest.mark.parametrize("value", ["2024", "20241399", "soon"])
+def test_parse_timestamp_rejects(value):
+    with pytest.raises(ValueError):
+        parse_timestamp(value)
+
+@pytest.mark.parametrize("value", [
+    "2024-06-01", "2024-06-01T02:00:00+02:00", "20240601", "1717200000", "20241399"
+])
+def test_backfill_matches_parse_timestamp(value):
+    conn = sqlite3.connect(":memory:")
+    (backfilled,) = conn.execute(f"SELECT {migrations._utc_datetime(':value')}", {"value": value}).fetchone()
+    try:
+        expected = parse_timestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        expected = None
+    assert backfilled == expected
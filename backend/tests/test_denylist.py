@@ -0,0 +1,57 @@
+"""
+Revoked access tokens: Bloom filter partitions confirmed by exact lookup
+"""
+import time
+
+from auth.denylist import BloomFilter, TokenDenylist
+
+def test_revoked_and_not_revoked():
+    denylist = TokenDenylist(window=300, capacity=100, error_rate=0.001)
+    expires_at = time.time() + 900
+    denylist.add("revoked-jti", expires_at)
+
+    assert denylist.is_revoked("revoked-jti", expires_at)
+    assert not denylist.is_revoked("other-jti", expires_at)
+    # Looked up in the partition of the token's own expiry
+    assert not denylist.is_revoked("revoked-jti", expires_at + 3600)
+    assert denylist.size == 1
+
+    denylist.add("revoked-jti", expires_at)
+    assert denylist.size == 1
+
+def test_bloom_false_positives_are_not_revoked():
+    # A one-bit filter matches every token ID
+    denylist = TokenDenylist(window=300, capacity=1, error_rate=0.999)
+    expires_at = time.time() + 900
+    denylist.add("revoked-jti", expires_at)
+    partition = next(iter(denylist._partitions.values()))
+    partition.bloom.bits[:] = b"\xff" * len(partition.bloom.bits)
+
+    assert "never-revoked" in partition.bloom
+    assert not denylist.is_revoked("never-revoked", expires_at)
+    assert denylist.is_revoked("revoked-jti", expires_at)
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(1000, 0.01)
+    items = [f"jti-{index}" for index in range(1000)]
+    for item in items:
+        bloom.add(item)
+
+    assert all(item in bloom for item in items)
+    false_positives = sum(f"other-{index}" in bloom for index in range(10000))
+    assert false_positives < 300
+
+def test_expired_tokens_are_dropped(monkeypatch):
+    clock = [1_000_000.0]
+    monkeypatch.setattr("auth.denylist.time.time", lambda: clock[0])
+    denylist = TokenDenylist(window=300)
+
+    # Already expired: nothing to deny
+    denylist.add("old-jti", clock[0] - 1)
+    assert denylist.size == 0
+
+    denylist.add("jti", clock[0] + 60)
+    clock[0] += 900
+    assert denylist.prune() == 1
+    assert denylist.size == 0
+    assert not denylist.is_revoked("jti", clock[0] - 840)
@@ -0,0 +1,123 @@
+"""
+did:key decoding and challenge signature checks
+"""
+import base64
+import json
+
+import pytest
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+from auth.did_key import BASE58_ALPHABET, DIDKeyVerifier, decode_did_key
+
+CHALLENGE = "a3f1" * 16
+
+def _base58_encode(data: bytes) -> str:
+    number = int.from_bytes(data, "big")
+    encoded = ""
+    while number:
+        number, remainder = divmod(number, 58)
+        encoded = BASE58_ALPHABET[remainder] + encoded
+    return "1" * (len(data) - len(data.lstrip(b"\x00"))) + encoded
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+def _did_key(codec: bytes, public_bytes: bytes) -> str:
+    return "did:key:z" + _base58_encode(codec + public_bytes)
+
+def _ed25519():
+    """(did, sign) of a new Ed25519 key"""
+    key = ed25519.Ed25519PrivateKey.generate()
+    public_bytes = key.public_key().public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+    return _did_key(b"\xed\x01", public_bytes), key.sign
+
+def _p256():
+    """(did, sign) of a new P-256 key; signatures are JWS r || s"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    public_bytes = key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.CompressedPoint
+    )
+
+    def sign(data: bytes) -> bytes:
+        r, s = decode_dss_signature(key.sign(data, ec.ECDSA(hashes.SHA256())))
+        return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+
+    return _did_key(b"\x80\x24", public_bytes), sign
+
+def _jws(sign, alg: str, payload: str = CHALLENGE) -> str:
+    signing_input = f"{_b64url(json.dumps({'alg': alg}).encode())}.{_b64url(payload.encode())}"
+    return f"{signing_input}.{_b64url(sign(signing_input.encode()))}"
+
+def _tamper(jws: str) -> str:
+    """Flip one bit of the signature"""
+    header, payload, signature = jws.split(".")
+    raw = bytearray(base64.urlsafe_b64decode(signature + "=" * (-len(signature) % 4)))
+    raw[0] ^= 1
+    return f"{header}.{payload}.{_b64url(bytes(raw))}"
+
+KEYS = [(_ed25519, "EdDSA"), (_p256, "ES256")]
+
+@pytest.mark.parametrize("did, alg", [
+    # Test vectors of the did:key method specification
+    ("did:key:z6MkhaXgBZDvotDkL5257faiztiGiC2QtKLGpbnnEGta2doK", "EdDSA"),
+    ("did:key:zDnaerDaTF5BXEavCrfRZEk316dpbLsfPDZ3WJ5hRTPFU2169", "ES256"),
+])
+def test_decode_spec_vectors(did, alg):
+    assert decode_did_key(did)[0] == alg
+
+@pytest.mark.parametrize("make_key, alg", KEYS)
+def test_decode(make_key, alg):
+    did, _ = make_key()
+
+    assert decode_did_key(did)[0] == alg
+    assert decode_did_key(did + "#key-1")[0] == alg
+
+@pytest.mark.parametrize("make_key, alg", KEYS)
+def test_valid_signature(make_key, alg):
+    did, sign = make_key()
+
+    assert DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, _jws(sign, alg))
+
+@pytest.mark.parametrize("make_key, alg", KEYS)
+def test_tampered_signature(make_key, alg):
+    did, sign = make_key()
+
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, _tamper(_jws(sign, alg)))
+
+@pytest.mark.parametrize("make_key, alg", KEYS)
+def test_other_challenge(make_key, alg):
+    did, sign = make_key()
+
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, _jws(sign, alg, "b" * 64))
+
+@pytest.mark.parametrize("make_key, header_alg", [(_ed25519, "ES256"), (_p256, "EdDSA"), (_p256, "none")])
+def test_algorithm_must_match_key(make_key, header_alg):
+    did, sign = make_key()
+
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, _jws(sign, header_alg))
+
+def test_signature_of_another_key():
+    did, _ = _ed25519()
+    _, other_sign = _ed25519()
+
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, _jws(other_sign, "EdDSA"))
+
+@pytest.mark.parametrize("did", [
+    "did:prism:abc",
+    "did:key:6Mkabc",  # not base58btc multibase
+    "did:key:z0OIl",  # not base58
+    "did:key:z" + _base58_encode(b"\xe7\x01" + b"\x02" * 33),  # secp256k1: unsupported
+    "did:key:z" + _base58_encode(b"\xed\x01" + b"\x00" * 31),  # short Ed25519 key
+])
+def test_malformed_did(did):
+    with pytest.raises(ValueError):
+        decode_did_key(did)
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, "a.b.c")
+
+@pytest.mark.parametrize("signature", ["", "a.b", "!!.??.**", f"{_b64url(b'[]')}.{_b64url(CHALLENGE.encode())}.AA"])
+def test_malformed_jws(signature):
+    did, _ = _ed25519()
+
+    assert not DIDKeyVerifier().verify_did_authentication(did, CHALLENGE, signature)
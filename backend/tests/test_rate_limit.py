@@ -0,0 +1,125 @@
+"""
+Token buckets and the rate-limit middleware
+"""
+import asyncio
+
+from middleware.rate_limit import RateLimitMiddleware
+from services.rate_limiter import MemoryBucketStore, RateLimiter, RateLimitRule, SQLiteBucketStore
+
+VICTIM = "did:prism:victim"
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 401, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+def _request(middleware: RateLimitMiddleware, method: str, path: str, query: bytes, ip: str) -> int:
+    """Send one request through the middleware and return its status"""
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": path,
+        "query_string": query,
+        "headers": [],
+        "client": (ip, 50000),
+    }
+    statuses = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            statuses.append(message["status"])
+
+    asyncio.run(middleware(scope, receive, send))
+    return statuses[0]
+
+def test_bucket_exhausts_and_refills(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("services.rate_limiter.time.monotonic", lambda: clock[0])
+    store = MemoryBucketStore()
+
+    # 60 per minute: one token per second
+    assert all(store.take("k", 3, 1).allowed for _ in range(3))
+    rejected = store.take("k", 3, 1)
+    assert not rejected.allowed
+    assert rejected.retry_after == 1
+
+    clock[0] += 0.5
+    assert not store.take("k", 3, 1).allowed
+    clock[0] += 0.5
+    assert store.take("k", 3, 1).allowed
+    assert not store.take("k", 3, 1).allowed
+
+    # A full bucket holds no more than its capacity
+    clock[0] += 60
+    assert all(store.take("k", 3, 1).allowed for _ in range(3))
+    assert not store.take("k", 3, 1).allowed
+
+def test_retry_after_rounds_up_to_the_next_token():
+    store = MemoryBucketStore()
+    # 6 per minute: one token every 10 seconds
+    store.take("k", 1, 0.1)
+    assert store.take("k", 1, 0.1).retry_after == 10
+
+def test_shared_bucket_exhausts_and_refills(monkeypatch, tmp_path):
+    clock = [1000.0]
+    monkeypatch.setattr("services.rate_limiter.time.time", lambda: clock[0])
+    store = SQLiteBucketStore(str(tmp_path / "ratelimit.db"))
+    # A second worker's view of the same buckets
+    other = SQLiteBucketStore(str(tmp_path / "ratelimit.db"))
+    try:
+        assert store.take("k", 2, 0.5).allowed
+        assert other.take("k", 2, 0.5).allowed
+        rejected = store.take("k", 2, 0.5)
+        assert not rejected.allowed
+        assert rejected.retry_after == 2
+
+        clock[0] += 2
+        assert other.take("k", 2, 0.5).allowed
+        assert not store.take("k", 2, 0.5).allowed
+
+        # Idle buckets are pruned once they would be full again
+        clock[0] += 3601
+        assert store.prune() == 1
+    finally:
+        store.close()
+        other.close()
+
+def test_limiter_reports_the_rejecting_rule():
+    rules = [
+        RateLimitRule("login", "POST", "/auth/verify", "ip", 2),
+        RateLimitRule("default", "*", "*", "ip", 600),
+    ]
+    limiter = RateLimiter(MemoryBucketStore(), rules)
+
+    assert limiter.check("POST", "/auth/verify", "10.0.0.1", lambda: None) is None
+    assert limiter.check("POST", "/auth/verify", "10.0.0.1", lambda: None) is None
+    rule, decision = limiter.check("POST", "/auth/verify", "10.0.0.1", lambda: None)
+    assert rule.name == "login"
+    assert decision.retry_after == 30
+    # Other clients and routes are unaffected
+    assert limiter.check("POST", "/auth/verify", "10.0.0.2", lambda: None) is None
+    assert limiter.check("GET", "/campaigns", "10.0.0.1", lambda: None) is None
+
+def test_did_query_does_not_spend_campaign_budget():
+    rules = [
+        RateLimitRule("challenge", "GET", "/auth/challenge", "did", 2),
+        RateLimitRule("campaign_create", "POST", "/campaigns", "did", 2),
+    ]
+    limiter = RateLimiter(MemoryBucketStore(), rules)
+    middleware = RateLimitMiddleware(_app, limiter)
+
+    # Unauthenticated creates naming the victim, from rotating addresses
+    for index in range(5):
+        status = _request(middleware, "POST", "/campaigns", f"did={VICTIM}".encode(), f"10.0.0.{index}")
+        assert status == 401
+
+    # The victim's own budget is untouched
+    assert limiter.check("POST", "/campaigns", "10.1.0.1", lambda: VICTIM) is None
+
+    # Challenge requests carry no token and are keyed on ?did=
+    query = f"did={VICTIM}".encode()
+    assert _request(middleware, "GET", "/auth/challenge", query, "10.0.1.1") == 401
+    assert _request(middleware, "GET", "/auth/challenge", query, "10.0.1.2") == 401
+    assert _request(middleware, "GET", "/auth/challenge", query, "10.0.1.3") == 429
@@ -0,0 +1,118 @@
+"""
+Campaign repository round-trips, against SQLite and PostgreSQL (conftest.py)
+"""
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from models import CampaignFilters, CreateCampaignRequest
+from repositories.base import CampaignRecord, CampaignRepository
+
+# start_date of the test campaigns, as the service normalizes it
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+def _request(name: str, budget: float) -> CreateCampaignRequest:
+    return CreateCampaignRequest(
+        campaign_name=name,
+        campaign_description=f"Description of {name}",
+        campaign_objective="awareness",
+        budget=budget,
+        start_date="2026-01-01",
+        input_text=f"Prompt for {name}"
+    )
+
+async def _create(repository: CampaignRepository, count: int = 3) -> List[CampaignRecord]:
+    """Create count campaigns for a new DID, named c0, c1, ... in creation order"""
+    did = f"did:prism:test-{uuid.uuid4().hex}"
+    identifier = await repository.get_or_create_user_identifier(did, uuid.uuid4().hex[:24])
+    return await repository.insert_campaigns(
+        did,
+        identifier,
+        [str(uuid.uuid4()) for _ in range(count)],
+        [_request(f"c{index}", 100.0 * (index + 1)) for index in range(count)],
+        start_times=[START] * count
+    )
+
+def test_create_and_list(run_with_repository):
+    async def scenario(repository: CampaignRepository):
+        created = await _create(repository)
+        did = created[0]["did"]
+
+        assert [campaign["campaign_name"] for campaign in created] == ["c0", "c1", "c2"]
+        assert all(campaign["status"] == "pending" for campaign in created)
+
+        listed = await repository.list_campaigns_by_did(did)
+        assert {campaign["campaign_id"] for campaign in listed} == {
+            campaign["campaign_id"] for campaign in created
+        }
+        # Text is read only on request
+        assert all(campaign["input_text"] is None for campaign in listed)
+        with_text = await repository.list_campaigns_by_did(did, include_text=True)
+        assert {campaign["input_text"] for campaign in with_text} == {
+            "Prompt for c0", "Prompt for c1", "Prompt for c2"
+        }
+
+        filtered = await repository.list_campaigns_by_did(did, CampaignFilters(budget_min=200))
+        assert {campaign["campaign_name"] for campaign in filtered} == {"c1", "c2"}
+
+        campaign = await repository.get_campaign(created[0]["campaign_id"])
+        assert campaign["campaign_description"] == "Description of c0"
+        assert campaign["start_at"] == "2026-01-01 00:00:00"
+        assert await repository.get_campaign(str(uuid.uuid4())) is None
+
+    run_with_repository(scenario)
+
+def test_update_status(run_with_repository):
+    async def scenario(repository: CampaignRepository):
+        created = await _create(repository)
+        ids = [campaign["campaign_id"] for campaign in created]
+
+        assert await repository.update_status(ids[:2], "completed") == 2
+        statuses = {
+            campaign["campaign_id"]: campaign["status"]
+            for campaign in await repository.list_campaigns_by_did(created[0]["did"])
+        }
+        assert statuses == {ids[0]: "completed", ids[1]: "completed", ids[2]: "pending"}
+
+        completed = await repository.list_campaigns_by_did(
+            created[0]["did"], CampaignFilters(status="completed")
+        )
+        assert {campaign["campaign_id"] for campaign in completed} == set(ids[:2])
+
+    run_with_repository(scenario)
+
+def test_archive(run_with_repository):
+    async def scenario(repository: CampaignRepository):
+        created = await _create(repository)
+        did = created[0]["did"]
+        ids = [campaign["campaign_id"] for campaign in created]
+        await repository.update_status(ids[:2], "completed")
+
+        # Everything completed up to now is cold
+        archived = await repository.archive_campaigns(
+            datetime.now(timezone.utc) + timedelta(minutes=1), ["completed"], 1000
+        )
+        assert archived >= 2
+
+        listed = await repository.list_campaigns_by_did(did)
+        assert [campaign["campaign_id"] for campaign in listed] == [ids[2]]
+        with_archive = await repository.list_campaigns_by_did(
+            did, CampaignFilters(include_archived=True)
+        )
+        assert {campaign["campaign_id"] for campaign in with_archive} == set(ids)
+
+        # Archived campaigns are still found by ID, with their text
+        campaign = await repository.get_campaign(ids[0])
+        assert campaign["status"] == "completed"
+        assert campaign["input_text"] == "Prompt for c0"
+
+    run_with_repository(scenario)
+
+def test_migrations(run_with_repository):
+    async def scenario(repository: CampaignRepository):
+        status = await repository.migration_status()
+        assert status and all(applied for _, _, applied in status)
+        assert [version for version, _, _ in status] == sorted(version for version, _, _ in status)
+        assert await repository.migrate() == []
+
+    run_with_repository(scenario)
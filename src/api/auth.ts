@@ -15,6 +15,8 @@ export interface AuthResponse {
   access_token: string;
   token_type: string;
   did: string;
+  refresh_token: string;
+  expires_in: number; // access token lifetime in seconds
 }
 
 /**
@@ -71,6 +73,34 @@ export async function verifyAuthentication(
   }
 }
 
+/**
+ * Exchange a refresh token for a new access token and refresh token.
+ * The refresh token is single-use: store the returned one.
+ */
+export async function refreshAuthentication(
+  refreshToken: string
+): Promise<AuthResponse> {
+  try {
+    const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+
+    if (!response.ok) {
+      const error = await response.json();
+      throw new Error(error.detail || 'Token refresh failed');
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Error refreshing authentication:', error);
+    throw error;
+  }
+}
+
 /**
  * Get current user info from JWT token.
  */
@@ -2,7 +2,16 @@ import { createContext, useContext, useState, useEffect } from 'react';
 import type { ReactNode } from 'react';
 import { createDid, loadDid, signWithDid, clearDid, hasDid, importDid, exportDid, downloadDidBackup } from '../wallet/did';
 import { getChallenge, verifyAuthentication } from '../api/auth';
-import { setAuthToken, clearAuthTokens, getAuthToken, isTokenExpired } from '../utils/apiClient';
+import {
+  setAuthToken,
+  clearAuthTokens,
+  getAuthToken,
+  getRefreshToken,
+  getTokenExpiry,
+  isTokenExpired,
+  refreshAuthToken,
+  TOKEN_REFRESH_MARGIN_MS,
+} from '../utils/apiClient';
 
 interface AuthContextType {
   did: string | null;
@@ -44,15 +53,37 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
     const existingJwt = getAuthToken();
     if (existingJwt) {
       // Check if token is expired
-      if (isTokenExpired()) {
+      if (!isTokenExpired()) {
+        setJwt(existingJwt);
+      } else if (getRefreshToken()) {
+        console.log('Token expired on mount, refreshing...');
+        refreshAuthToken().then(setJwt);
+      } else {
         console.log('Token expired on mount, clearing...');
         clearAuthTokens();
-      } else {
-        setJwt(existingJwt);
       }
     }
   }, []);
 
+  // Refresh the access token shortly before it expires
+  useEffect(() => {
+    const expiry = getTokenExpiry();
+    if (!jwt || expiry === null || !getRefreshToken()) {
+      return;
+    }
+
+    const delay = Math.max(0, expiry - TOKEN_REFRESH_MARGIN_MS - Date.now());
+    const timer = setTimeout(async () => {
+      const token = await refreshAuthToken();
+      if (!token) {
+        console.log('Session could not be refreshed, signing out...');
+      }
+      setJwt(token);
+    }, delay);
+
+    return () => clearTimeout(timer);
+  }, [jwt]);
+
   /**
    * Connect/Create a DID if user doesn't have one.
    */
@@ -124,9 +155,10 @@ export const AuthProvider = ({ children }: { children: ReactNode }) => {
 
       console.log('Authentication successful!');
 
-      // Step 4: Store JWT with expiry (default 24 hours if not provided by backend)
+      // Step 4: Store JWT with the expiry sent by the backend (seconds),
+      // and the refresh token used to renew it before it expires
+      setAuthToken(authResponse.access_token, authResponse.expires_in, authResponse.refresh_token);
       setJwt(authResponse.access_token);
-      setAuthToken(authResponse.access_token, 24 * 60 * 60); // 24 hours in seconds
 
     } catch (err) {
       const errorMessage = err instanceof Error ? err.message : 'Authentication failed';
@@ -3,8 +3,14 @@
  * Automatically adds JWT token to all requests
  */
 
+import { refreshAuthentication } from '../api/auth';
+
 const JWT_STORAGE_KEY = 'rize_jwt';
 const JWT_EXPIRY_KEY = 'rize_jwt_expiry';
+const REFRESH_TOKEN_KEY = 'rize_refresh_token';
+
+// Access tokens are refreshed this long before they expire
+export const TOKEN_REFRESH_MARGIN_MS = 60 * 1000;
 
 export interface ApiRequestOptions extends RequestInit {
   requiresAuth?: boolean;
@@ -18,9 +24,16 @@ export const getAuthToken = (): string | null => {
 };
 
 /**
- * Set JWT token with optional expiry time
+ * Get the refresh token from localStorage
  */
-export const setAuthToken = (token: string, expiresIn?: number): void => {
+export const getRefreshToken = (): string | null => {
+  return localStorage.getItem(REFRESH_TOKEN_KEY);
+};
+
+/**
+ * Set JWT token with optional expiry time and refresh token
+ */
+export const setAuthToken = (token: string, expiresIn?: number, refreshToken?: string): void => {
   localStorage.setItem(JWT_STORAGE_KEY, token);
   
   // If expiry is provided (in seconds), calculate and store expiry timestamp
@@ -28,19 +41,30 @@ export const setAuthToken = (token: string, expiresIn?: number): void => {
     const expiryTime = Date.now() + (expiresIn * 1000);
     localStorage.setItem(JWT_EXPIRY_KEY, expiryTime.toString());
   }
+
+  if (refreshToken) {
+    localStorage.setItem(REFRESH_TOKEN_KEY, refreshToken);
+  }
 };
 
 /**
- * Check if token is expired
+ * Get the expiry timestamp (ms) of the JWT token, or null if none is set
  */
-export const isTokenExpired = (): boolean => {
+export const getTokenExpiry = (): number | null => {
   const expiryStr = localStorage.getItem(JWT_EXPIRY_KEY);
-  if (!expiryStr) {
+  return expiryStr ? parseInt(expiryStr, 10) : null;
+};
+
+/**
+ * Check if token is expired, or expires within marginMs
+ */
+export const isTokenExpired = (marginMs: number = 0): boolean => {
+  const expiryTime = getTokenExpiry();
+  if (expiryTime === null) {
     return false; // No expiry set, assume valid
   }
   
-  const expiryTime = parseInt(expiryStr, 10);
-  return Date.now() >= expiryTime;
+  return Date.now() + marginMs >= expiryTime;
 };
 
 /**
@@ -49,6 +73,58 @@ export const isTokenExpired = (): boolean => {
 export const clearAuthTokens = (): void => {
   localStorage.removeItem(JWT_STORAGE_KEY);
   localStorage.removeItem(JWT_EXPIRY_KEY);
+  localStorage.removeItem(REFRESH_TOKEN_KEY);
+};
+
+let pendingRefresh: Promise<string | null> | null = null;
+
+/**
+ * Exchange the stored refresh token for a new access token
+ * Concurrent callers share one request, since refresh tokens are single-use.
+ * Returns the new access token, or null if the session cannot be refreshed
+ * (the tokens are then cleared).
+ */
+export const refreshAuthToken = (): Promise<string | null> => {
+  if (!pendingRefresh) {
+    pendingRefresh = (async () => {
+      const refreshToken = getRefreshToken();
+      if (!refreshToken) {
+        return null;
+      }
+
+      try {
+        const authResponse = await refreshAuthentication(refreshToken);
+        setAuthToken(authResponse.access_token, authResponse.expires_in, authResponse.refresh_token);
+        return authResponse.access_token;
+      } catch (error) {
+        // Another tab may have refreshed with the same token meanwhile
+        if (getRefreshToken() !== refreshToken && !isTokenExpired()) {
+          return getAuthToken();
+        }
+        clearAuthTokens();
+        return null;
+      }
+    })().finally(() => {
+      pendingRefresh = null;
+    });
+  }
+  return pendingRefresh;
+};
+
+/**
+ * Get a JWT token that is not about to expire, refreshing it if needed
+ */
+const getValidAuthToken = async (): Promise<string | null> => {
+  if (!isTokenExpired(TOKEN_REFRESH_MARGIN_MS)) {
+    return getAuthToken();
+  }
+  return await refreshAuthToken();
+};
+
+const redirectToLogin = (): never => {
+  clearAuthTokens();
+  window.location.href = '/';
+  throw new Error('Authentication expired. Please login again.');
 };
 
 /**
@@ -70,36 +146,41 @@ export const apiRequest = async (
 
   // Add Authorization header if authentication is required
   if (requiresAuth) {
-    const token = getAuthToken();
-    if (!token) {
+    if (!getAuthToken()) {
       throw new Error('No authentication token found. Please login again.');
     }
     
-    // Check if token is expired
-    if (isTokenExpired()) {
-      clearAuthTokens();
-      window.location.href = '/';
-      throw new Error('Authentication expired. Please login again.');
+    // Refresh the token if it is expired or about to expire
+    const token = await getValidAuthToken();
+    if (!token) {
+      redirectToLogin();
     }
     
     requestHeaders['Authorization'] = `Bearer ${token}`;
   }
 
   // Make the request
-  const response = await fetch(url, {
+  let response = await fetch(url, {
     ...restOptions,
     headers: requestHeaders,
   });
 
-  // Handle 401 Unauthorized - token expired or invalid
+  // Handle 401 Unauthorized - token expired or invalid: refresh once and retry
   if (response.status === 401) {
-    // Clear invalid token
-    localStorage.removeItem(JWT_STORAGE_KEY);
-    
-    // Redirect to login page
-    window.location.href = '/';
-    
-    throw new Error('Authentication expired. Please login again.');
+    const token = requiresAuth ? await refreshAuthToken() : null;
+    if (!token) {
+      redirectToLogin();
+    }
+
+    requestHeaders['Authorization'] = `Bearer ${token}`;
+    response = await fetch(url, {
+      ...restOptions,
+      headers: requestHeaders,
+    });
+
+    if (response.status === 401) {
+      redirectToLogin();
+    }
   }
 
   return response;